@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,9 +38,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'backend',
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,17 +71,97 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'apply.wsgi.application'
+ASGI_APPLICATION = 'apply.asgi.application'
+
+# 'wsgi' or 'asgi', the server the project is deployed behind
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+#
+# Chosen with DB_ENGINE:
+#   sqlite    (default) A single file, tuned for concurrent writers by
+#             backend.db.sqlite3. Good for small deployments.
+#   postgres  PostgreSQL with persistent connections. Set DB_POOLER=pgbouncer
+#             when connecting through PgBouncer in transaction pooling mode.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'apply'),
+            'USER': os.environ.get('DB_USER', 'apply'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Keep connections open between requests instead of paying the
+            # connection setup on each of them. Under ASGI every thread
+            # running ORM calls would hold its own connection, so there they
+            # are closed after each request and pooled by PgBouncer instead.
+            'CONN_MAX_AGE': int(os.environ.get(
+                'DB_CONN_MAX_AGE', '0' if SERVER_MODE == 'asgi' else '60')),
+            'CONN_HEALTH_CHECKS': True,
+            # Server side cursors do not survive transaction pooling
+            'DISABLE_SERVER_SIDE_CURSORS':
+                os.environ.get('DB_POOLER', '') == 'pgbouncer',
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'backend.db.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before giving up
+                'timeout': float(os.environ.get('DB_BUSY_TIMEOUT', '20')),
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'transaction_mode': 'IMMEDIATE',
+            },
+            # A file, not memory, so tests see the same locking as production
+            'TEST': {
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/ref/settings/#caches
+#
+# Shared by every process, web workers and run_jobs alike: it holds the
+# versions of the cached catalogue and office holders and pending draft
+# autosaves. Chosen with CACHE_BACKEND:
+#   file      (default) Files in CACHE_LOCATION, shared by the processes
+#             of one host.
+#   redis     Redis at CACHE_LOCATION, e.g. redis://localhost:6379/0, when
+#             the site runs on several hosts. Needs the redis package.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://localhost:6379/0'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'),
+        }
     }
-}
+
+# Tests run against a temporary cache of their own
+TEST_RUNNER = 'backend.runner.TestRunner'
 
 
 # Password validation
@@ -123,4 +206,15 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
-MEDIA_ROOT = "../media"
\ No newline at end of file
+MEDIA_ROOT = "../media"
+
+
+# Request profiling, see backend/middleware.py
+PROFILING = {
+    'SAMPLE_RATE': 0.0,
+    'SLOW_MS': 500,
+    'PROFILE_DIR': None,
+}
+
+# Bearer token required to read /api/metrics/, open if empty
+METRICS_TOKEN = ''
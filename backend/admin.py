@@ -1,3 +1,156 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _, ngettext
 
-# Register your models here.
+from . import catalogue
+from .models import (
+    Application, Member, Position, Reference, Role, Section, StudyProgram, Team,
+)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the table statistics of PostgreSQL instead of COUNT(*) for
+    unfiltered changelists of large tables. Filtered lists, small tables
+    and other databases are counted exactly.
+    """
+
+    # Below this many rows an exact count is cheap enough
+    ESTIMATE_THRESHOLD = 100000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if (query is not None and not query.where
+                and connection.vendor == 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [query.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= self.ESTIMATE_THRESHOLD:
+                return int(row[0])
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the second COUNT(*) of the whole table shown next to filters
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class ReferenceInline(admin.TabularInline):
+    model = Reference
+    extra = 0
+
+
+@admin.register(Application)
+class ApplicationAdmin(LargeTableAdmin):
+    list_display = ('id', 'member', 'position', 'status', 'rank', 'locked', 'rejection_date')
+    list_select_related = ('member', 'position__role')
+    list_filter = ('status', 'locked')
+    search_fields = ('member__name', 'member__email')
+    autocomplete_fields = ('member', 'position')
+    inlines = (ReferenceInline,)
+    actions = ('approve', 'disapprove', 'turn_down', 'appoint')
+    # Changed only through the actions, which go through the state machine
+    # and record the transition, mandates and decision emails
+    transition_fields = ('status', 'locked', 'rejection_date')
+
+    def get_readonly_fields(self, request, obj=None):
+        readonly = super().get_readonly_fields(request, obj)
+        if obj is None:
+            return readonly
+        return tuple(readonly) + self.transition_fields
+
+    def _transition(self, request, queryset, status):
+        transition = queryset.transition(status)
+        moved = transition.count if transition else 0
+        self.message_user(request, ngettext(
+            'Moved %(count)d application to %(status)s.',
+            'Moved %(count)d applications to %(status)s.',
+            moved,
+        ) % {'count': moved, 'status': status})
+
+    @admin.action(description=_('Approve selected applications'))
+    def approve(self, request, queryset):
+        self._transition(request, queryset, 'approved')
+
+    @admin.action(description=_('Disapprove selected applications'))
+    def disapprove(self, request, queryset):
+        self._transition(request, queryset, 'disapproved')
+
+    @admin.action(description=_('Turn down selected applications'))
+    def turn_down(self, request, queryset):
+        self._transition(request, queryset, 'turned_down')
+
+    @admin.action(description=_('Appoint selected applications'))
+    def appoint(self, request, queryset):
+        self._transition(request, queryset, 'appointed')
+
+
+@admin.register(Member)
+class MemberAdmin(LargeTableAdmin):
+    list_display = ('name', 'email', 'status', 'study_program')
+    list_select_related = ('study_program',)
+    list_filter = ('status',)
+    search_fields = ('name', 'email', 'ssn')
+    autocomplete_fields = ('study_program',)
+
+
+@admin.register(Position)
+class PositionAdmin(LargeTableAdmin):
+    list_display = ('id', 'role', 'recruitment_start', 'recruitment_end', 'term_end')
+    list_select_related = ('role',)
+    search_fields = ('role__title_en', 'role__title_sv')
+    autocomplete_fields = ('role',)
+    filter_horizontal = ('eligible_sections',)
+
+
+@admin.register(Role)
+class RoleAdmin(LargeTableAdmin):
+    list_display = ('title_en', 'team', 'role_type', 'archived')
+    list_select_related = ('team',)
+    list_filter = ('role_type', 'archived')
+    search_fields = ('title_en', 'title_sv')
+    autocomplete_fields = ('team',)
+    actions = ('archive', 'unarchive')
+
+    def _set_archived(self, request, queryset, archived):
+        # update() neither sends signals nor touches auto_now fields
+        changed = queryset.exclude(archived=archived).update(
+            archived=archived, updated_at=timezone.now())
+        catalogue.invalidate()
+        self.message_user(request, ngettext(
+            'Updated %d role.', 'Updated %d roles.', changed) % changed)
+
+    @admin.action(description=_('Archive selected roles'))
+    def archive(self, request, queryset):
+        self._set_archived(request, queryset, True)
+
+    @admin.action(description=_('Restore selected roles'))
+    def unarchive(self, request, queryset):
+        self._set_archived(request, queryset, False)
+
+
+@admin.register(Team)
+class TeamAdmin(admin.ModelAdmin):
+    list_display = ('name_en', 'name_sv')
+    search_fields = ('name_en', 'name_sv')
+
+
+@admin.register(Section)
+class SectionAdmin(admin.ModelAdmin):
+    list_display = ('abbreviation', 'section_en')
+    search_fields = ('abbreviation', 'section_en', 'section_sv')
+
+
+@admin.register(StudyProgram)
+class StudyProgramAdmin(admin.ModelAdmin):
+    list_display = ('name_en', 'section')
+    list_select_related = ('section',)
+    search_fields = ('name_en', 'name_sv')
@@ -0,0 +1,171 @@
+"""
+Allocation of appointments across a recruitment round.
+
+Once the reviewers have approved and ranked (Application.rank) the
+applications of a round, allocate() decides them all at once: each
+position gets up to Position.appointed people, nobody is appointed to
+more than max_per_member positions of the round, and every other
+approved application of the round is turned down.
+
+Conflicts, such as a member ranked first for several positions, are
+resolved with deferred acceptance (Gale-Shapley) with members proposing:
+
+- every member applies to positions in order of preference, by default
+  the positions where they are ranked best first,
+- every position tentatively holds its best ranked proposals up to its
+  free seats, releasing the worst held one when a better one arrives,
+- released members propose to their next position, until nobody has
+  anywhere left to propose.
+
+The outcome is stable: no member and position both prefer each other to
+what they were given. Each application is proposed at most once and a
+position's held proposals are a heap, so a round costs O(n log n) in the
+number of approved applications, read with one query and written with
+one transition per outcome.
+"""
+import heapq
+import time
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Application
+
+
+class AllocationResult:
+    """
+    Outcome of an allocation.
+    Attributes:
+        appointed (list): Ids of the applications appointed.
+        turned_down (list): Ids of the approved applications turned down.
+        unfilled (dict): Seats left empty per position id.
+        elapsed (float): Wall clock time of the allocation in seconds.
+    """
+
+    def __init__(self, appointed, turned_down, unfilled):
+        self.appointed = appointed
+        self.turned_down = turned_down
+        self.unfilled = unfilled
+        self.elapsed = 0.0
+
+
+def _rank_key(rank, application_id):
+    # Unranked applications come after every ranked one
+    return (rank is None, rank or 0, application_id)
+
+
+def match(candidates, seats, preferences=None, max_per_member=1, holding=None):
+    """
+    Deferred acceptance on plain data.
+
+    candidates maps (member id, position id) to (rank, application id),
+    seats maps position id to the number of free seats, preferences
+    optionally maps member id to position ids in order of preference and
+    holding the number of seats each member already holds.
+
+    Returns the set of (member id, position id) pairs matched.
+    """
+    preferences = preferences or {}
+    holding = defaultdict(int, holding or {})
+    choices = defaultdict(list)
+    for (member_id, position_id), (rank, pk) in candidates.items():
+        choices[member_id].append((_rank_key(rank, pk), position_id))
+
+    queues = {}
+    for member_id, options in choices.items():
+        options.sort()
+        order = [position_id for _, position_id in options]
+        preferred = [p for p in preferences.get(member_id, ()) if p in order]
+        if preferred:
+            listed = set(preferred)
+            order = preferred + [p for p in order if p not in listed]
+        queues[member_id] = order
+    next_choice = dict.fromkeys(queues, 0)
+
+    # position id: heap of (negated rank key, member id), worst on top
+    held = defaultdict(list)
+    free = list(queues)
+    while free:
+        member_id = free.pop()
+        queue = queues[member_id]
+        while (holding[member_id] < max_per_member
+               and next_choice[member_id] < len(queue)):
+            position_id = queue[next_choice[member_id]]
+            next_choice[member_id] += 1
+            capacity = seats.get(position_id, 0)
+            if capacity <= 0:
+                continue
+            key = _rank_key(*candidates[member_id, position_id])
+            entry = (tuple(-k for k in key), member_id)
+            heap = held[position_id]
+            if len(heap) < capacity:
+                heapq.heappush(heap, entry)
+                holding[member_id] += 1
+            elif heap[0] < entry:
+                _, released = heapq.heapreplace(heap, entry)
+                holding[member_id] += 1
+                holding[released] -= 1
+                free.append(released)
+
+    return {
+        (member_id, position_id)
+        for position_id, heap in held.items()
+        for _, member_id in heap
+    }
+
+
+def allocate(positions, preferences=None, max_per_member=1, dry_run=False,
+             today=None):
+    """
+    Decides the approved applications to the positions of a round, given
+    as a Position queryset. Returns an AllocationResult; with dry_run
+    nothing is written.
+    """
+    started = time.monotonic()
+    with transaction.atomic():
+        seats = dict(positions.values_list('id', 'appointed'))
+        rows = list(
+            Application.objects
+            .filter(position_id__in=list(seats), status='approved', locked=False)
+            .select_for_update()
+            .values_list('member_id', 'position_id', 'rank', 'id')
+        )
+        taken = (
+            Application.objects
+            .filter(position_id__in=list(seats), status='appointed')
+            .values_list('position_id', 'member_id')
+        )
+        holding = defaultdict(int)
+        for position_id, member_id in taken:
+            seats[position_id] -= 1
+            holding[member_id] += 1
+
+        candidates = {
+            (member_id, position_id): (rank, pk)
+            for member_id, position_id, rank, pk in rows
+        }
+        matched = match(candidates, seats, preferences, max_per_member, holding)
+        appointed = sorted(candidates[pair][1] for pair in matched)
+        turned_down = sorted(
+            pk for pair, (_, pk) in candidates.items() if pair not in matched)
+
+        filled = defaultdict(int)
+        for _, position_id in matched:
+            filled[position_id] += 1
+        unfilled = {
+            position_id: free - filled[position_id]
+            for position_id, free in seats.items()
+            if free - filled[position_id] > 0
+        }
+
+        if not dry_run:
+            if appointed:
+                Application.objects.filter(pk__in=appointed).transition(
+                    'appointed', today=today)
+            if turned_down:
+                Application.objects.filter(pk__in=turned_down).transition(
+                    'turned_down', today=today)
+
+    result = AllocationResult(appointed, turned_down, unfilled)
+    result.elapsed = time.monotonic() - started
+    return result
@@ -0,0 +1,212 @@
+"""
+Recruitment analytics per round, team, section and cohort.
+
+Counting applications per team or per section means joining applications
+to positions, roles and teams, or to members, study programs and
+sections. Those joins are only run by the refresh_analytics command,
+which stores the counts per status in AnalyticsSnapshot; the analytics
+API reads nothing else.
+
+A round is the set of positions sharing a recruitment deadline. Each run
+recomputes
+
+- every round whose deadline is less than ACTIVE_DAYS ago, as statuses
+  may still change through any code path, and
+- older rounds touched since the previous run, i.e. with applications
+  created or moved by a bulk transition since the ids stored in the
+  'analytics' Checkpoint.
+
+Rounds that are not recomputed keep their counts, so they survive the
+deletion of old applications by the GDPR retention.
+"""
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import (
+    AnalyticsSnapshot, Application, ApplicationTransition, Checkpoint,
+    Position, Section, Team,
+)
+
+
+CHECKPOINT_NAME = 'analytics'
+
+DEFAULTS = {
+    # Rounds closed for fewer days than this are recomputed on every run
+    'ACTIVE_DAYS': 90,
+}
+
+# dimension: application field holding the group, None for the whole round
+DIMENSIONS = {
+    'round': None,
+    'team': 'position__role__team_id',
+    'section': 'member__study_program__section_id',
+    'registration_year': 'member__registration_year',
+}
+
+# Transitions' application ids are looked up this many at a time
+CHUNK_SIZE = 500
+
+
+def config():
+    return dict(DEFAULTS, **getattr(settings, 'ANALYTICS', {}))
+
+
+class RefreshResult:
+    """
+    Outcome of an analytics refresh.
+    Attributes:
+        rounds (list): The rounds recomputed.
+        rows (int): Number of snapshot rows written.
+        elapsed (float): Wall clock time of the refresh in seconds.
+    """
+
+    def __init__(self, rounds, rows):
+        self.rounds = rounds
+        self.rows = rows
+        self.elapsed = 0.0
+
+
+def _touched_rounds(progress):
+    """
+    Rounds with applications created or moved by a transition after the
+    ids in progress, and the new progress.
+    """
+    rounds = set()
+    latest = {
+        'application': Application.objects.aggregate(m=Max('id'))['m'] or 0,
+        'transition': ApplicationTransition.objects.aggregate(m=Max('id'))['m'] or 0,
+    }
+    rounds.update(
+        Application.objects
+        .filter(pk__gt=progress.get('application', 0), pk__lte=latest['application'])
+        .values_list('position__recruitment_end', flat=True)
+        .distinct()
+    )
+    ids = []
+    for application_ids in (
+            ApplicationTransition.objects
+            .filter(pk__gt=progress.get('transition', 0), pk__lte=latest['transition'])
+            .values_list('application_ids', flat=True)):
+        ids.extend(application_ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        rounds.update(
+            Application.objects
+            .filter(pk__in=ids[start:start + CHUNK_SIZE])
+            .values_list('position__recruitment_end', flat=True)
+            .distinct()
+        )
+    return rounds, latest
+
+
+def compute(rounds):
+    """
+    Unsaved AnalyticsSnapshot rows for the given rounds, one GROUP BY
+    query per dimension.
+    """
+    snapshots = {}
+    for dimension, field in DIMENSIONS.items():
+        group = ['position__recruitment_end', 'status'] + ([field] if field else [])
+        counts = (
+            Application.objects
+            .filter(position__recruitment_end__in=rounds)
+            .values(*group)
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for row in counts:
+            key = row[field] if field else ''
+            key = '' if key is None else str(key)
+            round_ = row['position__recruitment_end']
+            snapshot = snapshots.get((dimension, round_, key))
+            if snapshot is None:
+                snapshot = snapshots[dimension, round_, key] = AnalyticsSnapshot(
+                    dimension=dimension, round=round_, key=key)
+            setattr(snapshot, row['status'], row['n'])
+    return list(snapshots.values())
+
+
+def refresh(full=False, today=None):
+    """
+    Recomputes the snapshots of active and touched rounds, or with full of
+    every round that still has applications. Rounds whose applications
+    have all been deleted keep their snapshots either way.
+    """
+    started = time.monotonic()
+    conf = config()
+    today = today or date.today()
+    progress = {} if full else Checkpoint.load(CHECKPOINT_NAME)
+    rounds, latest = _touched_rounds(progress)
+    if full:
+        rounds.update(
+            Application.objects
+            .values_list('position__recruitment_end', flat=True)
+            .distinct()
+            .order_by()
+        )
+    else:
+        rounds.update(
+            Position.objects
+            .filter(recruitment_end__gte=today - timedelta(days=conf['ACTIVE_DAYS']))
+            .values_list('recruitment_end', flat=True)
+            .distinct()
+        )
+    rounds = sorted(rounds)
+
+    snapshots = compute(rounds)
+    with transaction.atomic():
+        AnalyticsSnapshot.objects.filter(round__in=rounds).delete()
+        AnalyticsSnapshot.objects.bulk_create(snapshots)
+        Checkpoint.store(CHECKPOINT_NAME, latest)
+
+    result = RefreshResult(rounds, len(snapshots))
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def _labels(dimension, keys, language):
+    if dimension == 'team':
+        names = Team.objects.filter(pk__in=[k for k in keys if k]).values_list(
+            'id', 'name_' + language)
+    elif dimension == 'section':
+        names = Section.objects.filter(pk__in=[k for k in keys if k]).values_list(
+            'id', 'section_' + language)
+    else:
+        return {key: key for key in keys}
+    return {str(pk): name for pk, name in names}
+
+
+def report(dimension, since=None, until=None, language='en'):
+    """
+    The snapshot rows of one dimension, oldest round first, with a label
+    for each group, the total and the share of submitted applications
+    that led to an appointment.
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError('Unknown dimension %r' % dimension)
+    snapshots = AnalyticsSnapshot.objects.filter(dimension=dimension)
+    if since:
+        snapshots = snapshots.filter(round__gte=since)
+    if until:
+        snapshots = snapshots.filter(round__lte=until)
+    snapshots = list(snapshots.order_by('round', 'key'))
+    labels = _labels(dimension, {s.key for s in snapshots}, language)
+
+    rows = []
+    for snapshot in snapshots:
+        counts = snapshot.as_dict()
+        total = sum(counts.values())
+        # Everything past draft has been submitted at some point
+        submitted = total - counts['draft']
+        rows.append({
+            'round': snapshot.round,
+            'key': snapshot.key,
+            'label': labels.get(snapshot.key, ''),
+            'counts': counts,
+            'total': total,
+            'conversion': counts['appointed'] / submitted if submitted else None,
+        })
+    return rows
@@ -0,0 +1,219 @@
+"""
+Autosave of draft applications.
+
+Applicants write their cover letter and qualifications over hours, and
+the browser saves every few seconds. Rewriting the whole row each time
+would be most of the write load of the site, so autosaves are handled
+like this instead:
+
+- A save is a patch of only the fields that changed, sent together with
+  the version of the draft the browser last saw. A patch against any
+  other version comes from a stale tab and is refused with StaleDraft.
+- Patches are merged in the cache, with the draft's version incremented
+  on each. The merged fields are written to the database at most once
+  per DEBOUNCE seconds per draft, by the save that finds the window has
+  passed, or when the draft is submitted. A draft left alone keeps its
+  last patches in the cache, where get_draft() still finds them, so an
+  abandoned draft costs no writes at all.
+- Writes use save(update_fields=...), so the UPDATE only carries the
+  fields that were patched and the version, and are conditional on the
+  row still being the unlocked draft the patches were based on.
+
+Pending patches live in the cache, which must therefore be shared by all
+web processes (see CACHES in the settings). If it is lost, so is the
+typing since the last write.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Application
+
+
+FIELDS = ('cover_letter', 'qualifications')
+
+DEFAULTS = {
+    # Seconds between writes of the same draft, 0 writes every save
+    'DEBOUNCE': 15,
+    # Seconds pending patches are kept in the cache without another save
+    # or the submission writing them
+    'PENDING_TIMEOUT': 60 * 60 * 24 * 7,
+}
+
+LOCK_TIMEOUT = 10
+
+
+def config():
+    return dict(DEFAULTS, **getattr(settings, 'AUTOSAVE', {}))
+
+
+class DraftNotFound(Exception):
+    """
+    Raised when the member has no such application.
+    """
+
+
+class DraftNotEditable(Exception):
+    """
+    Raised when the application is no longer an unlocked draft.
+    """
+
+
+class StaleDraft(Exception):
+    """
+    Raised when a patch is based on an outdated version of the draft, or
+    another save of it is in progress.
+    """
+
+    def __init__(self, version):
+        super().__init__('The draft has been changed elsewhere')
+        self.version = version
+
+
+class DraftBusy(Exception):
+    """
+    Raised when the draft cannot be flushed as a save of it is in progress.
+    """
+
+
+class AutosaveResult:
+    """
+    Outcome of an autosave.
+    Attributes:
+        version (int): The new version of the draft.
+        saved (bool): True if the draft was written to the database, False
+            if the patch is pending in the cache.
+    """
+
+    def __init__(self, version, saved):
+        self.version = version
+        self.saved = saved
+
+
+def _pending_key(application_id):
+    return 'autosave:%d' % application_id
+
+
+def _lock_key(application_id):
+    return 'autosave_lock:%d' % application_id
+
+
+def _load_draft(application_id, member_id):
+    row = (
+        Application.objects
+        .filter(pk=application_id, member_id=member_id)
+        .values('status', 'locked', 'version')
+        .first()
+    )
+    if row is None:
+        raise DraftNotFound
+    if row['status'] != 'draft' or row['locked']:
+        raise DraftNotEditable
+    return row['version']
+
+
+def _write(application_id, pending):
+    """
+    Writes pending patches to the database unless the draft has moved on
+    since they were based on it. Returns True if it was written.
+    """
+    with transaction.atomic():
+        application = (
+            Application.objects.select_for_update()
+            .only('status', 'locked', 'version')
+            .filter(pk=application_id)
+            .first()
+        )
+        if (application is None or application.status != 'draft'
+                or application.locked
+                or application.version != pending['base']):
+            return False
+        for field, value in pending['fields'].items():
+            setattr(application, field, value)
+        application.version = pending['version']
+        application.save(update_fields=[*pending['fields'], 'version'])
+    return True
+
+
+def save_patch(application_id, member_id, version, patch, now=None):
+    """
+    Applies patch, a dict of some of FIELDS, to the member's draft, if
+    version is its current version. Returns an AutosaveResult.
+    """
+    if not patch or set(patch) - set(FIELDS) or not all(
+            isinstance(value, str) for value in patch.values()):
+        raise ValueError('Only %s can be autosaved' % ', '.join(FIELDS))
+    conf = config()
+    now = time.time() if now is None else now
+    if not cache.add(_lock_key(application_id), 1, LOCK_TIMEOUT):
+        raise StaleDraft(version)
+    try:
+        key = _pending_key(application_id)
+        pending = cache.get(key)
+        if pending is None or pending['member'] != member_id:
+            current = _load_draft(application_id, member_id)
+            pending = {
+                'member': member_id,
+                'base': current,
+                'version': current,
+                'since': now,
+                'fields': {},
+            }
+        if version != pending['version']:
+            raise StaleDraft(pending['version'])
+        pending['fields'].update(patch)
+        pending['version'] += 1
+
+        if now - pending['since'] >= conf['DEBOUNCE']:
+            if not _write(application_id, pending):
+                cache.delete(key)
+                raise DraftNotEditable
+            cache.delete(key)
+            return AutosaveResult(pending['version'], True)
+
+        cache.set(key, pending, conf['PENDING_TIMEOUT'])
+        return AutosaveResult(pending['version'], False)
+    finally:
+        cache.delete(_lock_key(application_id))
+
+
+def flush(application_id):
+    """
+    Writes any pending patches of a draft to the database. Returns True
+    if there was something to write and it was written.
+    """
+    if not cache.add(_lock_key(application_id), 1, LOCK_TIMEOUT):
+        raise DraftBusy('Draft %d is being saved' % application_id)
+    try:
+        key = _pending_key(application_id)
+        pending = cache.get(key)
+        if pending is None:
+            return False
+        written = _write(application_id, pending)
+        cache.delete(key)
+        return written
+    finally:
+        cache.delete(_lock_key(application_id))
+
+
+def get_draft(application_id, member_id):
+    """
+    The member's draft as the browser should show it, including pending
+    patches, as a dict with the version to base the next patch on.
+    """
+    application = (
+        Application.objects
+        .filter(pk=application_id, member_id=member_id)
+        .values('id', 'status', 'locked', 'version', *FIELDS)
+        .first()
+    )
+    if application is None:
+        raise DraftNotFound
+    pending = cache.get(_pending_key(application_id))
+    if (pending is not None and pending['member'] == member_id
+            and pending['base'] == application['version']):
+        application.update(pending['fields'])
+        application['version'] = pending['version']
+    return application
@@ -0,0 +1,309 @@
+"""
+Benchmarks of the main apply workflows against synthetic data.
+
+seed() fills the database with sections, study programs, teams, roles,
+positions, members and applications scaled from a number of applications.
+run() then times each flow in FLOWS and reports its query count, p50/p95
+latency and peak Python memory. compare() checks a report against a stored
+baseline: query counts may not grow at all, latency and memory only within
+a tolerance. Only the metrics present in the baseline are checked, so a
+baseline holding just query counts works on any machine.
+
+Run it through the benchmark management command, which uses a throwaway
+test database.
+"""
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import exports, membership, search
+from .models import (
+    Application, Member, Position, PositionStatistics, Reference, Role,
+    Section, StudyProgram, Team,
+)
+from .unicore import LocalUnicoreClient
+from .views import MEMBER_SESSION_KEY
+
+
+BATCH_SIZE = 5000
+
+
+def _bulk(model, objs):
+    return model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+
+def seed(applications=1000, random_seed=0):
+    """
+    Create synthetic data around the given number of applications.
+    Returns a dict with the number of rows created per model.
+    """
+    rng = random.Random(random_seed)
+    today = date.today()
+    now = timezone.now()
+    n_positions = max(10, applications // 50)
+    n_roles = max(5, n_positions // 2)
+    n_teams = max(2, n_roles // 5)
+    n_members = max(10, applications // 3)
+
+    sections = _bulk(Section, [
+        Section(abbreviation='S%d' % i, section_en='Section %d' % i,
+                section_sv='Sektion %d' % i)
+        for i in range(5)
+    ])
+    programs = _bulk(StudyProgram, [
+        StudyProgram(section=sections[i % 5], name_en='Program %d' % i,
+                     name_sv='Program %d' % i)
+        for i in range(20)
+    ])
+    teams = _bulk(Team, [
+        Team(name_en='Team %d' % i, name_sv='Lag %d' % i,
+             desc_en='About team %d' % i, desc_sv='Om lag %d' % i)
+        for i in range(n_teams)
+    ])
+    roles = _bulk(Role, [
+        Role(team=teams[i % n_teams],
+             role_type=rng.choice(Role.TYPE_CHOICES)[0],
+             archived=rng.random() < 0.1,
+             title_en='Role %d' % i, title_sv='Roll %d' % i,
+             description_en='Responsible for budgets and events %d' % i,
+             description_sv='Ansvarar för budgetar och evenemang %d' % i,
+             contact_email='role%d@utn.se' % i)
+        for i in range(n_roles)
+    ])
+    positions = _bulk(Position, [
+        Position(role=roles[i % n_roles],
+                 recruitment_start=today - timedelta(days=rng.randint(0, 60)),
+                 recruitment_end=today + timedelta(days=rng.randint(-30, 30)),
+                 appointed=rng.randint(1, 3),
+                 term_from=now + timedelta(days=60),
+                 term_end=today + timedelta(days=425))
+        for i in range(n_positions)
+    ])
+    members = _bulk(Member, [
+        Member(unicore_id=i, email='member%d@utn.se' % i,
+               phone_number='070%07d' % i, is_superuser=False,
+               name='Member %d' % i, ssn='19%08d' % i,
+               study_program=programs[i % 20],
+               registration_year=str(2015 + i % 10),
+               status=rng.choice(('member', 'member', 'member', 'nonmember')))
+        for i in range(n_members)
+    ])
+
+    statuses = [status for status, _ in Application.STATUS_CHOICES]
+    words = ('experience', 'budget', 'events', 'teamwork', 'erfarenhet',
+             'ledarskap', 'styrelse', 'programming', 'communication')
+    # A member applies to a position at most once
+    pairs = set()
+    while len(pairs) < min(applications, n_positions * n_members):
+        pairs.add((rng.randrange(n_positions), rng.randrange(n_members)))
+    pairs = list(pairs)
+    rng.shuffle(pairs)
+    applications = len(pairs)
+    created = 0
+    references = 0
+    while created < applications:
+        count = min(BATCH_SIZE, applications - created)
+        batch = _bulk(Application, [
+            Application(
+                position=positions[position],
+                member=members[member],
+                status=rng.choice(statuses),
+                cover_letter=' '.join(rng.choice(words) for _ in range(200)),
+                qualifications=' '.join(rng.choice(words) for _ in range(50)),
+                gdpr=True,
+            )
+            for position, member in pairs[created:created + count]
+        ])
+        refs = _bulk(Reference, [
+            Reference(application=application, name='Reference',
+                      email='ref@utn.se')
+            for application in batch for _ in range(rng.randint(0, 2))
+        ])
+        created += count
+        references += len(refs)
+
+    PositionStatistics.objects.rebuild()
+    search.rebuild()
+    return {
+        'sections': len(sections),
+        'study_programs': len(programs),
+        'teams': len(teams),
+        'roles': len(roles),
+        'positions': len(positions),
+        'members': len(members),
+        'applications': created,
+        'references': references,
+    }
+
+
+def _signed_in_client(member=None, staff=None):
+    client = Client()
+    if staff is not None:
+        client.force_login(staff)
+    if member is not None:
+        session = client.session
+        session[MEMBER_SESSION_KEY] = member.pk
+        session.save()
+    return client
+
+
+class Context:
+    """
+    Objects shared by the flows of one run. Flows go through the real
+    endpoints; signing in is done here, outside the timed part.
+    """
+
+    def __init__(self, submissions):
+        self.client = Client()
+        self.position = (
+            Position.objects.open().order_by('-statistics__submitted').first())
+        self.team = self.position.role.team
+        self.staff = _signed_in_client(staff=User.objects.create_user(
+            'benchmark', is_staff=True))
+        # Signed in members yet to apply to the position, one per submission
+        applicants = list(
+            Member.objects.filter(status='member')
+            .exclude(application__position=self.position)
+            .order_by('id')[:submissions]
+        )
+        self.applicants = iter([_signed_in_client(member) for member in applicants])
+        # Unicore answers from memory so its latency is not measured
+        self._verifier = membership._verifier
+        membership._verifier = membership.MembershipVerifier(
+            client=LocalUnicoreClient([
+                {'id': member.unicore_id, 'status': member.status}
+                for member in applicants
+            ]))
+
+    def close(self):
+        membership._verifier = self._verifier
+
+
+def flow_list_positions(ctx):
+    response = ctx.client.get(reverse('backend:open_positions'))
+    assert response.status_code == 200
+
+
+def flow_submit_application(ctx):
+    response = next(ctx.applicants).post(
+        reverse('backend:submit_application'),
+        json.dumps({
+            'position': ctx.position.pk,
+            'cover_letter': 'I would like to help',
+            'qualifications': 'Lots',
+            'gdpr': True,
+            'references': [{'name': 'Reference', 'email': 'ref@utn.se'}],
+        }),
+        content_type='application/json',
+    )
+    assert response.status_code == 201, response.content
+
+
+def flow_reviewer_dashboard(ctx):
+    response = ctx.staff.get(
+        reverse('backend:team_applications', args=[ctx.team.pk]))
+    assert response.status_code == 200
+
+
+def flow_export(ctx):
+    for _ in exports.stream_csv(ctx.position):
+        pass
+
+
+def flow_search(ctx):
+    search.search('budget teamwork', limit=20)
+
+
+FLOWS = {
+    'list_positions': flow_list_positions,
+    'submit_application': flow_submit_application,
+    'reviewer_dashboard': flow_reviewer_dashboard,
+    'export': flow_export,
+    'search': flow_search,
+}
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run(iterations=20, flows=None):
+    """
+    Run each flow iterations times and return
+    {flow: {'queries', 'p50_ms', 'p95_ms', 'peak_kb'}}.
+    """
+    # Each submission needs a member of its own: warm up, timed and
+    # memory passes
+    ctx = Context(submissions=iterations + 2)
+    try:
+        return _run(ctx, iterations, flows)
+    finally:
+        ctx.close()
+
+
+def _run(ctx, iterations, flows):
+    report = {}
+    for name in flows or FLOWS:
+        flow = FLOWS[name]
+        flow(ctx)  # warm up caches and connections
+        timings = []
+        queries = 0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                flow(ctx)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+        # Memory is traced in a separate pass as tracing slows the flow down
+        tracemalloc.start()
+        flow(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report[name] = {
+            'queries': queries,
+            'p50_ms': round(_percentile(timings, 50), 3),
+            'p95_ms': round(_percentile(timings, 95), 3),
+            'peak_kb': round(peak / 1024, 1),
+        }
+    return report
+
+
+def compare(report, baseline, tolerance=0.25):
+    """
+    Return a list of regressions of report against baseline.
+    """
+    regressions = []
+    for name, expected in baseline.items():
+        actual = report.get(name)
+        if actual is None:
+            continue
+        for metric, limit in expected.items():
+            if metric not in actual:
+                continue
+            allowed = limit if metric == 'queries' else limit * (1 + tolerance)
+            if actual[metric] > allowed:
+                regressions.append('%s: %s is %s, baseline %s' % (
+                    name, metric, actual[metric], limit))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, report):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,131 @@
+"""
+Cached read model of the team/role and section/study program catalogue.
+
+The catalogue is serialized once per language and stored both in the shared
+Django cache and in process memory, keyed by a version token kept in the
+shared cache. Saving or deleting any of the underlying models replaces the
+token, so every process rebuilds on its next read. In steady state a read
+costs one cache lookup and no database queries.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.urls import reverse
+from django.utils.translation import get_language
+
+from .models import Role, Section, Team
+
+
+LANGUAGES = ('en', 'sv')
+VERSION_KEY = 'catalogue:version'
+CACHE_TIMEOUT = getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+_local = {}
+_lock = threading.Lock()
+
+
+def normalize_language(language=None):
+    """
+    Map a language code such as 'sv-se' to one of LANGUAGES.
+    """
+    language = (language or get_language() or 'en').lower()
+    if language.startswith('sv'):
+        return 'sv'
+    return 'en'
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """
+    Make every process drop its copy of the catalogue. Deferred until the
+    surrounding transaction commits so no one caches uncommitted data.
+    """
+    transaction.on_commit(
+        lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def _role(role, language):
+    return {
+        'id': role.id,
+        'title': getattr(role, 'title_' + language),
+        'description': getattr(role, 'description_' + language),
+        'role_type': role.role_type,
+        'contact_email': role.contact_email,
+    }
+
+
+def _team(team, language):
+    return {
+        'id': team.id,
+        'name': getattr(team, 'name_' + language),
+        'description': getattr(team, 'desc_' + language),
+        'logo': team.logo.url if team.logo else None,
+        'logo_thumbnail': reverse(
+            'backend:team_logo', args=[team.id, 'medium']) if team.logo else None,
+        'roles': [_role(role, language) for role in team.active_roles],
+    }
+
+
+def _section(section, language):
+    return {
+        'id': section.id,
+        'abbreviation': section.abbreviation,
+        'name': getattr(section, 'section_' + language),
+        'study_programs': [
+            {'id': program.id, 'name': getattr(program, 'name_' + language)}
+            for program in section.study_programs.all()
+        ],
+    }
+
+
+def build_catalogue(language):
+    """
+    Serialize the catalogue for one language straight from the database.
+    """
+    teams = Team.objects.order_by('name_' + language).prefetch_related(
+        Prefetch(
+            'role',
+            queryset=Role.objects.filter(archived=False).order_by('title_' + language),
+            to_attr='active_roles',
+        )
+    )
+    sections = Section.objects.order_by('abbreviation').prefetch_related(
+        'study_programs')
+    return {
+        'teams': [_team(team, language) for team in teams],
+        'sections': [_section(section, language) for section in sections],
+    }
+
+
+def get_catalogue(language=None):
+    """
+    The catalogue for language (default: the active language), served from
+    process memory or the shared cache whenever the version is current.
+    The returned data is shared between callers and must not be modified.
+    """
+    language = normalize_language(language)
+    version = current_version()
+
+    local = _local.get(language)
+    if local is not None and local[0] == version:
+        return local[1]
+
+    key = 'catalogue:%s:%s' % (version, language)
+    data = cache.get(key)
+    if data is None:
+        data = build_catalogue(language)
+        cache.set(key, data, CACHE_TIMEOUT)
+    with _lock:
+        _local[language] = (version, data)
+    return data
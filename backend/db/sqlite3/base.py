@@ -0,0 +1,60 @@
+"""
+SQLite database backend tuned for concurrent web traffic.
+
+Used as ENGINE 'backend.db.sqlite3'. On top of Django's SQLite backend
+every new connection is switched to WAL journaling, so readers no longer
+block the writer, with synchronous=NORMAL and a busy timeout, and
+transactions are opened with BEGIN IMMEDIATE. Taking the write lock up
+front makes concurrent writers queue on the busy timeout instead of
+failing with "database is locked" when a read transaction tries to
+upgrade to a write.
+
+Extra OPTIONS, next to the standard 'timeout' in seconds:
+    journal_mode: default 'WAL'
+    synchronous: default 'NORMAL'
+    transaction_mode: 'DEFERRED', 'IMMEDIATE' (default) or 'EXCLUSIVE'
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+DEFAULT_TIMEOUT = 20
+
+
+def _choice(options, name, default, allowed):
+    value = str(options.get(name, default)).upper()
+    if value not in allowed:
+        raise ImproperlyConfigured(
+            'SQLite option %s must be one of %s' % (name, ', '.join(allowed)))
+    return value
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        options = self.settings_dict['OPTIONS']
+        self.journal_mode = _choice(options, 'journal_mode', 'WAL', JOURNAL_MODES)
+        self.synchronous = _choice(options, 'synchronous', 'NORMAL', SYNCHRONOUS)
+        self.transaction_mode = _choice(
+            options, 'transaction_mode', 'IMMEDIATE', TRANSACTION_MODES)
+        for name in ('journal_mode', 'synchronous', 'transaction_mode'):
+            kwargs.pop(name, None)
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        self.busy_timeout_ms = int(kwargs['timeout'] * 1000)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        # WAL is meaningless for in-memory databases, e.g. during tests
+        if not self.is_in_memory_db():
+            conn.execute('PRAGMA journal_mode = %s' % self.journal_mode)
+        conn.execute('PRAGMA synchronous = %s' % self.synchronous)
+        conn.execute('PRAGMA busy_timeout = %d' % self.busy_timeout_ms)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN %s' % self.transaction_mode)
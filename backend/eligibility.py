@@ -0,0 +1,70 @@
+"""
+Who may apply to what.
+
+A member may apply to a position when
+
+- they are a member of the union, unless the position is open to anyone
+  (Position.members_only),
+- their study program belongs to one of Position.eligible_sections, if
+  the position restricts sections at all, and
+- they have no active application to it already, which the
+  unique_active_application index answers.
+
+For one member, Position.objects.eligible_for() applies these rules in a
+single query. eligible_pairs() evaluates them for many members against
+many positions at once, e.g. for a recruiter checking a mailing list.
+"""
+from django.db import connection
+
+from .models import ACTIVE_STATUSES, Application, Member, Position, StudyProgram
+
+
+def eligible_pairs(member_ids, position_ids):
+    """
+    The set of (member id, position id) pairs, out of the given members
+    and positions, where the member may apply to the position. One query.
+    """
+    member_ids = list(member_ids)
+    position_ids = list(position_ids)
+    if not member_ids or not position_ids:
+        return set()
+
+    sections = Position.eligible_sections.through._meta.db_table
+
+    def placeholders(values):
+        return ', '.join(['%s'] * len(values))
+
+    sql = '''
+        SELECT m.id, p.id
+        FROM {member} m
+        CROSS JOIN {position} p
+        LEFT JOIN {program} sp ON sp.id = m.study_program_id
+        WHERE m.id IN ({member_ids})
+          AND p.id IN ({position_ids})
+          AND (p.members_only = %s OR m.status = %s)
+          AND (
+            NOT EXISTS (SELECT 1 FROM {sections} es WHERE es.position_id = p.id)
+            OR EXISTS (
+              SELECT 1 FROM {sections} es
+              WHERE es.position_id = p.id AND es.section_id = sp.section_id
+            )
+          )
+          AND NOT EXISTS (
+            SELECT 1 FROM {application} a
+            WHERE a.position_id = p.id AND a.member_id = m.id
+              AND a.status IN ({statuses})
+          )
+    '''.format(
+        member=Member._meta.db_table,
+        position=Position._meta.db_table,
+        program=StudyProgram._meta.db_table,
+        sections=sections,
+        application=Application._meta.db_table,
+        member_ids=placeholders(member_ids),
+        position_ids=placeholders(position_ids),
+        statuses=placeholders(ACTIVE_STATUSES),
+    )
+    params = member_ids + position_ids + [False, 'member'] + list(ACTIVE_STATUSES)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return set(cursor.fetchall())
@@ -0,0 +1,189 @@
+"""
+Export of all applications to a position as CSV or XLSX.
+
+Applications are read with a server side iterator, a chunk at a time
+together with their member and references, and written out row by row, so
+memory use does not grow with the number of applicants or the length of
+their cover letters. XLSX export needs the optional openpyxl package.
+
+Under ASGI, Django reads a synchronous streaming body into a list before
+sending it, so astream_csv() hands the same lines to the event loop a
+chunk at a time instead.
+"""
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.utils.text import slugify
+
+from .models import Application
+
+
+CHUNK_SIZE = 200
+
+HEADER = (
+    'Application',
+    'Status',
+    'Name',
+    'Email',
+    'Phone number',
+    'Study program',
+    'Registration year',
+    'Membership status',
+    'Cover letter',
+    'Qualifications',
+    'GDPR',
+    'References',
+)
+
+FORMATS = ('csv', 'xlsx')
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Free text written by applicants, escaped in CSV exports. Phone numbers
+# and other data columns are left as they are. XLSX needs no escaping, as
+# every string is written as a text cell
+ESCAPED_COLUMNS = ('Name', 'Cover letter', 'Qualifications', 'References')
+
+
+class ExportError(Exception):
+    """
+    Raised when an export cannot be produced, e.g. for a missing optional
+    dependency.
+    """
+
+
+def _format_reference(reference):
+    parts = [reference.name]
+    if reference.title:
+        parts.append('(%s)' % reference.title)
+    parts += [value for value in (reference.email, reference.phone_num) if value]
+    if reference.comment:
+        parts.append('- %s' % reference.comment)
+    return ' '.join(parts)
+
+
+def escape_cell(value):
+    """
+    Keep applicant supplied text from running as a formula when the
+    export is opened in a spreadsheet, by prefixing it with a quote.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_rows(position, chunk_size=CHUNK_SIZE):
+    """
+    Yield one tuple per application to position, in the order of HEADER.
+    """
+    applications = (
+        Application.objects
+        .filter(position=position)
+        .select_related('member', 'member__study_program')
+        .prefetch_related('reference')
+        .order_by('id')
+        .iterator(chunk_size=chunk_size)
+    )
+    for application in applications:
+        member = application.member
+        program = member.study_program
+        yield (
+            application.id,
+            application.get_status_display(),
+            member.name,
+            member.email,
+            member.phone_number,
+            program.name_en if program else '',
+            member.registration_year,
+            member.get_status_display(),
+            application.cover_letter,
+            application.qualifications,
+            'yes' if application.gdpr else 'no',
+            '; '.join(
+                _format_reference(reference)
+                for reference in application.reference.all()
+            ),
+        )
+
+
+class _Echo:
+    """
+    File-like object that hands back what is written to it, so csv.writer
+    can produce one line at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(position, chunk_size=CHUNK_SIZE):
+    """
+    Yield the CSV export of position line by line, with the free text
+    columns escaped by escape_cell().
+    """
+    escaped = [column in ESCAPED_COLUMNS for column in HEADER]
+    writer = csv.writer(_Echo())
+    yield writer.writerow([str(column) for column in HEADER])
+    for row in iter_rows(position, chunk_size=chunk_size):
+        yield writer.writerow([
+            escape_cell(value) if escape else value
+            for value, escape in zip(row, escaped)
+        ])
+
+
+async def astream_csv(position, chunk_size=CHUNK_SIZE):
+    """
+    Yield the CSV export of position chunk_size lines at a time, reading
+    each chunk off the event loop.
+    """
+    lines = stream_csv(position, chunk_size=chunk_size)
+
+    def next_chunk():
+        return ''.join(islice(lines, chunk_size))
+
+    try:
+        while True:
+            chunk = await sync_to_async(next_chunk)()
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        # Closes the server side cursor on the thread that opened it
+        await sync_to_async(lines.close)()
+
+
+def write_xlsx(position, fileobj, chunk_size=CHUNK_SIZE):
+    """
+    Write the XLSX export of position to a binary file object. Uses the
+    write-only mode of openpyxl, which spools rows to disk as it goes.
+    """
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+    except ImportError:
+        raise ExportError('XLSX export requires the openpyxl package')
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title='Applications')
+
+    def cell(value):
+        cell = WriteOnlyCell(sheet, value)
+        if isinstance(value, str):
+            # openpyxl would store text starting with = as a formula
+            cell.data_type = 's'
+        return cell
+
+    sheet.append([str(column) for column in HEADER])
+    for row in iter_rows(position, chunk_size=chunk_size):
+        sheet.append([cell(value) for value in row])
+    workbook.save(fileobj)
+
+
+def export_filename(position, file_format):
+    return 'applications-%s-%d.%s' % (
+        slugify(position.role.title_en) or 'position',
+        position.id,
+        file_format,
+    )
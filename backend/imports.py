@@ -0,0 +1,279 @@
+"""
+Bulk intake of applications from CSV or JSON Lines exports.
+
+Rows are read lazily, validated in chunks and written with one bulk insert
+per table per chunk, each chunk in its own transaction. An invalid row is
+reported and skipped without aborting the rest of the import.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from . import search
+from .models import (
+    Application, Member, Position, PositionStatistics, Reference,
+)
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+REFERENCE_FIELDS = ('name', 'phone_num', 'title', 'email', 'comment')
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'ja')
+
+
+class ImportResult:
+    """
+    Outcome of an import.
+    Attributes:
+        rows (int): Number of rows read from the input.
+        created (int): Number of applications written.
+        references (int): Number of references written.
+        errors (list): (line number, message) for every rejected row.
+        elapsed (float): Wall clock time of the import in seconds.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.references = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.rows / self.elapsed
+
+
+def read_csv(stream):
+    """
+    Yield (line number, row) from a CSV file with a header line. References
+    are given as numbered column groups: reference1_name, reference1_email,
+    reference2_name and so on.
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        references = {}
+        for column in list(row):
+            if not column or not column.startswith('reference'):
+                continue
+            number, _, field = column[len('reference'):].partition('_')
+            if number.isdigit() and field in REFERENCE_FIELDS:
+                value = row.pop(column)
+                if value:
+                    references.setdefault(int(number), {})[field] = value
+        row['references'] = [references[n] for n in sorted(references)]
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    """
+    Yield (line number, row) from a JSON Lines file, one application object
+    per line with its references as a list under "references".
+    """
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {'_error': 'Invalid JSON: %s' % e}
+        if not isinstance(row, dict):
+            row = {'_error': 'Expected a JSON object'}
+        yield line_num, row
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _error_message(error):
+    if isinstance(error, ValidationError) and hasattr(error, 'message_dict'):
+        return '; '.join(
+            '%s: %s' % (field, ' '.join(messages))
+            for field, messages in error.message_dict.items()
+        )
+    return ' '.join(getattr(error, 'messages', [str(error)]))
+
+
+def _lookup_maps(rows):
+    """
+    Fetch the positions and members referenced by a chunk, one query each.
+    """
+    position_ids = set()
+    member_ids = set()
+    ssns = set()
+    for _, row in rows:
+        if row.get('position'):
+            position_ids.add(str(row['position']))
+        if row.get('member'):
+            member_ids.add(str(row['member']))
+        elif row.get('ssn'):
+            ssns.add(str(row['ssn']))
+
+    positions = {
+        str(pk): pk for pk in Position.objects.filter(
+            pk__in=[i for i in position_ids if i.isdigit()]
+        ).values_list('pk', flat=True)
+    }
+    members = {
+        str(pk): pk for pk in Member.objects.filter(
+            pk__in=[i for i in member_ids if i.isdigit()]
+        ).values_list('pk', flat=True)
+    }
+    members_by_ssn = dict(
+        Member.objects.filter(ssn__in=ssns).values_list('ssn', 'pk')
+    )
+    return positions, members, members_by_ssn
+
+
+def _build_chunk(rows, default_status, result):
+    """
+    Validate a chunk of rows and turn the valid ones into unsaved
+    Application instances, each paired with its unsaved references.
+    """
+    positions, members, members_by_ssn = _lookup_maps(rows)
+    built = []
+    for line_num, row in rows:
+        if '_error' in row:
+            result.errors.append((line_num, row['_error']))
+            continue
+        try:
+            position_id = positions.get(str(row.get('position', '')))
+            if position_id is None:
+                raise ValidationError('Unknown position %r' % row.get('position'))
+            if row.get('member'):
+                member_id = members.get(str(row['member']))
+            else:
+                member_id = members_by_ssn.get(str(row.get('ssn')))
+            if member_id is None:
+                raise ValidationError('Unknown member')
+
+            application = Application(
+                position_id=position_id,
+                member_id=member_id,
+                status=row.get('status') or default_status,
+                cover_letter=row.get('cover_letter', ''),
+                qualifications=row.get('qualifications', ''),
+                gdpr=_as_bool(row.get('gdpr', False)),
+                rejection_date=row.get('rejection_date') or None,
+            )
+            application.full_clean(
+                exclude=['position', 'member'], validate_unique=False)
+
+            references = []
+            reference_rows = row.get('references') or []
+            if not isinstance(reference_rows, list) or not all(
+                    isinstance(data, dict) for data in reference_rows):
+                raise ValidationError('References must be a list of objects')
+            for data in reference_rows:
+                reference = Reference(**{
+                    field: data.get(field, '') for field in REFERENCE_FIELDS
+                })
+                reference.full_clean(exclude=['application'])
+                references.append(reference)
+        except (ValidationError, TypeError, ValueError) as e:
+            # Values of the wrong JSON type fail inside the field parsers
+            result.errors.append((line_num, _error_message(e)))
+            continue
+        built.append((line_num, application, references))
+    return _drop_duplicates(built, result)
+
+
+def _drop_duplicates(built, result):
+    """
+    Reject applications that would give a member a second active
+    application to the same position, checked against the database in one
+    query and against earlier rows of the chunk.
+    """
+    active = [
+        application for _, application, _ in built
+        if application.status in Application.ACTIVE_STATUSES
+    ]
+    if not active:
+        return built
+    taken = set(
+        Application.objects.active()
+        .filter(
+            position_id__in={a.position_id for a in active},
+            member_id__in={a.member_id for a in active},
+        )
+        .values_list('position_id', 'member_id')
+    )
+    kept = []
+    for line_num, application, references in built:
+        if application.status in Application.ACTIVE_STATUSES:
+            pair = (application.position_id, application.member_id)
+            if pair in taken:
+                result.errors.append(
+                    (line_num, 'The member has already applied to the position'))
+                continue
+            taken.add(pair)
+        kept.append((line_num, application, references))
+    return kept
+
+
+def _write_chunk(built, result):
+    with transaction.atomic():
+        applications = Application.objects.bulk_create(
+            [application for _, application, _ in built])
+        references = []
+        for (_, _, refs), application in zip(built, applications):
+            for reference in refs:
+                reference.application_id = application.pk
+                references.append(reference)
+        Reference.objects.bulk_create(references)
+        deltas = {}
+        for application in applications:
+            PositionStatistics.add_delta(
+                deltas, application.position_id, application.status, 1)
+        PositionStatistics.objects.apply_deltas(deltas)
+        search.index_objects(applications, replace=False)
+    result.created += len(applications)
+    result.references += len(references)
+
+
+def import_applications(stream, file_format, chunk_size=DEFAULT_CHUNK_SIZE,
+                        default_status='submitted'):
+    """
+    Import applications from an open text stream in the given format
+    ('csv' or 'jsonl'). Returns an ImportResult.
+
+    Each row names its position by id and its member either by id
+    ("member") or by social security number ("ssn"). Bulk inserts rely on
+    the database returning primary keys, which SQLite 3.35+ and PostgreSQL
+    both do.
+    """
+    if file_format not in READERS:
+        raise ValueError('Unknown import format %r' % file_format)
+
+    result = ImportResult()
+    started = time.perf_counter()
+    rows = READERS[file_format](stream)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        result.rows += len(chunk)
+        built = _build_chunk(chunk, default_status, result)
+        if not built:
+            continue
+        try:
+            _write_chunk(built, result)
+        except DatabaseError as e:
+            result.errors.extend((line_num, str(e)) for line_num, _, _ in built)
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,203 @@
+"""
+Database backed job queue.
+
+Jobs are rows in the Job table, queued with Job.objects.enqueue() in the
+same transaction as the change that causes them, so a job exists exactly
+when that change was committed. The run_jobs management command runs
+workers that:
+
+- claim up to BATCH_SIZE due jobs of one kind at a time, locking them with
+  SELECT ... FOR UPDATE SKIP LOCKED so several workers never take the same
+  job (SQLite serializes the claim with its write lock instead),
+- hand the payloads of the whole batch to the handler of that kind in one
+  call, so e.g. every email of a batch goes over one SMTP connection,
+- retry failed batches with exponential backoff until the jobs run out of
+  attempts, and
+- take back jobs whose worker died, once LOCK_TIMEOUT has passed.
+
+Handlers are functions taking a list of payloads, named by dotted path in
+HANDLERS or the JOB_HANDLERS setting. A handler that finishes some jobs
+of a batch but not others raises PartialFailure, so that only the failed
+jobs are retried; any other exception retries the whole batch. Handlers
+may be run more than once for the same payload if a worker dies half
+way, so they should be safe to repeat.
+"""
+import logging
+import os
+import random
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {
+    'application_received': 'backend.notifications.application_received',
+    'application_decision': 'backend.notifications.application_decision',
+}
+
+DEFAULTS = {
+    # Jobs of one kind handed to the handler at once
+    'BATCH_SIZE': 50,
+    # Seconds before the first retry, doubled for each further attempt
+    'BACKOFF': 30,
+    'MAX_BACKOFF': 60 * 60,
+    # Seconds after which a running job is assumed to have lost its worker
+    'LOCK_TIMEOUT': 10 * 60,
+    # Seconds an idle worker waits before looking for jobs again
+    'POLL_INTERVAL': 5,
+}
+
+
+def config():
+    return dict(DEFAULTS, **getattr(settings, 'JOBS', {}))
+
+
+class PartialFailure(Exception):
+    """
+    Raised by a handler when only some jobs of its batch failed.
+    Attributes:
+        failures (dict): Error message per index of a failed payload; the
+            jobs of the other payloads are done.
+    """
+
+    def __init__(self, failures):
+        super().__init__('%d jobs of the batch failed' % len(failures))
+        self.failures = failures
+
+
+def get_handler(kind):
+    handlers = dict(HANDLERS, **getattr(settings, 'JOB_HANDLERS', {}))
+    return import_string(handlers[kind])
+
+
+def default_worker_id():
+    return '%s:%d' % (socket.gethostname(), os.getpid())
+
+
+def backoff(attempts, base, maximum):
+    """
+    Seconds to wait before the next attempt, with jitter so that jobs
+    failing together are not all retried at the same moment.
+    """
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _due(now, lock_timeout):
+    return (
+        Q(status='queued', run_at__lte=now)
+        | Q(status='running', locked_at__lt=now - timedelta(seconds=lock_timeout))
+    )
+
+
+def claim(worker_id, batch_size, kinds=None, now=None):
+    """
+    Locks up to batch_size due jobs of a single kind for worker_id and
+    returns them, oldest first.
+    """
+    now = now or timezone.now()
+    due = Job.objects.filter(_due(now, config()['LOCK_TIMEOUT']))
+    if kinds:
+        due = due.filter(kind__in=kinds)
+    with transaction.atomic():
+        first = (
+            due.select_for_update(skip_locked=True)
+            .order_by('run_at', 'id')
+            .only('kind')
+            .first()
+        )
+        if first is None:
+            return []
+        ids = list(
+            due.filter(kind=first.kind)
+            .select_for_update(skip_locked=True)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        Job.objects.filter(pk__in=ids).update(
+            status='running',
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids).order_by('run_at', 'id'))
+
+
+def run_batch(jobs):
+    """
+    Runs claimed jobs of one kind through their handler and records the
+    outcome. Returns True if the batch succeeded.
+    """
+    kind = jobs[0].kind
+    ids = [job.id for job in jobs]
+    try:
+        get_handler(kind)([job.payload for job in jobs])
+    except PartialFailure as e:
+        failed = [jobs[i] for i in sorted(e.failures)]
+        logger.error('Jobs %s %s failed: %s', kind,
+                     [job.id for job in failed], e.failures)
+        finish([job.id for job in jobs if job not in failed])
+        for i in sorted(e.failures):
+            fail([jobs[i]], e.failures[i])
+        return False
+    except Exception as e:
+        logger.exception('Job batch %s %s failed', kind, ids)
+        fail(jobs, '%s: %s' % (type(e).__name__, e))
+        return False
+    finish(ids)
+    return True
+
+
+def finish(ids):
+    Job.objects.filter(pk__in=ids).update(
+        status='done', finished_at=timezone.now(), locked_by='', locked_at=None,
+        last_error='')
+
+
+def fail(jobs, error):
+    conf = config()
+    now = timezone.now()
+    given_up = [job.id for job in jobs if job.attempts >= job.max_attempts]
+    Job.objects.filter(pk__in=given_up).update(
+        status='failed', finished_at=now, locked_by='', locked_at=None,
+        last_error=error)
+    for job in jobs:
+        if job.id in given_up:
+            continue
+        delay = backoff(job.attempts, conf['BACKOFF'], conf['MAX_BACKOFF'])
+        Job.objects.filter(pk=job.id).update(
+            status='queued', run_at=now + timedelta(seconds=delay),
+            locked_by='', locked_at=None, last_error=error)
+
+
+def work(worker_id=None, batch_size=None, kinds=None, once=False,
+         poll_interval=None):
+    """
+    Runs jobs until the queue is empty (once=True) or forever, sleeping
+    poll_interval seconds whenever no job is due. Returns the number of
+    jobs run.
+    """
+    conf = config()
+    worker_id = worker_id or default_worker_id()
+    batch_size = batch_size or conf['BATCH_SIZE']
+    poll_interval = conf['POLL_INTERVAL'] if poll_interval is None else poll_interval
+    processed = 0
+    while True:
+        jobs = claim(worker_id, batch_size, kinds=kinds)
+        if jobs:
+            run_batch(jobs)
+            processed += len(jobs)
+            continue
+        if once:
+            return processed
+        time.sleep(poll_interval)
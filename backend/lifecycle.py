@@ -0,0 +1,123 @@
+"""
+Scheduled recruitment lifecycle, run daily by the run_lifecycle command.
+
+Each run picks up from the date of the previous one, stored as a
+Checkpoint, and only looks at positions whose dates passed since then:
+
+- recruitment closed: drafts to those positions are locked,
+- term ended: roles left without a current or upcoming position are
+  archived,
+- rejected applications past their retention are deleted, see
+  backend.retention.
+
+The position lookups are range scans on position_recruitment_idx and
+position_term_end_idx, so a run costs the same however many positions
+have closed in earlier years. A run that fails leaves the checkpoint
+where it was and the next run covers the missed days as well.
+"""
+import time
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import catalogue, retention
+from .models import Application, Checkpoint, Position, Role
+
+
+CHECKPOINT_NAME = 'recruitment_lifecycle'
+
+
+class LifecycleResult:
+    """
+    Outcome of a lifecycle run.
+    Attributes:
+        since (date): First day covered, None on the first run.
+        today (date): The day of the run; days before it are covered.
+        closed_positions (int): Positions whose recruitment closed.
+        locked_drafts (int): Drafts locked.
+        ended_positions (int): Positions whose term ended.
+        archived_roles (int): Roles archived.
+        purged_applications (int): Rejected applications deleted.
+        elapsed (float): Wall clock time of the run in seconds.
+    """
+
+    def __init__(self, since, today):
+        self.since = since
+        self.today = today
+        self.closed_positions = 0
+        self.locked_drafts = 0
+        self.ended_positions = 0
+        self.archived_roles = 0
+        self.purged_applications = 0
+        self.elapsed = 0.0
+
+
+def _passed(field, since, today):
+    # Dates in [since, today), i.e. that passed since the last run
+    condition = Q(**{field + '__lt': today})
+    if since is not None:
+        condition &= Q(**{field + '__gte': since})
+    return condition
+
+
+def lock_drafts(since, today):
+    positions = list(
+        Position.objects
+        .filter(_passed('recruitment_end', since, today))
+        .values_list('id', flat=True)
+    )
+    locked = Application.objects.filter(
+        position_id__in=positions, status='draft', locked=False,
+    ).update(locked=True)
+    return len(positions), locked
+
+
+def archive_roles(since, today):
+    ended = list(
+        Position.objects
+        .filter(_passed('term_end', since, today))
+        .values_list('id', 'role_id')
+    )
+    role_ids = {role_id for _, role_id in ended}
+    # A role stays active while it has a running or upcoming position
+    archived = (
+        Role.objects
+        .filter(pk__in=role_ids, archived=False)
+        .exclude(positions__term_end__gte=today)
+        .exclude(positions__recruitment_end__gte=today)
+        .update(archived=True, updated_at=timezone.now())
+    )
+    if archived:
+        # update() sends no signals
+        catalogue.invalidate()
+    return len(ended), archived
+
+
+def purge_rejected(today):
+    # In batches of their own, outside the transaction of the other steps
+    return retention.run(today=today, steps=['rejected']).processed['rejected']
+
+
+def run(today=None, full=False):
+    """
+    Applies every lifecycle step for the days since the last run, or for
+    all of history if full is set.
+    """
+    started = time.monotonic()
+    today = today or date.today()
+    since = None
+    if not full:
+        last_run = Checkpoint.load(CHECKPOINT_NAME).get('today')
+        since = date.fromisoformat(last_run) if last_run else None
+    result = LifecycleResult(since, today)
+
+    with transaction.atomic():
+        result.closed_positions, result.locked_drafts = lock_drafts(since, today)
+        result.ended_positions, result.archived_roles = archive_roles(since, today)
+        Checkpoint.store(CHECKPOINT_NAME, {'today': today.isoformat()})
+    result.purged_applications = purge_rejected(today)
+
+    result.elapsed = time.monotonic() - started
+    return result
@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import allocation
+from backend.models import Position
+
+
+class Command(BaseCommand):
+    help = 'Appoint and turn down the approved applications of a recruitment round'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'position_ids',
+            nargs='*',
+            type=int,
+            help='Positions of the round',
+        )
+        parser.add_argument(
+            '--recruitment-end',
+            type=date.fromisoformat,
+            help='Take every position whose recruitment ended on this date',
+        )
+        parser.add_argument(
+            '--max-per-member',
+            type=int,
+            default=1,
+            help='Positions one member may be appointed to in the round',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the outcome',
+        )
+
+    def handle(self, *args, **options):
+        if not options['position_ids'] and not options['recruitment_end']:
+            raise CommandError('Give position ids or --recruitment-end')
+        positions = Position.objects.all()
+        if options['position_ids']:
+            positions = positions.filter(pk__in=options['position_ids'])
+        if options['recruitment_end']:
+            positions = positions.filter(recruitment_end=options['recruitment_end'])
+        result = allocation.allocate(
+            positions,
+            max_per_member=options['max_per_member'],
+            dry_run=options['dry_run'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            '%sAppointed %d, turned down %d, %d seats unfilled (%.2fs)' % (
+                'Dry run: ' if options['dry_run'] else '',
+                len(result.appointed),
+                len(result.turned_down),
+                sum(result.unfilled.values()),
+                result.elapsed,
+            )
+        ))
@@ -0,0 +1,75 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from backend import benchmarks
+from backend.runner import temporary_cache
+
+
+DEFAULT_BASELINE = os.path.join(
+    settings.BASE_DIR, 'backend', 'benchmark_baseline.json')
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database with synthetic data, time the main '
+            'workflows and compare the results against a stored baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--applications',
+            type=int,
+            default=1000,
+            help='Number of applications to seed, other models scale with it',
+        )
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--flow',
+            action='append',
+            choices=sorted(benchmarks.FLOWS),
+            help='Only run this flow, may be repeated',
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative growth of latency and memory',
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Store this run as the new baseline instead of comparing',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with temporary_cache():
+                counts = benchmarks.seed(options['applications'])
+                self.stderr.write('Seeded %s' % ', '.join(
+                    '%d %s' % (n, name) for name, n in counts.items()))
+                report = benchmarks.run(options['iterations'], options['flow'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+        if options['save_baseline']:
+            benchmarks.save_baseline(options['baseline'], report)
+            self.stderr.write('Saved baseline to %s' % options['baseline'])
+            return
+        if not os.path.exists(options['baseline']):
+            self.stderr.write('No baseline at %s, nothing to compare' % options['baseline'])
+            return
+        regressions = benchmarks.compare(
+            report, benchmarks.load_baseline(options['baseline']),
+            tolerance=options['tolerance'])
+        if regressions:
+            raise CommandError('Regressions:\n' + '\n'.join(regressions))
+        self.stderr.write(self.style.SUCCESS('No regressions against the baseline'))
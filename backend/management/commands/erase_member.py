@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import retention
+from backend.models import Member
+
+
+class Command(BaseCommand):
+    help = 'Erase a member with their applications, references and mandates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('member_id', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            deleted = retention.erase_member(options['member_id'])
+        except Member.DoesNotExist:
+            raise CommandError('No member with id %d' % options['member_id'])
+        self.stdout.write(self.style.SUCCESS(
+            'Erased member %d: %d applications, %d mandates' % (
+                options['member_id'],
+                deleted['applications'],
+                deleted['mandates'],
+            )
+        ))
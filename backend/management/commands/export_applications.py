@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import exports
+from backend.models import Position
+
+
+class Command(BaseCommand):
+    help = 'Export all applications to a position as CSV or XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('position', type=int, help='Id of the position')
+        parser.add_argument(
+            '--format',
+            choices=exports.FORMATS,
+            default='csv',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write, standard output if omitted (CSV only)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            position = Position.objects.select_related('role').get(
+                pk=options['position'])
+        except Position.DoesNotExist:
+            raise CommandError('Position %d does not exist' % options['position'])
+        output = options['output']
+
+        if options['format'] == 'csv':
+            if not output:
+                for line in exports.stream_csv(position):
+                    self.stdout.write(line, ending='')
+                return
+            with open(output, 'w', newline='', encoding='utf-8') as stream:
+                stream.writelines(exports.stream_csv(position))
+            self.stderr.write('Wrote %s' % output)
+            return
+
+        if not output:
+            raise CommandError('XLSX export needs --output')
+        try:
+            with open(output, 'wb') as fileobj:
+                exports.write_xlsx(position, fileobj)
+        except exports.ExportError as e:
+            raise CommandError(e)
+        self.stderr.write('Wrote %s' % output)
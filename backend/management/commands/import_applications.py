@@ -0,0 +1,64 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.imports import DEFAULT_CHUNK_SIZE, READERS, import_applications
+
+
+class Command(BaseCommand):
+    help = 'Bulk import applications and their references from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Input format, guessed from the file extension if omitted',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Number of rows validated and written per transaction',
+        )
+        parser.add_argument(
+            '--status',
+            default='submitted',
+            help='Status for rows that do not specify one',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            file_format = os.path.splitext(path)[1].lstrip('.').lower()
+            if file_format not in READERS:
+                raise CommandError(
+                    'Cannot guess the format of %s, use --format' % path)
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        try:
+            with open(path, newline='', encoding='utf-8') as stream:
+                result = import_applications(
+                    stream,
+                    file_format,
+                    chunk_size=options['chunk_size'],
+                    default_status=options['status'],
+                )
+        except OSError as e:
+            raise CommandError(e)
+
+        for line_num, message in result.errors:
+            self.stderr.write('line %d: %s' % (line_num, message))
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %d applications and %d references from %d rows in '
+            '%.2fs (%.0f rows/s), %d rows rejected' % (
+                result.created,
+                result.references,
+                result.rows,
+                result.elapsed,
+                result.rows_per_second,
+                len(result.errors),
+            )
+        ))
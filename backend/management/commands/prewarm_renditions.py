@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from backend import renditions
+from backend.models import Team
+
+
+class Command(BaseCommand):
+    help = 'Render every size and format of the team logos ahead of time'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Number of processes rendering in parallel',
+        )
+
+    def handle(self, *args, **options):
+        logos = [
+            team.logo for team in Team.objects.exclude(logo='').only('logo')
+        ]
+        created = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {
+                pool.submit(renditions.prewarm, logo.path): logo for logo in logos
+            }
+            for future in as_completed(futures):
+                logo = futures[future]
+                try:
+                    digest, count = future.result()
+                except (renditions.RenditionError, OSError) as e:
+                    failed += 1
+                    self.stderr.write(str(e))
+                    continue
+                created += count
+                # Saves the request serving it from hashing the original
+                cache.set('rendition_digest:%s' % logo.name, digest,
+                          renditions.DIGEST_TIMEOUT)
+        self.stdout.write(self.style.SUCCESS(
+            'Rendered %d files for %d logos, %d failed' % (
+                created, len(logos) - failed, failed)))
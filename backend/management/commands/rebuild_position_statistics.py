@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from backend.models import PositionStatistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-position application counters from scratch'
+
+    def handle(self, *args, **options):
+        positions = PositionStatistics.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            'Rebuilt application counters for %d positions' % positions))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from backend import search
+
+
+class Command(BaseCommand):
+    help = 'Recreate the full-text search index of applications and roles'
+
+    def handle(self, *args, **options):
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Indexed %d objects' % count))
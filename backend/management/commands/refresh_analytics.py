@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from backend import analytics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the recruitment analytics snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every round that still has applications',
+        )
+
+    def handle(self, *args, **options):
+        result = analytics.refresh(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            'Refreshed %d rounds, %d rows (%.2fs)' % (
+                len(result.rounds), result.rows, result.elapsed)
+        ))
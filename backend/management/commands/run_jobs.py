@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from backend import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs, e.g. notification emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when no job is due instead of waiting for more',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Jobs of one kind handled at once',
+        )
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            help='Only run jobs of this kind, may be repeated',
+        )
+        parser.add_argument(
+            '--worker-id',
+            help='Name of this worker in Job.locked_by, defaults to host:pid',
+        )
+
+    def handle(self, *args, **options):
+        processed = jobs.work(
+            worker_id=options['worker_id'],
+            batch_size=options['batch_size'],
+            kinds=options['kinds'],
+            once=options['once'],
+        )
+        self.stdout.write(self.style.SUCCESS('Ran %d jobs' % processed))
@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import lifecycle
+
+
+class Command(BaseCommand):
+    help = ('Lock drafts of closed recruitments, archive expired roles and '
+            'purge old rejected applications')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Cover all of history instead of the days since the last run',
+        )
+        parser.add_argument(
+            '--today',
+            help='Run as if today was this date (YYYY-MM-DD)',
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['today']:
+            try:
+                today = date.fromisoformat(options['today'])
+            except ValueError:
+                raise CommandError('Invalid date %r' % options['today'])
+
+        result = lifecycle.run(today=today, full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            'Since %s: %d recruitments closed (%d drafts locked), %d terms '
+            'ended (%d roles archived), %d rejected applications purged '
+            '(%.2fs)' % (
+                result.since or 'the beginning',
+                result.closed_positions,
+                result.locked_drafts,
+                result.ended_positions,
+                result.archived_roles,
+                result.purged_applications,
+                result.elapsed,
+            )
+        ))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from backend import retention
+
+
+class Command(BaseCommand):
+    help = 'Delete or anonymize applications past their GDPR retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--step',
+            action='append',
+            dest='steps',
+            choices=sorted(retention.STEPS),
+            help='Only run this step, may be repeated',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Applications handled per transaction',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches, the next run continues',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            help='Seconds to sleep between batches',
+        )
+
+    def handle(self, *args, **options):
+        result = retention.run(
+            steps=options['steps'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            '%s in %d batches%s (%.2fs)' % (
+                ', '.join('%s: %d' % item for item in result.processed.items()),
+                result.batches,
+                '' if result.finished else ', stopped early',
+                result.elapsed,
+            )
+        ))
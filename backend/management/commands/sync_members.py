@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.unicore import DEFAULT_WORKERS, UnicoreError, sync_members
+
+
+class Command(BaseCommand):
+    help = 'Synchronize membership status from Unicore'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Fetch every member instead of only changes since the last sync',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Number of pages fetched concurrently',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = sync_members(full=options['full'], workers=options['workers'])
+        except UnicoreError as e:
+            raise CommandError('Sync failed: %s' % e)
+
+        if result.not_modified:
+            self.stdout.write('No changes since the last sync')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            'Fetched %d members in %d pages, updated %d, %d unknown locally '
+            '(%.2fs)' % (
+                result.fetched,
+                result.pages,
+                result.updated,
+                result.unknown,
+                result.elapsed,
+            )
+        ))
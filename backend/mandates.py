@@ -0,0 +1,98 @@
+"""
+Mandate timelines and the list of current office holders.
+
+A member's timeline is a single indexed query. The office holder list is
+read on every page during handover season, so it is computed once per day
+and cached under a version token that changes whenever a mandate,
+position, role or team is saved or deleted.
+"""
+import uuid
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import MandateHistory
+
+
+VERSION_KEY = 'office_holders:version'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _serialize(mandate, include_member=False):
+    position = mandate.position
+    role = position.role
+    data = {
+        'id': mandate.id,
+        'position': position.id,
+        'term_from': mandate.term_from,
+        'term_end': mandate.term_end,
+        'role': {
+            'id': role.id,
+            'title_en': role.title_en,
+            'title_sv': role.title_sv,
+            'role_type': role.role_type,
+        },
+        'team': {
+            'id': role.team.id,
+            'name_en': role.team.name_en,
+            'name_sv': role.team.name_sv,
+        },
+    }
+    if include_member:
+        data['member'] = {
+            'id': mandate.member.id,
+            'name': mandate.member.name,
+        }
+    return data
+
+
+def member_timeline(member_id):
+    """
+    Every mandate a member has held, newest first, in one query.
+    """
+    mandates = (
+        MandateHistory.objects
+        .filter(member_id=member_id)
+        .select_related('position__role__team')
+        .order_by('-term_from', '-id')
+    )
+    return [_serialize(mandate) for mandate in mandates]
+
+
+def build_office_holders(today):
+    mandates = (
+        MandateHistory.objects
+        .filter(term_from__lte=today, term_end__gte=today)
+        .select_related('member', 'position__role__team')
+        .order_by('position__role__team__name_en', 'position__role__title_en',
+                  'member__name')
+    )
+    return [_serialize(mandate, include_member=True) for mandate in mandates]
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    transaction.on_commit(
+        lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def current_office_holders(today=None):
+    """
+    The mandates running today, grouped by team and role. Served from the
+    cache unless something has changed since it was computed.
+    """
+    today = today or date.today()
+    key = 'office_holders:%s:%s' % (current_version(), today.isoformat())
+    holders = cache.get(key)
+    if holders is None:
+        holders = build_office_holders(today)
+        cache.set(key, holders, CACHE_TIMEOUT)
+    return holders
@@ -0,0 +1,162 @@
+"""
+Cached membership verification.
+
+Checking that an applicant is a member means asking Unicore, which is slow
+and should not see one request per submission. Answers are kept in a
+process local LRU cache: confirmed members for MEMBERSHIP_CACHE['TTL']
+seconds and everything else (non-members, people Unicore does not know)
+for the shorter NEGATIVE_TTL, so someone who just joined is not locked out
+for long.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .unicore import UnicoreError, get_client
+
+
+DEFAULTS = {
+    'TTL': 15 * 60,
+    'NEGATIVE_TTL': 60,
+    'MAX_ENTRIES': 10000,
+}
+
+
+class TTLCache:
+    """
+    Thread safe LRU cache whose entries expire after a per-entry TTL.
+    """
+
+    def __init__(self, max_entries, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Return (found, value) for key.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            if entry[2]:
+                self.negative_hits += 1
+            return True, entry[1]
+
+    def set(self, key, value, ttl, negative=False):
+        with self._lock:
+            self._data[key] = (self.clock() + ttl, value, negative)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'evictions': self.evictions,
+            }
+
+
+class MembershipVerifier:
+    """
+    Answers "is this person a member?" from the cache, asking the upstream
+    client on a miss. If Unicore cannot be reached the status stored on the
+    Member is used instead and the answer is not cached.
+    """
+
+    def __init__(self, client=None, ttl=None, negative_ttl=None,
+                 max_entries=None, clock=time.monotonic):
+        config = dict(DEFAULTS, **getattr(settings, 'MEMBERSHIP_CACHE', {}))
+        self._client = client
+        self.ttl = config['TTL'] if ttl is None else ttl
+        self.negative_ttl = (
+            config['NEGATIVE_TTL'] if negative_ttl is None else negative_ttl)
+        self.cache = TTLCache(
+            config['MAX_ENTRIES'] if max_entries is None else max_entries,
+            clock=clock,
+        )
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    @staticmethod
+    def _key(member):
+        if member.unicore_id is not None:
+            return ('id', member.unicore_id)
+        return ('ssn', member.ssn)
+
+    def status(self, member):
+        """
+        The membership status of member, one of Member.MEMBERSHIP_CHOICES.
+        """
+        key = self._key(member)
+        found, status = self.cache.get(key)
+        if found:
+            return status
+        try:
+            if key[0] == 'id':
+                status = self.client.lookup_status(unicore_id=key[1])
+            else:
+                status = self.client.lookup_status(ssn=key[1])
+        except UnicoreError:
+            return member.status
+        status = status or 'unknown'
+        if status == 'member':
+            self.cache.set(key, status, self.ttl)
+        else:
+            self.cache.set(key, status, self.negative_ttl, negative=True)
+        return status
+
+    def is_member(self, member):
+        return self.status(member) == 'member'
+
+    def forget(self, member):
+        self.cache.delete(self._key(member))
+
+    def stats(self):
+        return self.cache.stats()
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """
+    The process wide MembershipVerifier.
+    """
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = MembershipVerifier()
+    return _verifier
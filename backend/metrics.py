@@ -0,0 +1,109 @@
+"""
+In-process request metrics in the Prometheus text exposition format.
+
+The profiling middleware records one observation per request, labelled
+with the name of the view. Each process keeps its own numbers; the
+scraper sums them over processes like for any multi-process exporter.
+"""
+import threading
+
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class ViewMetrics:
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.duplicate_queries = 0
+        self.buckets = [0] * len(BUCKETS)
+
+
+class Registry:
+    """
+    Thread safe store of ViewMetrics per view.
+    """
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, seconds, db_seconds, queries, duplicate_queries,
+                error=False):
+        with self._lock:
+            metrics = self._views.get(view)
+            if metrics is None:
+                metrics = self._views[view] = ViewMetrics()
+            metrics.requests += 1
+            metrics.errors += bool(error)
+            metrics.seconds += seconds
+            metrics.db_seconds += db_seconds
+            metrics.queries += queries
+            metrics.duplicate_queries += duplicate_queries
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    metrics.buckets[i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: dict(vars(metrics), buckets=list(metrics.buckets))
+                for view, metrics in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(extra_gauges=None):
+    """
+    All metrics in the Prometheus text format. extra_gauges maps metric
+    names to plain numbers to include as unlabelled gauges.
+    """
+    snapshot = registry.snapshot()
+    lines = []
+
+    def family(name, kind, help_text, field):
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for view, metrics in sorted(snapshot.items()):
+            lines.append('%s{view="%s"} %s' % (name, _escape(view), metrics[field]))
+
+    family('apply_requests_total', 'counter', 'Requests handled.', 'requests')
+    family('apply_request_errors_total', 'counter',
+           'Requests answered with a 5xx status.', 'errors')
+    family('apply_db_queries_total', 'counter', 'SQL queries executed.', 'queries')
+    family('apply_db_duplicate_queries_total', 'counter',
+           'SQL queries repeating an earlier query of the same request.',
+           'duplicate_queries')
+    family('apply_db_seconds_total', 'counter',
+           'Time spent executing SQL.', 'db_seconds')
+
+    name = 'apply_request_duration_seconds'
+    lines.append('# HELP %s Time from request to response.' % name)
+    lines.append('# TYPE %s histogram' % name)
+    for view, metrics in sorted(snapshot.items()):
+        label = _escape(view)
+        for bound, count in zip(BUCKETS, metrics['buckets']):
+            lines.append('%s_bucket{view="%s",le="%s"} %d' % (name, label, bound, count))
+        lines.append('%s_bucket{view="%s",le="+Inf"} %d' % (name, label, metrics['requests']))
+        lines.append('%s_sum{view="%s"} %s' % (name, label, metrics['seconds']))
+        lines.append('%s_count{view="%s"} %d' % (name, label, metrics['requests']))
+
+    for gauge, value in sorted((extra_gauges or {}).items()):
+        lines.append('# TYPE %s gauge' % gauge)
+        lines.append('%s %s' % (gauge, value))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,175 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+
+
+logger = logging.getLogger('backend.profiling')
+
+DEFAULTS = {
+    # Fraction of requests run under cProfile
+    'SAMPLE_RATE': 0.0,
+    # Profiles of sampled requests slower than this are kept
+    'SLOW_MS': 500,
+    # Directory for .prof files, if unset the top functions are logged
+    'PROFILE_DIR': None,
+    # Requests repeating a query this many times are logged as possible N+1
+    'DUPLICATE_THRESHOLD': 5,
+}
+
+
+class QueryRecorder:
+    """
+    Counts and times the queries of one request.
+    """
+
+    def __init__(self):
+        self.statements = Counter()
+        self.seconds = 0.0
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        return self.count - len(self.statements)
+
+
+# The recorder of the request being handled. A context variable rather
+# than a per-connection wrapper, as async views run their queries on other
+# threads with their own connections, which still share the context.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.seconds += time.perf_counter() - started
+        recorder.statements[sql] += 1
+
+
+def install_query_recorder(connection):
+    """
+    Add record_query to a database connection, done for every connection
+    as it is opened, see backend.signals.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class ProfilingMiddleware:
+    """
+    Records the SQL query count, repeated queries, database time and total
+    time of every request into backend.metrics and a structured log line.
+    Configured by the PROFILING setting, see DEFAULTS. Works with both
+    sync and async views; sampling with cProfile only applies to sync
+    requests, as a profiler on the event loop would mix requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = dict(DEFAULTS, **getattr(settings, 'PROFILING', {}))
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        profiler = None
+        if random.random() < self.config['SAMPLE_RATE']:
+            profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            current_recorder.reset(token)
+        elapsed = time.perf_counter() - started
+
+        view = self.record(request, response, elapsed, recorder)
+        if profiler is not None and elapsed * 1000 >= self.config['SLOW_MS']:
+            self.save_profile(profiler, view)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    def record(self, request, response, elapsed, recorder):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        metrics.registry.observe(
+            view,
+            elapsed,
+            recorder.seconds,
+            recorder.count,
+            recorder.duplicates,
+            error=response.status_code >= 500,
+        )
+        self.log(request, response, view, elapsed, recorder)
+        return view
+
+    def log(self, request, response, view, elapsed, recorder):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'ms': round(elapsed * 1000, 2),
+            'db_ms': round(recorder.seconds * 1000, 2),
+            'queries': recorder.count,
+            'duplicate_queries': recorder.duplicates,
+        }
+        sql, repeats = (recorder.statements.most_common(1) or [(None, 0)])[0]
+        if repeats >= self.config['DUPLICATE_THRESHOLD']:
+            record['most_repeated_sql'] = sql
+            record['most_repeated_count'] = repeats
+        logger.info(json.dumps(record))
+
+    def save_profile(self, profiler, view):
+        directory = self.config['PROFILE_DIR']
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, '%s-%d.prof' % (
+                view.replace(':', '_'), int(time.time() * 1000)))
+            profiler.dump_stats(path)
+            logger.warning('Slow request to %s profiled to %s', view, path)
+            return
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(20)
+        logger.warning('Slow request to %s:\n%s', view, out.getvalue())
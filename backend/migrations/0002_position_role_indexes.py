@@ -0,0 +1,21 @@
+# Generated by Django 4.2.19 on 2026-10-18 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='position',
+            index=models.Index(fields=['recruitment_end', 'recruitment_start'], name='position_recruitment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='role',
+            index=models.Index(fields=['archived', 'team'], name='role_archived_team_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.19 on 2026-10-18 01:45
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_statistics(apps, schema_editor):
+    Application = apps.get_model('backend', 'Application')
+    PositionStatistics = apps.get_model('backend', 'PositionStatistics')
+    counts = {}
+    rows = (
+        Application.objects
+        .values_list('position_id', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for position_id, status, n in rows:
+        counts.setdefault(position_id, {})[status] = n
+    PositionStatistics.objects.bulk_create([
+        PositionStatistics(position_id=position_id, **changes)
+        for position_id, changes in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0002_position_role_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PositionStatistics',
+            fields=[
+                ('position', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='backend.position')),
+                ('draft', models.IntegerField(default=0)),
+                ('submitted', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('disapproved', models.IntegerField(default=0)),
+                ('appointed', models.IntegerField(default=0)),
+                ('turned_down', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_statistics, migrations.RunPython.noop),
+    ]
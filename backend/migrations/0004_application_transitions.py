@@ -0,0 +1,24 @@
+# Generated by Django 4.2.19 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_position_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('to_status', models.CharField(choices=[('draft', 'Draft'), ('submitted', 'Submitted'), ('approved', 'Approved'), ('disapproved', 'Disapproved'), ('appointed', 'Appointed'), ('turned_down', 'Turned down')], max_length=20, verbose_name='New status')),
+                ('count', models.IntegerField(verbose_name='Number of applications')),
+                ('from_counts', models.JSONField(default=dict, verbose_name='Previous statuses')),
+                ('application_ids', models.JSONField(default=list, verbose_name='Applications')),
+            ],
+        ),
+    ]
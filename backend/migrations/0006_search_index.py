@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE backend_search_en USING fts5("
+    "kind UNINDEXED, object_id UNINDEXED, body, "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    # Swedish text is stemmed before it is stored, å, ä and ö are kept
+    "CREATE VIRTUAL TABLE backend_search_sv USING fts5("
+    "kind UNINDEXED, object_id UNINDEXED, body, "
+    "tokenize='unicode61 remove_diacritics 0')",
+]
+SQLITE_DROP = [
+    'DROP TABLE IF EXISTS backend_search_en',
+    'DROP TABLE IF EXISTS backend_search_sv',
+]
+POSTGRES_CREATE = [
+    'CREATE TABLE backend_search_document ('
+    'kind varchar(20) NOT NULL, '
+    'object_id bigint NOT NULL, '
+    'vector tsvector NOT NULL, '
+    'PRIMARY KEY (kind, object_id))',
+    'CREATE INDEX backend_search_document_vector '
+    'ON backend_search_document USING GIN (vector)',
+]
+POSTGRES_DROP = [
+    'DROP TABLE IF EXISTS backend_search_document',
+]
+
+
+def _run(schema_editor, statements):
+    statements = statements.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE})
+
+
+def drop_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,96 @@
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def split_mandates(apps, schema_editor):
+    """
+    Turn every old MandateHistory row, which linked any number of members
+    to any number of positions, into one record per member and position
+    with the terms of the position.
+    """
+    MandateHistory = apps.get_model('backend', 'MandateHistory')
+    records = []
+    for history in MandateHistory.objects.prefetch_related('member', 'positions'):
+        for position in history.positions.all():
+            for member in history.member.all():
+                records.append(MandateHistory(
+                    holder_id=member.pk,
+                    position_id=position.pk,
+                    term_from=timezone.localtime(position.term_from).date(),
+                    term_end=position.term_end,
+                ))
+    MandateHistory.objects.all().delete()
+    MandateHistory.objects.bulk_create(records)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mandatehistory',
+            name='holder',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='backend.member'),
+        ),
+        migrations.AddField(
+            model_name='mandatehistory',
+            name='position',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mandates', to='backend.position'),
+        ),
+        migrations.AddField(
+            model_name='mandatehistory',
+            name='term_from',
+            field=models.DateField(null=True, verbose_name='Start of mandate'),
+        ),
+        migrations.AddField(
+            model_name='mandatehistory',
+            name='term_end',
+            field=models.DateField(null=True, verbose_name='End of mandate'),
+        ),
+        migrations.RunPython(split_mandates, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='position',
+            name='mandate_history',
+        ),
+        migrations.RemoveField(
+            model_name='mandatehistory',
+            name='member',
+        ),
+        migrations.RenameField(
+            model_name='mandatehistory',
+            old_name='holder',
+            new_name='member',
+        ),
+        migrations.AlterField(
+            model_name='mandatehistory',
+            name='member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mandates', to='backend.member'),
+        ),
+        migrations.AlterField(
+            model_name='mandatehistory',
+            name='position',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mandates', to='backend.position'),
+        ),
+        migrations.AlterField(
+            model_name='mandatehistory',
+            name='term_from',
+            field=models.DateField(verbose_name='Start of mandate'),
+        ),
+        migrations.AlterField(
+            model_name='mandatehistory',
+            name='term_end',
+            field=models.DateField(verbose_name='End of mandate'),
+        ),
+        migrations.AddIndex(
+            model_name='mandatehistory',
+            index=models.Index(fields=['member', '-term_from'], name='mandate_member_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mandatehistory',
+            index=models.Index(fields=['term_end', 'term_from'], name='mandate_term_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.19 on 2026-10-18 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='locked',
+            field=models.BooleanField(default=False, help_text='The recruitment has closed, the draft can no longer be submitted', verbose_name='Locked'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['rejection_date'], name='application_rejection_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='position',
+            index=models.Index(fields=['term_end'], name='position_term_end_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_recruitment_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['position', 'status', 'id'], name='application_dashboard_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:03
+
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+ACTIVE_STATUSES = ('draft', 'submitted', 'approved', 'appointed')
+
+
+def turn_down_duplicates(apps, schema_editor):
+    """
+    Keep one active application per member and position, the furthest
+    along and then the newest, and turn the others down so the unique
+    constraint can be added.
+    """
+    Application = apps.get_model('backend', 'Application')
+    PositionStatistics = apps.get_model('backend', 'PositionStatistics')
+    active = Application.objects.filter(status__in=ACTIVE_STATUSES)
+    duplicated = (
+        active.values('position_id', 'member_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    for pair in duplicated:
+        rows = sorted(
+            active.filter(
+                position_id=pair['position_id'], member_id=pair['member_id'],
+            ).values_list('id', 'status'),
+            key=lambda row: (ACTIVE_STATUSES.index(row[1]), row[0]),
+        )
+        for pk, status in rows[:-1]:
+            Application.objects.filter(pk=pk).update(
+                status='turned_down', rejection_date=date.today())
+            PositionStatistics.objects.filter(
+                position_id=pair['position_id'],
+            ).update(**{status: F(status) - 1, 'turned_down': F('turned_down') + 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_application_dashboard_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='eligible_sections',
+            field=models.ManyToManyField(blank=True, help_text='Leave empty to accept students of every section', related_name='eligible_positions', to='backend.section', verbose_name='Eligible sections'),
+        ),
+        migrations.AddField(
+            model_name='position',
+            name='members_only',
+            field=models.BooleanField(default=True, help_text='Only members of the union may apply', verbose_name='Members only'),
+        ),
+        migrations.RunPython(turn_down_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='application',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('draft', 'submitted', 'approved', 'appointed'))), fields=('position', 'member'), name='unique_active_application'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_application_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='rank',
+            field=models.PositiveIntegerField(blank=True, help_text='The ranking among the applications to the position, 1 being the best', null=True, verbose_name='Rank'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.19 on 2026-10-18 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_application_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.DateField(verbose_name='Round')),
+                ('dimension', models.CharField(choices=[('round', 'Round'), ('team', 'Team'), ('section', 'Section'), ('registration_year', 'Registration year')], max_length=20, verbose_name='Dimension')),
+                ('key', models.CharField(blank=True, max_length=20, verbose_name='Key')),
+                ('draft', models.IntegerField(default=0)),
+                ('submitted', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('disapproved', models.IntegerField(default=0)),
+                ('appointed', models.IntegerField(default=0)),
+                ('turned_down', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Refreshed at')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='analyticssnapshot',
+            constraint=models.UniqueConstraint(fields=('dimension', 'round', 'key'), name='unique_analytics_snapshot'),
+        ),
+    ]
@@ -1,13 +1,162 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
 from datetime import date
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import UserManager
 from django.core import validators
+from django.utils import timezone
 
 # from wagtail.admin.edit_handlers import MultiFieldPanel, FieldPanel, \
 #     FieldRowPanel
 
 
+class PositionQuerySet(models.QuerySet):
+    """
+    QuerySet for Position with the filters used by the public listings.
+    """
+
+    def open(self, today=None):
+        """
+        Positions currently open for applications, i.e. positions whose
+        recruitment period contains today and whose role is not archived.
+        """
+        if today is None:
+            today = date.today()
+        return self.filter(
+            recruitment_start__lte=today,
+            recruitment_end__gte=today,
+            role__archived=False,
+        )
+
+    def eligible_for(self, member_id, check_membership=True):
+        """
+        Positions the member may apply to: open to their membership status
+        and section, and without an active application of theirs. The
+        member is looked up inside the same query. Pass
+        check_membership=False when membership is verified elsewhere.
+        """
+        member = Member.objects.filter(pk=member_id)
+        sections = Position.eligible_sections.through.objects.filter(
+            position_id=OuterRef('pk'))
+        queryset = self.filter(
+            ~Exists(sections) | Exists(sections.filter(
+                section_id=Subquery(member.values('study_program__section_id')[:1]))),
+            ~Exists(Application.objects.active().filter(
+                position_id=OuterRef('pk'), member_id=member_id)),
+        )
+        if check_membership:
+            queryset = queryset.filter(
+                Q(members_only=False) | Exists(member.filter(status='member')))
+        return queryset
+
+
+class InvalidTransition(ValueError):
+    """
+    Raised when an application is moved to a status it cannot reach from
+    its current one.
+    """
+
+
+class ApplicationQuerySet(models.QuerySet):
+
+    def active(self):
+        return self.filter(status__in=ACTIVE_STATUSES)
+
+    def transition(self, status, today=None):
+        """
+        Moves every application in the queryset that can legally reach
+        status to it, with a single UPDATE, and records the batch as one
+        ApplicationTransition. Appointments also add MandateHistory records,
+        and appointments and turn downs queue a notification job per
+        application with a single INSERT.
+        Applications that cannot make the move (e.g. already appointed) are
+        left untouched.
+        Returns the ApplicationTransition, or None if nothing moved.
+        """
+        if status not in dict(Application.STATUS_CHOICES):
+            raise InvalidTransition('Unknown status %r' % status)
+        sources = [
+            source for source, targets in Application.TRANSITIONS.items()
+            if status in targets
+        ]
+        changes = {'status': status, 'rejection_date': None}
+        if status in Application.REJECTED_STATUSES:
+            changes['rejection_date'] = today or date.today()
+
+        with transaction.atomic(savepoint=False):
+            rows = list(
+                self.filter(status__in=sources)
+                .exclude(locked=True)
+                .select_for_update()
+                .values_list('id', 'position_id', 'status', 'member_id')
+                .order_by()
+            )
+            if not rows:
+                return None
+            ids = [pk for pk, _, _, _ in rows]
+            Application.objects.filter(pk__in=ids).update(**changes)
+            if status == 'appointed':
+                MandateHistory.objects.bulk_create(MandateHistory.for_applications(
+                    (member_id, position_id) for _, position_id, _, member_id in rows
+                ))
+                # bulk_create sends no signals
+                from . import mandates
+                mandates.invalidate()
+
+            deltas = {}
+            from_counts = {}
+            for _, position_id, source, _ in rows:
+                PositionStatistics.add_delta(deltas, position_id, source, -1)
+                PositionStatistics.add_delta(deltas, position_id, status, 1)
+                from_counts[source] = from_counts.get(source, 0) + 1
+            PositionStatistics.objects.apply_deltas(deltas)
+
+            transition = ApplicationTransition.objects.create(
+                to_status=status,
+                count=len(ids),
+                from_counts=from_counts,
+                application_ids=ids,
+            )
+            if status in Application.DECISION_NOTIFICATIONS:
+                # One job per applicant, so a bounce only retries theirs;
+                # decisions are final, so the id is a unique key
+                Job.objects.enqueue_many(
+                    'application_decision',
+                    [{'application': pk, 'status': status} for pk in ids],
+                    keys=['application_decision:%d' % pk for pk in ids],
+                )
+            return transition
+
+    def purge(self):
+        """
+        Deletes the applications in the queryset with their references
+        using a fixed number of queries, instead of the per object signals
+        of delete(), keeping the statistics and search index in step.
+        Returns the number of applications deleted.
+        """
+        from . import search
+
+        with transaction.atomic(savepoint=False):
+            rows = list(
+                self.select_for_update()
+                .values_list('id', 'position_id', 'status')
+                .order_by()
+            )
+            if not rows:
+                return 0
+            ids = [pk for pk, _, _ in rows]
+            Reference.objects.filter(application_id__in=ids).delete()
+            # Nothing else refers to applications, so there is nothing for
+            # the collector to cascade to
+            Application.objects.filter(pk__in=ids)._raw_delete(self.db)
+            deltas = {}
+            for _, position_id, status in rows:
+                PositionStatistics.add_delta(deltas, position_id, status, -1)
+            PositionStatistics.objects.apply_deltas(deltas)
+            search.remove_ids('application', ids)
+        return len(ids)
+
+
 class Member(models.Model):
     """
     TODO NOT DONE
@@ -101,13 +250,15 @@ class Member(models.Model):
         blank=False,
         default='unknown'
     )
-    
-    
+
+    def __str__(self):
+        return self.name
+
+
 class Position(models.Model):
     """
     Represents a position within an organization.
     Attributes:
-        mandate_history (ManyToManyField): A many-to-many relationship with MandateHistory, representing the mandate history associated with the position.
         role (ForeignKey): A foreign key to the Role model, representing the role associated with the position.
         recruitment_start (DateField): The start date of the recruitment process.
         recruitment_end (DateField): The deadline for the recruitment process.
@@ -116,13 +267,12 @@ class Position(models.Model):
         term_end (DateField): The end date of the appointment.
         comment_eng (TextField): A comment about the position in English.
         comment_sv (TextField): A comment about the position in Swedish.
+        members_only (BooleanField): Whether only union members may apply.
+        eligible_sections (ManyToManyField): The sections whose students may apply; any section if empty.
+        updated_at (DateTimeField): When the position was last saved, used for HTTP caching.
     """
-    
-    mandate_history = models.ManyToManyField(
-        'MandateHistory',
-        related_name= 'positions',
-        blank=False
-    )
+
+    objects = PositionQuerySet.as_manager()
 
     role = models.ForeignKey(
         'Role',
@@ -164,19 +314,103 @@ class Position(models.Model):
         verbose_name=('Comment in Swedish'),
         blank=True
     )
-    
+
+    updated_at = models.DateTimeField(
+        verbose_name=_('Updated at'),
+        auto_now=True,
+    )
+
+    members_only = models.BooleanField(
+        default=True,
+        verbose_name=_('Members only'),
+        help_text=_('Only members of the union may apply'),
+    )
+
+    eligible_sections = models.ManyToManyField(
+        'Section',
+        related_name='eligible_positions',
+        verbose_name=_('Eligible sections'),
+        help_text=_('Leave empty to accept students of every section'),
+        blank=True,
+    )
+
+    class Meta:
+        indexes = [
+            # Covers the open positions range filter and its keyset ordering
+            models.Index(
+                fields=['recruitment_end', 'recruitment_start'],
+                name='position_recruitment_idx',
+            ),
+            # Finds the positions whose term has ended, see backend.lifecycle
+            models.Index(fields=['term_end'], name='position_term_end_idx'),
+        ]
+
+    def __str__(self):
+        return '%s (%s)' % (self.role.title_en, self.recruitment_end)
+
+
 class MandateHistory(models.Model):
     """
-    This model shows the mandate history of a UTN member
-    Attribute:
-        member: A many to many relation to the member
+    This model shows the mandate history of a UTN member, one record per
+    member and position held.
+    Attributes:
+        member (ForeignKey): The member who held the position.
+        position (ForeignKey): The position that was held.
+        term_from (DateField): The first day of the mandate.
+        term_end (DateField): The last day of the mandate.
     """
-    member = models.ManyToManyField(
+    member = models.ForeignKey(
         'Member',
-        related_name='MandateHistory',
-        blank=False
+        related_name='mandates',
+        on_delete=models.CASCADE,
+    )
+
+    position = models.ForeignKey(
+        'Position',
+        related_name='mandates',
+        on_delete=models.CASCADE,
+    )
+
+    term_from = models.DateField(
+        verbose_name=_('Start of mandate'),
+    )
+
+    term_end = models.DateField(
+        verbose_name=_('End of mandate'),
     )
 
+    class Meta:
+        indexes = [
+            # A member's timeline, newest first
+            models.Index(fields=['member', '-term_from'], name='mandate_member_idx'),
+            # Current office holders
+            models.Index(fields=['term_end', 'term_from'], name='mandate_term_idx'),
+        ]
+
+    @classmethod
+    def for_applications(cls, rows):
+        """
+        Unsaved mandates for appointed applications given as
+        (member_id, position_id) pairs, with the terms of their positions.
+        """
+        rows = list(rows)
+        terms = {
+            pk: (timezone.localtime(term_from).date(), term_end)
+            for pk, term_from, term_end in Position.objects.filter(
+                pk__in={position_id for _, position_id in rows}
+            ).values_list('pk', 'term_from', 'term_end')
+        }
+        return [
+            cls(
+                member_id=member_id,
+                position_id=position_id,
+                term_from=terms[position_id][0],
+                term_end=terms[position_id][1],
+            )
+            for member_id, position_id in rows
+        ]
+
+
 class Reference(models.Model):
     """
     Reference model represents a reference for an application.
@@ -258,6 +492,10 @@ class StudyProgram(models.Model):
         help_text = _('Enter the name of the section in Swedish'),
     )
 
+    def __str__(self):
+        return self.name_en
+
+
 class Section(models.Model):
     """
     Section model represents a section with its abbreviation in English and Swedish.
@@ -287,6 +525,11 @@ class Section(models.Model):
         help_text = _('Enter the name of the section in Swedish'),
         blank=False,
     )
+
+    def __str__(self):
+        return self.abbreviation
+
+
 class Team(models.Model):
     """
     This class represents a working group within UTN
@@ -296,6 +539,7 @@ class Team(models.Model):
         logo (ImageField): The logo of the committee/working group.
         desc_en: Description of the committee/working group in English.
         desc_sv: Description of the committee/working group in Swedish.
+        updated_at (DateTimeField): When the team was last saved, used for HTTP caching.
     """
     
     name_en = models.CharField(
@@ -331,6 +575,14 @@ class Team(models.Model):
          blank = True,
      )
 
+    updated_at = models.DateTimeField(
+        verbose_name=_('Updated at'),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return self.name_en
+
     # ------ Administrator settings ------
     # panels = [MultiFieldPanel([
     #     FieldRowPanel([
@@ -342,6 +594,12 @@ class Team(models.Model):
     #     FieldPanel('description_sv'),
     # ])]
 
+# Statuses of applications still in the running; a member may have only
+# one of these per position. Disapproved applications can be approved
+# again, so they are still in the running
+ACTIVE_STATUSES = ('draft', 'submitted', 'approved', 'disapproved', 'appointed')
+
+
 class Application(models.Model):
     """
     Application model represents an application submitted by a member for a specific position.
@@ -353,8 +611,13 @@ class Application(models.Model):
         qualifications (TextField): A summary of relevant qualifications provided by the applicant.
         gdpr (BooleanField): Indicates whether the applicant has accepted the GDPR policy.
         rejection_date (DateField): The date when the application was rejected, if applicable.
+        locked (BooleanField): Set on drafts when the recruitment of their position has closed; locked drafts can no longer be submitted.
+        version (PositiveIntegerField): Incremented on every autosave of a draft, so edits from a stale browser tab are refused.
+        rank (PositiveIntegerField): The reviewers' ranking of the application among those to its position, 1 being the best; used when allocating appointments.
     """
 
+    objects = ApplicationQuerySet.as_manager()
+
     position = models.ForeignKey(
         'Position', 
         related_name='applications',
@@ -377,6 +640,24 @@ class Application(models.Model):
         ('turned_down', _('Turned down')),
     )
 
+    # The statuses each status may be moved on to
+    TRANSITIONS = {
+        'draft': ('submitted',),
+        'submitted': ('approved', 'disapproved', 'turned_down'),
+        'approved': ('appointed', 'disapproved', 'turned_down'),
+        'disapproved': ('approved', 'turned_down'),
+        'appointed': (),
+        'turned_down': (),
+    }
+
+    # Moving to one of these statuses sets the rejection date
+    REJECTED_STATUSES = ('disapproved', 'turned_down')
+
+    ACTIVE_STATUSES = ACTIVE_STATUSES
+
+    # Applicants are emailed when moved to one of these statuses
+    DECISION_NOTIFICATIONS = ('appointed', 'turned_down')
+
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -411,6 +692,467 @@ class Application(models.Model):
         blank=True
     )
 
+    locked = models.BooleanField(
+        default=False,
+        verbose_name=_('Locked'),
+        help_text=_('The recruitment has closed, the draft can no longer be submitted'),
+    )
+
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Version'),
+        editable=False,
+    )
+
+    rank = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_('Rank'),
+        help_text=_('The ranking among the applications to the position, 1 being the best'),
+    )
+
+    class Meta:
+        indexes = [
+            # Retention purges look up rejected applications by date
+            models.Index(fields=['rejection_date'], name='application_rejection_idx'),
+            # The reviewer dashboard pages through a position by (status, id)
+            models.Index(
+                fields=['position', 'status', 'id'],
+                name='application_dashboard_idx',
+            ),
+            # The status filter of the admin, newest first
+            models.Index(fields=['status', 'id'], name='application_status_idx'),
+        ]
+        constraints = [
+            # Applying again is only possible once turned down, and the
+            # index also answers "has this member applied here" lookups
+            models.UniqueConstraint(
+                fields=['position', 'member'],
+                condition=Q(status__in=ACTIVE_STATUSES),
+                name='unique_active_application',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the statistics currently count this application as
+        if 'position_id' in field_names and 'status' in field_names:
+            instance._counted_as = (instance.position_id, instance.status)
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the application and keeps the per-position statistics in
+        step with its status in the same transaction.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not (
+                {'status', 'position', 'position_id'} & set(update_fields)):
+            return super().save(*args, **kwargs)
+
+        counted_as = getattr(self, '_counted_as', None)
+        with transaction.atomic(savepoint=False):
+            if counted_as is None and not self._state.adding:
+                counted_as = Application.objects.filter(pk=self.pk).values_list(
+                    'position_id', 'status').first()
+            super().save(*args, **kwargs)
+            deltas = {}
+            if counted_as is not None:
+                PositionStatistics.add_delta(deltas, *counted_as, -1)
+            PositionStatistics.add_delta(deltas, self.position_id, self.status, 1)
+            PositionStatistics.objects.apply_deltas(deltas)
+        self._counted_as = (self.position_id, self.status)
+
+    def can_transition_to(self, status):
+        if self.locked:
+            return False
+        return status in self.TRANSITIONS.get(self.status, ())
+
+    def transition_to(self, status, today=None):
+        """
+        Moves this application to status, raising InvalidTransition if
+        that is not a legal move from its current status.
+        """
+        if not self.can_transition_to(status):
+            raise InvalidTransition(
+                'Cannot move application from %s to %s' % (self.status, status))
+        transition = Application.objects.filter(
+            pk=self.pk, status=self.status).transition(status, today=today)
+        if transition is None:
+            raise InvalidTransition('Application was changed concurrently')
+        self.status = status
+        self.rejection_date = (
+            today or date.today() if status in self.REJECTED_STATUSES else None)
+        self._counted_as = (self.position_id, self.status)
+        return transition
+
+class PositionStatisticsManager(models.Manager):
+
+    def apply_deltas(self, deltas, create=True):
+        """
+        Applies {position_id: {status: delta}} to the counters, creating
+        missing rows first unless create is False. Runs one UPDATE per
+        affected position.
+        """
+        statuses = dict(Application.STATUS_CHOICES)
+        deltas = {
+            position_id: {
+                s: d for s, d in changes.items() if d and s in statuses
+            }
+            for position_id, changes in deltas.items()
+        }
+        deltas = {k: v for k, v in deltas.items() if v}
+        if not deltas:
+            return
+        with transaction.atomic(savepoint=False):
+            if create:
+                self.bulk_create(
+                    [self.model(position_id=position_id) for position_id in deltas],
+                    ignore_conflicts=True,
+                )
+            for position_id, changes in deltas.items():
+                self.filter(position_id=position_id).update(**{
+                    status: F(status) + delta
+                    for status, delta in changes.items()
+                })
+
+    def rebuild(self):
+        """
+        Recomputes every counter from the applications table.
+        """
+        counts = {}
+        rows = (
+            Application.objects
+            .values_list('position_id', 'status')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for position_id, status, n in rows:
+            PositionStatistics.add_delta(counts, position_id, status, n)
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create([
+                self.model(position_id=position_id, **changes)
+                for position_id, changes in counts.items()
+            ])
+        return len(counts)
+
+
+class PositionStatistics(models.Model):
+    """
+    Denormalized number of applications per status for a position, so that
+    dashboards can read them without counting the applications table.
+    Application.save() and deletes keep these in step; code that changes
+    statuses in bulk must call PositionStatistics.objects.apply_deltas()
+    itself, and the rebuild_position_statistics command recomputes them.
+    Attributes:
+        position (OneToOneField): The position the counters belong to.
+        draft, submitted, approved, disapproved, appointed, turned_down
+            (IntegerField): Number of applications in each status.
+    """
+
+    objects = PositionStatisticsManager()
+
+    position = models.OneToOneField(
+        'Position',
+        related_name='statistics',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+
+    draft = models.IntegerField(default=0)
+    submitted = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    disapproved = models.IntegerField(default=0)
+    appointed = models.IntegerField(default=0)
+    turned_down = models.IntegerField(default=0)
+
+    @staticmethod
+    def add_delta(deltas, position_id, status, delta):
+        changes = deltas.setdefault(position_id, {})
+        changes[status] = changes.get(status, 0) + delta
+
+    def as_dict(self):
+        return {
+            status: getattr(self, status)
+            for status, _ in Application.STATUS_CHOICES
+        }
+
+
+class AnalyticsSnapshot(models.Model):
+    """
+    Number of applications per status in one recruitment round, grouped by
+    one dimension, precomputed by the refresh_analytics command so that
+    analytics never join the live tables. See backend.analytics.
+    Attributes:
+        round (DateField): The recruitment deadline shared by the positions
+            of the round.
+        dimension (CharField): What the applications are grouped by.
+        key (CharField): The group, e.g. a team id or a registration year;
+            empty for applications outside any group.
+        draft, submitted, approved, disapproved, appointed, turned_down
+            (IntegerField): Number of applications in each status.
+        refreshed_at (DateTimeField): When the row was last computed.
+    """
+
+    DIMENSION_CHOICES = (
+        ('round', _('Round')),
+        ('team', _('Team')),
+        ('section', _('Section')),
+        ('registration_year', _('Registration year')),
+    )
+
+    round = models.DateField(
+        verbose_name=_('Round'),
+    )
+
+    dimension = models.CharField(
+        max_length=20,
+        choices=DIMENSION_CHOICES,
+        verbose_name=_('Dimension'),
+    )
+
+    key = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name=_('Key'),
+    )
+
+    draft = models.IntegerField(default=0)
+    submitted = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    disapproved = models.IntegerField(default=0)
+    appointed = models.IntegerField(default=0)
+    turned_down = models.IntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(
+        verbose_name=_('Refreshed at'),
+        auto_now=True,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'round', 'key'],
+                name='unique_analytics_snapshot',
+            ),
+        ]
+
+    def as_dict(self):
+        return {
+            status: getattr(self, status)
+            for status, _ in Application.STATUS_CHOICES
+        }
+
+
+class ApplicationTransition(models.Model):
+    """
+    Audit record of one batch of application status changes.
+    Attributes:
+        created_at (DateTimeField): When the transition was applied.
+        to_status (CharField): The status the applications were moved to.
+        count (IntegerField): Number of applications moved.
+        from_counts (JSONField): Number of applications moved from each status.
+        application_ids (JSONField): The ids of the applications moved.
+    """
+
+    created_at = models.DateTimeField(
+        verbose_name=_('Created at'),
+        auto_now_add=True,
+    )
+
+    to_status = models.CharField(
+        max_length=20,
+        choices=Application.STATUS_CHOICES,
+        verbose_name=_('New status'),
+    )
+
+    count = models.IntegerField(
+        verbose_name=_('Number of applications'),
+    )
+
+    from_counts = models.JSONField(
+        verbose_name=_('Previous statuses'),
+        default=dict,
+    )
+
+    application_ids = models.JSONField(
+        verbose_name=_('Applications'),
+        default=list,
+    )
+
+
+class Checkpoint(models.Model):
+    """
+    Progress marker for incremental background jobs, so that a run can
+    continue from where the previous one stopped.
+    Attributes:
+        name (CharField): Unique name of the job owning the checkpoint.
+        value (JSONField): Job specific state, e.g. a timestamp or an ETag.
+        updated_at (DateTimeField): When the checkpoint was last written.
+    """
+
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name=_('Name'),
+    )
+
+    value = models.JSONField(
+        verbose_name=_('Value'),
+        default=dict,
+    )
+
+    updated_at = models.DateTimeField(
+        verbose_name=_('Updated at'),
+        auto_now=True,
+    )
+
+    @classmethod
+    def load(cls, name):
+        checkpoint = cls.objects.filter(name=name).first()
+        return checkpoint.value if checkpoint else {}
+
+    @classmethod
+    def store(cls, name, value):
+        cls.objects.update_or_create(name=name, defaults={'value': value})
+
+
+class JobManager(models.Manager):
+
+    def enqueue(self, kind, payload, key=None, run_at=None, max_attempts=5):
+        """
+        Adds a job to the queue, to be picked up by the run_jobs worker
+        once the current transaction commits. If a job with the same
+        idempotency key already exists nothing is added.
+        """
+        self.enqueue_many(kind, [payload], keys=[key], run_at=run_at,
+                          max_attempts=max_attempts)
+
+    def enqueue_many(self, kind, payloads, keys=None, run_at=None,
+                     max_attempts=5):
+        """
+        Adds one job per payload with a single INSERT. keys gives the
+        idempotency key of each payload, or None.
+        """
+        keys = keys or [None] * len(payloads)
+        run_at = run_at or timezone.now()
+        self.bulk_create(
+            [
+                self.model(kind=kind, payload=payload, key=key,
+                           run_at=run_at, max_attempts=max_attempts)
+                for payload, key in zip(payloads, keys)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Job(models.Model):
+    """
+    A unit of background work, such as sending notification emails, run
+    by the run_jobs management command. See backend.jobs.
+    Attributes:
+        kind (CharField): Name of the handler that runs the job.
+        payload (JSONField): Arguments for the handler.
+        key (CharField): Optional idempotency key; a job with the same key
+            is only ever queued once.
+        status (CharField): Where the job is in its life cycle.
+        run_at (DateTimeField): The job is not run before this time, pushed
+            forward after each failed attempt.
+        attempts (IntegerField): Number of times the job has been started.
+        max_attempts (IntegerField): Attempts before the job is given up.
+        locked_by (CharField): The worker running the job.
+        locked_at (DateTimeField): When the worker took the job.
+        last_error (TextField): The error of the last failed attempt.
+        created_at (DateTimeField): When the job was queued.
+        finished_at (DateTimeField): When the job succeeded or was given up.
+    """
+
+    objects = JobManager()
+
+    STATUS_CHOICES = (
+        ('queued', _('Queued')),
+        ('running', _('Running')),
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    )
+
+    kind = models.CharField(
+        max_length=100,
+        verbose_name=_('Kind'),
+    )
+
+    payload = models.JSONField(
+        verbose_name=_('Payload'),
+        default=dict,
+    )
+
+    key = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name=_('Idempotency key'),
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name=_('Status'),
+    )
+
+    run_at = models.DateTimeField(
+        verbose_name=_('Run at'),
+        default=timezone.now,
+    )
+
+    attempts = models.IntegerField(
+        verbose_name=_('Attempts'),
+        default=0,
+    )
+
+    max_attempts = models.IntegerField(
+        verbose_name=_('Max attempts'),
+        default=5,
+    )
+
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name=_('Locked by'),
+    )
+
+    locked_at = models.DateTimeField(
+        verbose_name=_('Locked at'),
+        null=True,
+        blank=True,
+    )
+
+    last_error = models.TextField(
+        verbose_name=_('Last error'),
+        blank=True,
+    )
+
+    created_at = models.DateTimeField(
+        verbose_name=_('Created at'),
+        auto_now_add=True,
+    )
+
+    finished_at = models.DateTimeField(
+        verbose_name=_('Finished at'),
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        indexes = [
+            # The workers' "next due jobs" lookup
+            models.Index(fields=['status', 'run_at'], name='job_due_idx'),
+        ]
+
+
 class Role(models.Model):
     """
     This class represents a role within a committee/working group of UTN
@@ -423,6 +1165,7 @@ class Role(models.Model):
         description_en (CharField): The english description of the role. This field is required.
         description_sv (CharField): The swedish description of the role. This field is required.
         contact_email (EmailField): Contact email to highest position within committee/working group. This field is required
+        updated_at (DateTimeField): When the role was last saved, used for HTTP caching.
     """
     team = models.ForeignKey(
         'Team',
@@ -487,6 +1230,22 @@ class Role(models.Model):
         help_text=_('The email address for the current position holder'),
         blank=False,
     )
+
+    updated_at = models.DateTimeField(
+        verbose_name=_('Updated at'),
+        auto_now=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['archived', 'team'], name='role_archived_team_idx'),
+            # The role type filter of the admin
+            models.Index(fields=['role_type'], name='role_type_idx'),
+        ]
+
+    def __str__(self):
+        return self.title_en
+
     # ------ Administrator settings ------
     # panels = [MultiFieldPanel([
     #     FieldRowPanel([
@@ -0,0 +1,118 @@
+"""
+Emails sent to applicants, their references and recruiters.
+
+Nothing here is called from a request. Views and bulk transitions queue
+jobs (see backend.jobs) and these handlers send the emails of a whole
+batch of jobs over one SMTP connection. The emails of each job are sent
+separately, so a failure only retries the jobs whose emails were not
+sent and nobody else gets theirs twice.
+"""
+from django.core.mail import EmailMessage, get_connection
+
+from .jobs import PartialFailure
+from .models import Application
+
+
+def _applications(ids):
+    return (
+        Application.objects
+        .filter(pk__in=ids)
+        .select_related('member', 'position__role')
+        .prefetch_related('reference')
+        .only('member__name', 'member__email', 'position__role__title_en',
+              'position__role__title_sv', 'position__role__contact_email')
+    )
+
+
+def _send_each(groups):
+    """
+    Sends each list of messages in groups, one per job, over a single
+    connection. Raises PartialFailure naming the jobs that failed.
+    """
+    failures = {}
+    with get_connection() as connection:
+        for index, messages in enumerate(groups):
+            if not messages:
+                continue
+            try:
+                connection.send_messages(messages)
+            except Exception as e:
+                failures[index] = '%s: %s' % (type(e).__name__, e)
+    if failures:
+        raise PartialFailure(failures)
+
+
+def application_received(payloads):
+    """
+    For each {'application': id}: confirm to the applicant, tell the
+    contact of the role and let every reference with an email address know
+    they have been named.
+    """
+    messages_of = {}
+    for application in _applications([p['application'] for p in payloads]):
+        messages = messages_of[application.pk] = []
+        member = application.member
+        role = application.position.role
+        messages.append(EmailMessage(
+            'Application received: %s / %s' % (role.title_en, role.title_sv),
+            'Hi %s,\n\nWe have received your application for %s. You will '
+            'hear from us once the recruitment has closed.\n\n'
+            'Hej %s,\n\nVi har tagit emot din ansökan till %s. Du hör av oss '
+            'när rekryteringen har stängt.\n\nUTN' % (
+                member.name, role.title_en, member.name, role.title_sv),
+            to=[member.email],
+        ))
+        messages.append(EmailMessage(
+            'New application: %s' % role.title_en,
+            '%s has applied for %s.' % (member.name, role.title_en),
+            to=[role.contact_email],
+        ))
+        for reference in application.reference.all():
+            if not reference.email:
+                continue
+            messages.append(EmailMessage(
+                'You are a reference for %s' % member.name,
+                'Hi %s,\n\n%s has named you as a reference in their '
+                'application for %s at UTN. The recruiters may contact you.'
+                '\n\nUTN' % (reference.name, member.name, role.title_en),
+                to=[reference.email],
+            ))
+    _send_each([messages_of.get(p['application'], []) for p in payloads])
+
+
+DECISION_MESSAGES = {
+    'appointed': (
+        'You have been appointed %s',
+        'Hi %s,\n\nCongratulations, you have been appointed %s.\n\nUTN',
+    ),
+    'turned_down': (
+        'Your application for %s',
+        'Hi %s,\n\nThank you for applying for %s. Unfortunately the '
+        'position has gone to someone else this time.\n\nUTN',
+    ),
+}
+
+
+def application_decision(payloads):
+    """
+    For each {'application': id, 'status': status}: tell the applicant
+    they have been appointed or turned down.
+    """
+    applications = {
+        application.pk: application
+        for application in _applications([p['application'] for p in payloads])
+    }
+    groups = []
+    for payload in payloads:
+        subject, body = DECISION_MESSAGES[payload['status']]
+        application = applications.get(payload['application'])
+        if application is None:
+            groups.append([])
+            continue
+        role = application.position.role
+        groups.append([EmailMessage(
+            subject % role.title_en,
+            body % (application.member.name, role.title_en),
+            to=[application.member.email],
+        )])
+    _send_each(groups)
@@ -0,0 +1,194 @@
+"""
+Public position, role and team pages with HTTP validators and cached
+fragments.
+
+Each page has a version: the newest updated_at of the objects shown on
+it, together with the number of child objects so that deletions count
+too. The version is read with one small aggregate query. It becomes the
+ETag and Last-Modified of the response, so a client revalidating an
+unchanged page gets a 304 without anything being rendered. Otherwise the
+rendered JSON for the page, language and version is taken from the cache
+and only built from the database on a miss. Edits change the version, so
+stale fragments are never served and simply expire.
+
+Pages listing open positions depend on the date as well, so their
+version and Last-Modified are never older than the start of today.
+"""
+import json
+from datetime import date, datetime, time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Position, Role, Team
+
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class Page:
+    """
+    A versioned page.
+    Attributes:
+        kind (str): 'position', 'role' or 'team'.
+        pk (int): The id of the object shown.
+        updated_at (datetime): The newest change to anything on the page.
+        token (str): The full version, also covering deletions and the date.
+    """
+
+    def __init__(self, kind, pk, updated_at, token):
+        self.kind = kind
+        self.pk = pk
+        self.updated_at = updated_at
+        self.token = token
+
+    def etag(self, language):
+        return '"%s-%d-%s-%s"' % (self.kind, self.pk, self.token, language)
+
+    def cache_key(self, language):
+        return 'page:%s:%d:%s:%s' % (self.kind, self.pk, self.token, language)
+
+
+def _newest(*timestamps):
+    return max(t for t in timestamps if t is not None)
+
+
+def _token(updated_at, *parts):
+    return '-'.join(
+        [str(int(updated_at.timestamp() * 1000000))] + [str(p) for p in parts])
+
+
+def position_page(pk):
+    row = Position.objects.filter(pk=pk).values_list(
+        'updated_at', 'role__updated_at', 'role__team__updated_at').first()
+    if row is None:
+        return None
+    updated_at = _newest(*row)
+    return Page('position', pk, updated_at, _token(updated_at))
+
+
+def role_page(pk):
+    row = (
+        Role.objects.filter(pk=pk)
+        .annotate(positions_updated_at=Max('positions__updated_at'),
+                  position_count=Count('positions'))
+        .values_list('updated_at', 'team__updated_at', 'positions_updated_at',
+                     'position_count')
+        .first()
+    )
+    if row is None:
+        return None
+    # The open positions change at midnight without any row changing
+    today = date.today()
+    midnight = timezone.make_aware(datetime.combine(today, time.min))
+    updated_at = _newest(midnight, *row[:3])
+    return Page('role', pk, updated_at,
+                _token(updated_at, row[3], today.isoformat()))
+
+
+def team_page(pk):
+    row = (
+        Team.objects.filter(pk=pk)
+        .annotate(roles_updated_at=Max('role__updated_at'),
+                  role_count=Count('role', distinct=True))
+        .values_list('updated_at', 'roles_updated_at', 'role_count')
+        .first()
+    )
+    if row is None:
+        return None
+    updated_at = _newest(*row[:2])
+    return Page('team', pk, updated_at, _token(updated_at, row[2]))
+
+
+def _position(position, language):
+    return {
+        'id': position.id,
+        'recruitment_start': position.recruitment_start,
+        'recruitment_end': position.recruitment_end,
+        'appointed': position.appointed,
+        'term_from': position.term_from,
+        'term_end': position.term_end,
+        'comment': position.comment_eng if language == 'en' else position.comment_sv,
+    }
+
+
+def _role(role, language):
+    return {
+        'id': role.id,
+        'title': getattr(role, 'title_' + language),
+        'description': getattr(role, 'description_' + language),
+        'role_type': role.role_type,
+        'archived': role.archived,
+        'contact_email': role.contact_email,
+    }
+
+
+def _team(team, language):
+    return {
+        'id': team.id,
+        'name': getattr(team, 'name_' + language),
+        'description': getattr(team, 'desc_' + language),
+        'logo_thumbnail': reverse(
+            'backend:team_logo', args=[team.id, 'medium']) if team.logo else None,
+    }
+
+
+def build_position(pk, language):
+    position = Position.objects.select_related('role__team').get(pk=pk)
+    data = _position(position, language)
+    data['role'] = _role(position.role, language)
+    data['team'] = _team(position.role.team, language)
+    return data
+
+
+def build_role(pk, language):
+    role = Role.objects.select_related('team').get(pk=pk)
+    data = _role(role, language)
+    data['team'] = _team(role.team, language)
+    data['open_positions'] = [
+        _position(position, language)
+        for position in Position.objects.open().filter(role=role)
+        .order_by('recruitment_end', 'id')
+    ]
+    return data
+
+
+def build_team(pk, language):
+    team = Team.objects.get(pk=pk)
+    data = _team(team, language)
+    data['roles'] = [
+        _role(role, language)
+        for role in team.role.filter(archived=False).order_by('title_' + language)
+    ]
+    return data
+
+
+PAGES = {
+    'position': (position_page, build_position),
+    'role': (role_page, build_role),
+    'team': (team_page, build_team),
+}
+
+
+def get_version(kind, pk):
+    """
+    The Page of an object, or None if it does not exist.
+    """
+    return PAGES[kind][0](pk)
+
+
+def render(page, language):
+    """
+    The JSON body of a page, from the cache when this version has been
+    rendered before.
+    """
+    key = page.cache_key(language)
+    body = cache.get(key)
+    if body is None:
+        data = PAGES[page.kind][1](page.pk, language)
+        body = json.dumps(data, cls=DjangoJSONEncoder)
+        cache.set(key, body, CACHE_TIMEOUT)
+    return body
@@ -0,0 +1,100 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values):
+    """
+    Encode the keyset values of the last row on a page as an opaque cursor.
+    """
+    raw = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor. Raises ValueError if the
+    cursor has been tampered with or is otherwise malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list) or not all(
+            isinstance(value, (str, int, float)) for value in values):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """
+    Parse the page size given by a client, clamped to MAX_PAGE_SIZE.
+    """
+    if value in (None, ''):
+        return default
+    size = int(value)
+    if size < 1:
+        raise ValueError('Page size must be positive')
+    return min(size, MAX_PAGE_SIZE)
+
+
+def _key(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def _keyset_queryset(queryset, keys, cursor):
+    queryset = queryset.order_by(*keys)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise ValueError('Invalid cursor')
+        # (k1, k2, ...) > (v1, v2, ...) expanded into plain comparisons
+        condition = Q()
+        for i, key in enumerate(keys):
+            step = Q(**{key + '__gt': values[i]})
+            for prev_key, prev_value in zip(keys[:i], values[:i]):
+                step &= Q(**{prev_key: prev_value})
+            condition |= step
+        try:
+            queryset = queryset.filter(condition)
+        except (TypeError, ValidationError) as e:
+            # Values of the wrong type for their field, e.g. a bad date
+            raise ValueError('Invalid cursor') from e
+    return queryset
+
+
+def _page(rows, keys, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([_key(rows[-1], key) for key in keys])
+    return rows, next_cursor
+
+
+def paginate_keyset(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of the queryset ordered by keys, which must end in a
+    unique field, together with the cursor of the next page (or None).
+
+    Unlike OFFSET pagination this seeks directly to the start of the page
+    using the index backing the keys, so deep pages cost the same as the
+    first one.
+    """
+    queryset = _keyset_queryset(queryset, keys, cursor)
+    return _page(list(queryset[:page_size + 1]), keys, page_size)
+
+
+async def apaginate_keyset(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Async version of paginate_keyset.
+    """
+    queryset = _keyset_queryset(queryset, keys, cursor)
+    return _page([row async for row in queryset[:page_size + 1]], keys, page_size)
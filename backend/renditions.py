@@ -0,0 +1,159 @@
+"""
+Resized renditions of team logos.
+
+Logos are uploaded at any size. Renditions are rendered on first request
+in one of SIZES and FORMATS and stored under RENDITIONS_ROOT (default
+MEDIA_ROOT/renditions) with a name derived from the SHA-256 of the
+original file, so a new logo never gets an old rendition and the same
+file uploaded twice is only rendered once. The digest of each original is
+remembered in the cache, so serving an existing rendition costs no image
+work at all.
+
+The prewarm_renditions command renders every team's logos up front in a
+process pool; the functions it runs in the workers take only file paths.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+SIZES = {
+    'small': 64,
+    'medium': 256,
+    'large': 512,
+}
+
+# name: (Pillow format, content type, file extension)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+}
+
+QUALITY = 80
+DIGEST_TIMEOUT = 60 * 60 * 24 * 30
+
+
+class RenditionError(Exception):
+    """
+    Raised when the original image cannot be read.
+    """
+
+
+def renditions_root():
+    return getattr(settings, 'RENDITIONS_ROOT', None) or os.path.join(
+        settings.MEDIA_ROOT, 'renditions')
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_digest(field_file):
+    """
+    The digest of an uploaded original, cached by its storage name.
+    Uploads never overwrite an existing name, so the digest of a name
+    does not change.
+    """
+    key = 'rendition_digest:%s' % field_file.name
+    digest = cache.get(key)
+    if digest is None:
+        digest = file_digest(field_file.path)
+        cache.set(key, digest, DIGEST_TIMEOUT)
+    return digest
+
+
+def rendition_path(digest, size, file_format):
+    extension = FORMATS[file_format][2]
+    return os.path.join(
+        renditions_root(), digest[:2], '%s-%s.%s' % (digest, size, extension))
+
+
+def render(source, size, file_format):
+    """
+    Render the image at path source to fit a SIZES[size] square, returned
+    as bytes in file_format.
+    """
+    pillow_format = FORMATS[file_format][0]
+    width = SIZES[size]
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((width, width), Image.LANCZOS)
+            if pillow_format == 'JPEG' and image.mode != 'RGB':
+                # JPEG has no transparency, flatten onto white
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            out = tempfile.SpooledTemporaryFile()
+            options = {'quality': QUALITY}
+            if pillow_format == 'WEBP':
+                options['method'] = 6
+            else:
+                options['optimize'] = True
+                options['progressive'] = True
+            image.save(out, pillow_format, **options)
+    except (OSError, UnidentifiedImageError) as e:
+        raise RenditionError('Cannot render %s: %s' % (source, e)) from e
+    out.seek(0)
+    return out.read()
+
+
+def ensure_rendition(source, digest, size, file_format):
+    """
+    Render source unless its rendition already exists. Returns its path.
+    """
+    path = rendition_path(digest, size, file_format)
+    if os.path.exists(path):
+        return path
+    data = render(source, size, file_format)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written under a temporary name and moved into place, so concurrent
+    # requests never serve a half written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return path
+
+
+def get_rendition(field_file, size, file_format):
+    """
+    The (path, digest) of a rendition of an uploaded image, rendered now
+    if it does not exist yet.
+    """
+    digest = source_digest(field_file)
+    return ensure_rendition(field_file.path, digest, size, file_format), digest
+
+
+def prewarm(source):
+    """
+    Render every size and format of the image at path source. Runs in a
+    worker process of the prewarm_renditions command. Returns the digest
+    and the number of renditions created.
+    """
+    digest = file_digest(source)
+    created = 0
+    for size in SIZES:
+        for file_format in FORMATS:
+            if not os.path.exists(rendition_path(digest, size, file_format)):
+                ensure_rendition(source, digest, size, file_format)
+                created += 1
+    return digest, created
+
+
+def negotiate_format(accept):
+    """
+    WebP for clients that accept it, JPEG otherwise.
+    """
+    return 'webp' if 'image/webp' in (accept or '') else 'jpeg'
@@ -0,0 +1,173 @@
+"""
+GDPR retention and erasure.
+
+Applications are kept only as long as the recruitment needs them:
+
+- rejected applications are deleted REJECTED_DAYS after their rejection
+  date,
+- applications that were never decided on are deleted APPLICATION_DAYS
+  after the recruitment of their position closed,
+- appointed applications are anonymized, i.e. their texts blanked and
+  their references deleted, APPOINTED_DAYS after the term ended. The
+  appointment itself lives on in MandateHistory.
+
+Every step works through its applications in id order, BATCH_SIZE at a
+time, each batch in its own short transaction with an optional PAUSE in
+between, so purging years of backlog never holds locks long enough to
+stall the live site. The last id done is stored as a Checkpoint after
+each batch, so an interrupted or max_batches limited run continues where
+it stopped; once a step reaches the end its checkpoint is cleared.
+
+erase_member() removes everything stored about one member on request.
+"""
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from . import search
+from .models import Application, Checkpoint, MandateHistory, Member, Reference
+
+
+CHECKPOINT_NAME = 'retention'
+
+DEFAULTS = {
+    'REJECTED_DAYS': 365,
+    'APPLICATION_DAYS': 2 * 365,
+    'APPOINTED_DAYS': 2 * 365,
+    # Applications handled per transaction
+    'BATCH_SIZE': 500,
+    # Seconds to sleep between batches
+    'PAUSE': 0.0,
+}
+
+
+def config():
+    return dict(DEFAULTS, **getattr(settings, 'RETENTION', {}))
+
+
+def rejected(today, conf):
+    cutoff = today - timedelta(days=conf['REJECTED_DAYS'])
+    return Application.objects.filter(
+        rejection_date__lt=cutoff,
+        status__in=Application.REJECTED_STATUSES,
+    )
+
+
+def undecided(today, conf):
+    cutoff = today - timedelta(days=conf['APPLICATION_DAYS'])
+    return Application.objects.filter(
+        position__recruitment_end__lt=cutoff,
+        status__in=('draft', 'submitted', 'approved'),
+    )
+
+
+def appointed(today, conf):
+    cutoff = today - timedelta(days=conf['APPOINTED_DAYS'])
+    return Application.objects.filter(
+        Q(~Q(cover_letter='') | ~Q(qualifications='')
+          | Exists(Reference.objects.filter(application=OuterRef('pk')))),
+        position__term_end__lt=cutoff,
+        status='appointed',
+    )
+
+
+def anonymize(queryset):
+    """
+    Blanks the texts of the applications in the queryset and deletes
+    their references.
+    """
+    ids = list(queryset.values_list('id', flat=True))
+    Reference.objects.filter(application_id__in=ids).delete()
+    Application.objects.filter(pk__in=ids).update(
+        cover_letter='', qualifications='')
+    search.remove_ids('application', ids)
+    return len(ids)
+
+
+# name: (selection, action)
+STEPS = {
+    'rejected': (rejected, lambda queryset: queryset.purge()),
+    'undecided': (undecided, lambda queryset: queryset.purge()),
+    'appointed': (appointed, anonymize),
+}
+
+
+class RetentionResult:
+    """
+    Outcome of a retention run.
+    Attributes:
+        processed (dict): Number of applications handled per step.
+        batches (int): Number of batches run.
+        finished (bool): False if max_batches stopped the run early.
+        elapsed (float): Wall clock time of the run in seconds.
+    """
+
+    def __init__(self):
+        self.processed = {name: 0 for name in STEPS}
+        self.batches = 0
+        self.finished = True
+        self.elapsed = 0.0
+
+
+def run(today=None, steps=None, batch_size=None, max_batches=None, pause=None):
+    """
+    Runs the retention steps, all of them by default.
+    """
+    started = time.monotonic()
+    conf = config()
+    today = today or date.today()
+    batch_size = batch_size or conf['BATCH_SIZE']
+    pause = conf['PAUSE'] if pause is None else pause
+    result = RetentionResult()
+    progress = Checkpoint.load(CHECKPOINT_NAME)
+
+    for name in steps or STEPS:
+        select, action = STEPS[name]
+        queryset = select(today, conf)
+        while True:
+            if max_batches is not None and result.batches >= max_batches:
+                result.finished = False
+                result.elapsed = time.monotonic() - started
+                return result
+            after = progress.get(name, 0)
+            ids = list(
+                queryset.filter(pk__gt=after)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            with transaction.atomic():
+                if ids:
+                    result.processed[name] += action(
+                        Application.objects.filter(pk__in=ids))
+                    progress[name] = ids[-1]
+                else:
+                    progress.pop(name, None)
+                Checkpoint.store(CHECKPOINT_NAME, progress)
+            if not ids:
+                break
+            result.batches += 1
+            if pause:
+                time.sleep(pause)
+
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def erase_member(member_id):
+    """
+    Deletes a member with their applications, references and mandates.
+    Returns a dict with the number of rows deleted per model.
+    """
+    with transaction.atomic():
+        member = Member.objects.select_for_update().get(pk=member_id)
+        applications = Application.objects.filter(member=member).purge()
+        mandates, _ = MandateHistory.objects.filter(member=member).delete()
+        member.delete()
+    return {
+        'applications': applications,
+        'mandates': mandates,
+        'members': 1,
+    }
@@ -0,0 +1,46 @@
+"""
+Test runner that keeps test runs out of the developer's cache.
+
+The default cache is shared by every process (see CACHES in the
+settings), so tests run against it would read and leave behind version
+tokens and pending autosaves of the development server. Tests and
+benchmarks use a file cache in a temporary directory instead, which is
+still shared between processes like the real one.
+"""
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def temporary_cache():
+    """
+    Replace the caches with a file cache in a new temporary directory,
+    deleted on exit.
+    """
+    location = tempfile.mkdtemp(prefix='apply-cache-')
+    try:
+        with override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }
+        }):
+            yield location
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cleanup = ExitStack()
+        self._cleanup.enter_context(temporary_cache())
+
+    def teardown_test_environment(self, **kwargs):
+        self._cleanup.close()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,312 @@
+"""
+Full-text search over applications and roles in English and Swedish.
+
+Text is kept in a separate index rather than searched with icontains:
+
+* On SQLite two FTS5 tables, backend_search_en using the built in Porter
+  stemmer and backend_search_sv holding text stemmed with the Swedish
+  Snowball algorithm below. Results are ranked with bm25().
+* On PostgreSQL one table with a GIN indexed tsvector combining the
+  'english' and 'swedish' text search configurations, ranked with ts_rank.
+* Any other database falls back to a (slow) icontains scan.
+
+Role descriptions go into the index of their own language. Applications
+may be written in either, so their text is indexed under both. The index
+is kept current by signals on save and delete, the bulk importer indexes
+what it writes, and rebuild_search_index recreates it from scratch.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Application, Role
+
+
+KINDS = ('application', 'role')
+INDEXED_FIELDS = {
+    'cover_letter', 'qualifications',
+    'title_en', 'title_sv', 'description_en', 'description_sv',
+}
+# Encoded into the FTS5 rowid so entries can be replaced without a scan
+KIND_IDS = {'application': 1, 'role': 2}
+
+SQLITE_TABLES = {
+    'en': 'backend_search_en',
+    'sv': 'backend_search_sv',
+}
+POSTGRES_TABLE = 'backend_search_document'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# ---- Swedish stemming ------
+
+_SV_VOWELS = 'aeiouyäåö'
+_SV_S_ENDINGS = 'bcdfghjklmnoprtvy'
+_SV_STEP1_SUFFIXES = sorted((
+    'a', 'arna', 'erna', 'heterna', 'orna', 'ad', 'e', 'ade', 'ande',
+    'arne', 'are', 'aste', 'en', 'anden', 'aren', 'heten', 'ern', 'ar',
+    'er', 'heter', 'or', 'as', 'arnas', 'ernas', 'ornas', 'es', 'ades',
+    'andes', 'ens', 'arens', 'hetens', 'erns', 'at', 'andet', 'het', 'ast',
+), key=len, reverse=True)
+_SV_STEP2_SUFFIXES = ('dd', 'gd', 'nn', 'dt', 'gt', 'kt', 'tt')
+
+
+def _sv_r1(word):
+    for i in range(1, len(word)):
+        if word[i] not in _SV_VOWELS and word[i - 1] in _SV_VOWELS:
+            return max(i + 1, 3)
+    return len(word)
+
+
+def stem_swedish(word):
+    """
+    Stem a lower case Swedish word with the Snowball Swedish algorithm.
+    """
+    r1 = _sv_r1(word)
+
+    region = word[r1:]
+    for suffix in _SV_STEP1_SUFFIXES:
+        if region.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    else:
+        if region.endswith('s') and len(word) > 1 and word[-2] in _SV_S_ENDINGS:
+            word = word[:-1]
+
+    if word[r1:].endswith(_SV_STEP2_SUFFIXES):
+        word = word[:-1]
+
+    region = word[r1:]
+    if region.endswith(('lig', 'ig', 'els')):
+        word = word[:-(3 if region.endswith(('lig', 'els')) else 2)]
+    elif region.endswith('löst'):
+        word = word[:-1]
+    elif region.endswith('fullt'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def swedish_text(text):
+    return ' '.join(stem_swedish(token) for token in tokenize(text))
+
+
+# ---- Documents ------
+
+def documents(kind, obj):
+    """
+    The (English text, Swedish text) to index for an object.
+    """
+    if kind == 'role':
+        return (
+            ' '.join((obj.title_en, obj.description_en)),
+            ' '.join((obj.title_sv, obj.description_sv)),
+        )
+    text = ' '.join((obj.cover_letter, obj.qualifications))
+    return text, text
+
+
+def kind_of(obj):
+    if isinstance(obj, Application):
+        return 'application'
+    if isinstance(obj, Role):
+        return 'role'
+    raise ValueError('%r is not searchable' % obj)
+
+
+def _vendor():
+    return connection.vendor
+
+
+def _rowid(kind, pk):
+    return pk * 4 + KIND_IDS[kind]
+
+
+def index_objects(objs, replace=True):
+    """
+    Add or replace the index entries of the given applications and roles.
+    Pass replace=False for objects that are known to be new.
+    """
+    objs = list(objs)
+    if not objs:
+        return
+    rows = []
+    for obj in objs:
+        kind = kind_of(obj)
+        rows.append((kind, obj.pk) + documents(kind, obj))
+    vendor = _vendor()
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+
+    with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+        if replace:
+            _delete(cursor, [(kind, pk) for kind, pk, _, _ in rows])
+        if vendor == 'sqlite':
+            sql = ('INSERT INTO %s (rowid, kind, object_id, body) '
+                   'VALUES (%%s, %%s, %%s, %%s)')
+            cursor.executemany(
+                sql % SQLITE_TABLES['en'],
+                [(_rowid(kind, pk), kind, pk, en) for kind, pk, en, _ in rows],
+            )
+            cursor.executemany(
+                sql % SQLITE_TABLES['sv'],
+                [(_rowid(kind, pk), kind, pk, swedish_text(sv))
+                 for kind, pk, _, sv in rows],
+            )
+        else:
+            cursor.executemany(
+                'INSERT INTO %s (kind, object_id, vector) VALUES (%%s, %%s, '
+                "to_tsvector('english', %%s) || to_tsvector('swedish', %%s))"
+                % POSTGRES_TABLE,
+                rows,
+            )
+
+
+def _delete(cursor, keys):
+    if _vendor() == 'sqlite':
+        for table in SQLITE_TABLES.values():
+            cursor.executemany(
+                'DELETE FROM %s WHERE rowid = %%s' % table,
+                [(_rowid(kind, pk),) for kind, pk in keys],
+            )
+    else:
+        cursor.executemany(
+            'DELETE FROM %s WHERE kind = %%s AND object_id = %%s'
+            % POSTGRES_TABLE,
+            keys,
+        )
+
+
+def remove_object(obj):
+    remove_ids(kind_of(obj), [obj.pk])
+
+
+def remove_ids(kind, pks):
+    """
+    Remove the index entries of many objects of one kind at once.
+    """
+    if _vendor() not in ('sqlite', 'postgresql') or not pks:
+        return
+    with connection.cursor() as cursor:
+        _delete(cursor, [(kind, pk) for pk in pks])
+
+
+def rebuild(batch_size=1000):
+    """
+    Recreate the whole index. Returns the number of objects indexed.
+    """
+    if _vendor() not in ('sqlite', 'postgresql'):
+        return 0
+    tables = (
+        SQLITE_TABLES.values() if _vendor() == 'sqlite' else [POSTGRES_TABLE])
+    count = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute('DELETE FROM %s' % table)
+        querysets = (
+            Role.objects.only(
+                'id', 'title_en', 'title_sv', 'description_en', 'description_sv'),
+            Application.objects.only('id', 'cover_letter', 'qualifications'),
+        )
+        for queryset in querysets:
+            batch = []
+            for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) == batch_size:
+                    index_objects(batch, replace=False)
+                    count += len(batch)
+                    batch = []
+            index_objects(batch, replace=False)
+            count += len(batch)
+    return count
+
+
+# ---- Querying ------
+
+def _fts_query(tokens):
+    return ' '.join('"%s"' % token.replace('"', '""') for token in tokens)
+
+
+def _search_sqlite(tokens, kinds, limit):
+    en, sv = SQLITE_TABLES['en'], SQLITE_TABLES['sv']
+    kind_filter = ', '.join(['%s'] * len(kinds))
+    sql = (
+        'SELECT kind, object_id, MAX(score) FROM ('
+        ' SELECT kind, object_id, -bm25({en}) AS score FROM {en}'
+        ' WHERE {en} MATCH %s AND kind IN ({kinds})'
+        ' UNION ALL'
+        ' SELECT kind, object_id, -bm25({sv}) AS score FROM {sv}'
+        ' WHERE {sv} MATCH %s AND kind IN ({kinds})'
+        ') GROUP BY kind, object_id ORDER BY 3 DESC, 2 LIMIT %s'
+    ).format(en=en, sv=sv, kinds=kind_filter)
+    params = (
+        [_fts_query(tokens)] + list(kinds)
+        + [_fts_query([stem_swedish(t) for t in tokens])] + list(kinds)
+        + [limit]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_postgres(tokens, kinds, limit):
+    text = ' '.join(tokens)
+    sql = (
+        "SELECT kind, object_id, ts_rank(vector, query) AS score "
+        "FROM {table}, (SELECT plainto_tsquery('english', %s) "
+        "|| plainto_tsquery('swedish', %s) AS query) q "
+        "WHERE vector @@ query AND kind = ANY(%s) "
+        "ORDER BY score DESC, object_id LIMIT %s"
+    ).format(table=POSTGRES_TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [text, text, list(kinds), limit])
+        return cursor.fetchall()
+
+
+def _search_scan(tokens, kinds, limit):
+    results = []
+    if 'role' in kinds:
+        condition = Q()
+        for token in tokens:
+            condition &= (
+                Q(title_en__icontains=token) | Q(title_sv__icontains=token)
+                | Q(description_en__icontains=token)
+                | Q(description_sv__icontains=token)
+            )
+        results += [('role', pk, 1.0) for pk in Role.objects.filter(
+            condition).values_list('pk', flat=True)[:limit]]
+    if 'application' in kinds:
+        condition = Q()
+        for token in tokens:
+            condition &= (
+                Q(cover_letter__icontains=token)
+                | Q(qualifications__icontains=token)
+            )
+        results += [('application', pk, 1.0) for pk in Application.objects.filter(
+            condition).values_list('pk', flat=True)[:limit]]
+    return results[:limit]
+
+
+def search(query, kinds=KINDS, limit=20):
+    """
+    Return up to limit (kind, object id, score) tuples matching every word
+    of query, best match first.
+    """
+    tokens = tokenize(query)
+    kinds = [kind for kind in kinds if kind in KINDS]
+    if not tokens or not kinds:
+        return []
+    vendor = _vendor()
+    if vendor == 'sqlite':
+        rows = _search_sqlite(tokens, kinds, limit)
+    elif vendor == 'postgresql':
+        rows = _search_postgres(tokens, kinds, limit)
+    else:
+        rows = _search_scan(tokens, kinds, limit)
+    return [(kind, int(pk), float(score)) for kind, pk, score in rows]
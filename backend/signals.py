@@ -0,0 +1,66 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalogue, mandates, search
+from .middleware import install_query_recorder
+from .models import (
+    Application, MandateHistory, Position, PositionStatistics, Role, Section,
+    StudyProgram, Team,
+)
+
+
+@receiver(post_delete, sender=Application)
+def uncount_deleted_application(sender, instance, **kwargs):
+    counted_as = getattr(instance, '_counted_as', None)
+    if counted_as is None:
+        return
+    deltas = {}
+    PositionStatistics.add_delta(deltas, *counted_as, -1)
+    # The position may be deleted in the same cascade, with its counters
+    # already gone; a recreated counter row would then break its delete
+    PositionStatistics.objects.apply_deltas(deltas, create=False)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Role)
+@receiver(post_save, sender=StudyProgram)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=StudyProgram)
+@receiver(post_delete, sender=Section)
+def invalidate_catalogue(sender, **kwargs):
+    catalogue.invalidate()
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=Role)
+def index_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not (
+            search.INDEXED_FIELDS & set(update_fields)):
+        return
+    search.index_objects([instance])
+
+
+@receiver(post_delete, sender=Application)
+@receiver(post_delete, sender=Role)
+def remove_from_search(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+@receiver(post_save, sender=MandateHistory)
+@receiver(post_save, sender=Position)
+@receiver(post_save, sender=Role)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=MandateHistory)
+@receiver(post_delete, sender=Position)
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=Team)
+def invalidate_office_holders(sender, **kwargs):
+    mandates.invalidate()
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
@@ -1,3 +1,1696 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+from importlib.util import find_spec
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    allocation, analytics, autosave, benchmarks, catalogue, exports, jobs,
+    lifecycle, mandates, membership, metrics, renditions, retention, search,
+)
+from .eligibility import eligible_pairs
+from .imports import import_applications
+from .membership import MembershipVerifier
+from .pagination import encode_cursor
+from .unicore import LocalUnicoreClient, sync_members
+from .models import (
+    Application, ApplicationTransition, Checkpoint, InvalidTransition, Job,
+    MandateHistory, Member, Position, PositionStatistics, Reference, Role,
+    Section, StudyProgram, Team,
+)
+
+
+handled_batches = []
+
+
+class BouncingEmailBackend(locmem.EmailBackend):
+    """
+    Fails to send to bounce@utn.se. Used by ApplicationTransitionTest.
+    """
+
+    def send_messages(self, messages):
+        if any('bounce@utn.se' in message.to for message in messages):
+            raise OSError('Mailbox unavailable')
+        return super().send_messages(messages)
+
+
+def record_batch(payloads):
+    """
+    Job handler used by JobQueueTest.
+    """
+    handled_batches.append(payloads)
+    if any(payload.get('fail') for payload in payloads):
+        raise RuntimeError('Handler failed')
+
+
+def make_team(**kwargs):
+    defaults = {'name_en': 'Team', 'name_sv': 'Lag'}
+    defaults.update(kwargs)
+    return Team.objects.create(**defaults)
+
+
+def make_role(team, **kwargs):
+    defaults = {
+        'team': team,
+        'role_type': 'involved',
+        'title_en': 'Role',
+        'title_sv': 'Roll',
+        'description_en': 'Description',
+        'description_sv': 'Beskrivning',
+        'contact_email': 'contact@utn.se',
+    }
+    defaults.update(kwargs)
+    return Role.objects.create(**defaults)
+
+
+def make_position(role, **kwargs):
+    today = date.today()
+    defaults = {
+        'role': role,
+        'recruitment_start': today - timedelta(days=7),
+        'recruitment_end': today + timedelta(days=7),
+        'term_from': timezone.now() + timedelta(days=30),
+        'term_end': today + timedelta(days=395),
+    }
+    defaults.update(kwargs)
+    return Position.objects.create(**defaults)
+
+
+def make_member(**kwargs):
+    defaults = {
+        'email': 'member@utn.se',
+        'phone_number': '0700000000',
+        'is_superuser': False,
+        'name': 'Member',
+        'ssn': '19900101-0000',
+        'status': 'member',
+    }
+    defaults.update(kwargs)
+    return Member.objects.create(**defaults)
+
+
+def make_application(position, member, **kwargs):
+    defaults = {
+        'position': position,
+        'member': member,
+        'status': 'submitted',
+        'cover_letter': 'Cover letter',
+        'qualifications': 'Qualifications',
+        'gdpr': True,
+    }
+    defaults.update(kwargs)
+    return Application.objects.create(**defaults)
+
+
+class OpenPositionsTest(TestCase):
+
+    def setUp(self):
+        self.team = make_team()
+        self.role = make_role(self.team)
+        self.url = reverse('backend:open_positions')
+
+    def test_only_open_positions_are_listed(self):
+        today = date.today()
+        open_position = make_position(self.role)
+        make_position(self.role, recruitment_end=today - timedelta(days=1))
+        make_position(self.role, recruitment_start=today + timedelta(days=1))
+        make_position(make_role(self.team, archived=True))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        ids = [p['id'] for p in response.json()['results']]
+        self.assertEqual(ids, [open_position.id])
+
+    def test_listing_is_a_single_query(self):
+        for _ in range(5):
+            make_position(make_role(make_team()))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_cursor_pagination(self):
+        today = date.today()
+        positions = [
+            make_position(self.role, recruitment_end=today + timedelta(days=i % 3))
+            for i in range(7)
+        ]
+        expected = [p.id for p in sorted(
+            positions, key=lambda p: (p.recruitment_end, p.id))]
+
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(self.url, params).json()
+            seen += [p['id'] for p in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', encode_cursor(['notadate', 1]),
+                       encode_cursor([{'a': 1}, 1]), encode_cursor([None, 1]),
+                       encode_cursor(['2024-01-01', 'x'])):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+
+class ImportApplicationsTest(TestCase):
+
+    def setUp(self):
+        self.position = make_position(make_role(make_team()))
+        self.member = make_member(ssn='19900101-1234')
+
+    def test_import_csv(self):
+        stream = io.StringIO(
+            'position,member,cover_letter,qualifications,gdpr,'
+            'reference1_name,reference1_email,reference2_name\n'
+            '%(p)d,%(m)d,Hello,Lots,yes,Ref One,one@utn.se,Ref Two\n'
+            '%(p)d,%(o)d,Hi,Some,no,,,\n' % {
+                'p': self.position.pk, 'm': self.member.pk,
+                'o': make_member(ssn='19900101-5678').pk}
+        )
+        result = import_applications(stream, 'csv', chunk_size=1)
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.references, 2)
+        first = Application.objects.get(cover_letter='Hello')
+        self.assertTrue(first.gdpr)
+        self.assertEqual(first.status, 'submitted')
+        self.assertEqual(
+            sorted(first.reference.values_list('name', flat=True)),
+            ['Ref One', 'Ref Two'])
+
+    def test_invalid_rows_do_not_abort_the_batch(self):
+        rows = [
+            {'position': self.position.pk, 'ssn': self.member.ssn,
+             'cover_letter': 'a', 'qualifications': 'b',
+             'references': [{'name': 'Ref', 'email': 'ref@utn.se'}]},
+            {'position': 0, 'ssn': self.member.ssn,
+             'cover_letter': 'a', 'qualifications': 'b'},
+            {'position': self.position.pk, 'ssn': 'nobody'},
+            {'position': self.position.pk, 'ssn': self.member.ssn,
+             'cover_letter': 'a', 'qualifications': 'b', 'status': 'bogus'},
+            {'position': self.position.pk, 'ssn': ['not', 'a', 'string'],
+             'cover_letter': 'a', 'qualifications': 'b'},
+            {'position': self.position.pk, 'ssn': self.member.ssn,
+             'cover_letter': 'a', 'qualifications': 'b', 'references': ['Ref']},
+            {'position': self.position.pk, 'ssn': self.member.ssn,
+             'cover_letter': 'a', 'qualifications': 'b',
+             'status': 'turned_down', 'rejection_date': 5},
+            [1, 2],
+            'x',
+        ]
+        stream = io.StringIO(
+            '\n'.join(json.dumps(row) for row in rows) + '\n{broken\n')
+
+        result = import_applications(stream, 'jsonl')
+
+        self.assertEqual(result.rows, 10)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            [line for line, _ in result.errors], [2, 3, 4, 5, 6, 7, 8, 9, 10])
+
+        # Importing the same application again is rejected
+        stream = io.StringIO(json.dumps(rows[0]) + '\n')
+        result = import_applications(stream, 'jsonl')
+        self.assertEqual(result.created, 0)
+        self.assertIn('already applied', result.errors[0][1])
+        self.assertEqual(Reference.objects.count(), 1)
+
+    def test_writes_are_batched(self):
+        members = [make_member() for _ in range(50)]
+        stream = io.StringIO(''.join(
+            json.dumps({
+                'position': self.position.pk, 'member': member.pk,
+                'cover_letter': 'a', 'qualifications': 'b',
+                'references': [{'name': 'Ref'}],
+            }) + '\n' for member in members
+        ))
+        # Position and member lookups, existing applications, savepoint
+        # pair, two inserts, the counter upsert and one insert per search
+        # index
+        with self.assertNumQueries(11):
+            result = import_applications(stream, 'jsonl', chunk_size=100)
+        self.assertEqual(result.created, 50)
+        self.assertEqual(Reference.objects.count(), 50)
+        self.assertEqual(self.position.statistics.submitted, 50)
+
+
+class PositionStatisticsTest(TestCase):
+
+    def setUp(self):
+        self.position = make_position(make_role(make_team()))
+        self.member = make_member()
+
+    def counts(self):
+        return PositionStatistics.objects.get(position=self.position).as_dict()
+
+    def test_counters_follow_status_changes(self):
+        first = make_application(self.position, self.member)
+        make_application(self.position, make_member(), status='draft')
+        self.assertEqual(self.counts()['submitted'], 1)
+        self.assertEqual(self.counts()['draft'], 1)
+
+        first = Application.objects.get(pk=first.pk)
+        first.status = 'approved'
+        first.save()
+        self.assertEqual(self.counts()['submitted'], 0)
+        self.assertEqual(self.counts()['approved'], 1)
+
+        # Status deferred, so the old value has to be looked up
+        deferred = Application.objects.only('id').get(pk=first.pk)
+        deferred.status = 'appointed'
+        deferred.save()
+        self.assertEqual(self.counts()['approved'], 0)
+        self.assertEqual(self.counts()['appointed'], 1)
+
+        Application.objects.filter(status='draft').delete()
+        self.assertEqual(self.counts()['draft'], 0)
+
+    def test_rebuild(self):
+        make_application(self.position, self.member)
+        make_application(self.position, make_member(), status='approved')
+        PositionStatistics.objects.update(submitted=42, approved=0)
+
+        call_command('rebuild_position_statistics', stdout=io.StringIO())
+
+        counts = self.counts()
+        self.assertEqual(counts['submitted'], 1)
+        self.assertEqual(counts['approved'], 1)
+
+
+class ApplicationTransitionTest(TestCase):
+
+    def setUp(self):
+        self.position = make_position(make_role(make_team()))
+        self.member = make_member()
+
+    def test_single_transition(self):
+        application = make_application(self.position, self.member, status='draft')
+        with self.assertRaises(InvalidTransition):
+            application.transition_to('appointed')
+
+        application.transition_to('submitted')
+        application.transition_to('disapproved')
+
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'disapproved')
+        self.assertEqual(application.rejection_date, date.today())
+        self.assertEqual(ApplicationTransition.objects.count(), 2)
+
+        # Approving again is no longer a rejection
+        application.transition_to('approved')
+        self.assertIsNone(application.rejection_date)
+        application.refresh_from_db()
+        self.assertIsNone(application.rejection_date)
+
+    def test_bulk_turn_down(self):
+        appointed = make_application(self.position, self.member, status='appointed')
+        draft = make_application(self.position, make_member(), status='draft')
+        for status in ['submitted'] * 20 + ['approved'] * 10:
+            make_application(self.position, make_member(), status=status)
+
+        # Select, update, counter upsert and update, audit and job inserts
+        with self.assertNumQueries(6):
+            transition = self.position.applications.exclude(
+                status='appointed').transition('turned_down')
+
+        self.assertEqual(transition.count, 30)
+        self.assertEqual(transition.from_counts, {'submitted': 20, 'approved': 10})
+        self.assertEqual(
+            self.position.applications.filter(status='turned_down').count(), 30)
+        self.assertFalse(self.position.applications.filter(
+            status='turned_down', rejection_date__isnull=True).exists())
+        self.assertEqual(Application.objects.get(pk=appointed.pk).status, 'appointed')
+        self.assertEqual(Application.objects.get(pk=draft.pk).status, 'draft')
+
+        counts = PositionStatistics.objects.get(position=self.position).as_dict()
+        self.assertEqual(counts['turned_down'], 30)
+        self.assertEqual(counts['submitted'], 0)
+        self.assertEqual(counts['approved'], 0)
+
+        self.assertEqual(
+            set(Job.objects.values_list('kind', flat=True)),
+            {'application_decision'})
+        self.assertEqual(
+            sorted(job.payload['application'] for job in Job.objects.all()),
+            sorted(transition.application_ids))
+        jobs.work(once=True)
+        self.assertEqual(len(mail.outbox), 30)
+
+    @override_settings(EMAIL_BACKEND='backend.tests.BouncingEmailBackend')
+    def test_failed_emails_are_retried_alone(self):
+        make_application(self.position, make_member(email='bounce@utn.se'))
+        make_application(self.position, make_member(email='ok@utn.se'))
+        self.position.applications.transition('turned_down')
+        with self.assertLogs('backend.jobs', 'ERROR'):
+            jobs.work(once=True)
+        self.assertEqual([m.to for m in mail.outbox], [['ok@utn.se']])
+        self.assertEqual(
+            dict(Job.objects.values_list('payload__application', 'status')),
+            {
+                Application.objects.get(member__email='ok@utn.se').pk: 'done',
+                Application.objects.get(member__email='bounce@utn.se').pk: 'queued',
+            })
+
+    def test_nothing_to_move(self):
+        make_application(self.position, self.member, status='appointed')
+        self.assertIsNone(Application.objects.all().transition('turned_down'))
+        self.assertFalse(ApplicationTransition.objects.exists())
+
+
+class CatalogueTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        catalogue._local.clear()
+        self.team = make_team(name_en='Board', name_sv='Styrelsen')
+        make_role(self.team, title_en='Chair', title_sv='Ordförande')
+        make_role(self.team, title_en='Old', title_sv='Gammal', archived=True)
+
+    def test_catalogue_per_language(self):
+        en = catalogue.get_catalogue('en')
+        sv = catalogue.get_catalogue('sv-se')
+
+        self.assertEqual(en['teams'][0]['name'], 'Board')
+        self.assertEqual(sv['teams'][0]['name'], 'Styrelsen')
+        self.assertEqual(
+            [role['title'] for role in sv['teams'][0]['roles']], ['Ordförande'])
+
+    def test_steady_state_reads_hit_no_database(self):
+        catalogue.get_catalogue('en')
+        with self.assertNumQueries(0):
+            catalogue.get_catalogue('en')
+        # Another process only shares the cache, not process memory
+        catalogue._local.clear()
+        with self.assertNumQueries(0):
+            catalogue.get_catalogue('en')
+
+    def test_saving_invalidates(self):
+        catalogue.get_catalogue('en')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.name_en = 'The Board'
+            self.team.save()
+        self.assertEqual(catalogue.get_catalogue('en')['teams'][0]['name'], 'The Board')
+
+    def test_invalidation_reaches_other_processes(self):
+        # Process memory would leave other workers on the old version
+        self.assertNotIsInstance(cache, LocMemCache)
+        version = catalogue.current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.save()
+        other_process = caches.create_connection('default')
+        self.assertNotEqual(other_process.get(catalogue.VERSION_KEY), version)
+
+    def test_view(self):
+        response = self.client.get(reverse('backend:catalogue'), {'lang': 'sv'})
+        self.assertEqual(response.json()['teams'][0]['name'], 'Styrelsen')
+
+
+class UnicoreSyncTest(TestCase):
+
+    def setUp(self):
+        for i in range(1, 6):
+            make_member(unicore_id=i, status='unknown')
+
+    def test_full_sync_updates_changed_statuses(self):
+        client = LocalUnicoreClient([
+            {'id': 1, 'status': 'member'},
+            {'id': 2, 'status': 'alumnus'},
+            {'id': 3, 'status': 'unknown'},
+            {'id': 4, 'status': 'bogus'},
+            {'id': 99, 'status': 'member'},
+        ], page_size=2)
+
+        result = sync_members(client=client, workers=2)
+
+        self.assertEqual(result.fetched, 5)
+        self.assertEqual(result.pages, 3)
+        self.assertEqual(result.updated, 2)
+        self.assertEqual(result.unknown, 1)
+        statuses = dict(Member.objects.values_list('unicore_id', 'status'))
+        self.assertEqual(statuses[1], 'member')
+        self.assertEqual(statuses[2], 'alumnus')
+        self.assertEqual(statuses[4], 'unknown')
+
+    def test_incremental_sync(self):
+        client = LocalUnicoreClient([
+            {'id': 1, 'status': 'member', 'modified': '2000-01-01T00:00:00'},
+        ])
+        sync_members(client=client)
+        self.assertEqual(Member.objects.get(unicore_id=1).status, 'member')
+
+        # The next run asks only for changes since the previous one
+        client.members.append(
+            {'id': 2, 'status': 'member', 'modified': '9999-01-01T00:00:00'})
+        result = sync_members(client=client)
+        self.assertIsNotNone(client.requests[-1][1])
+        self.assertEqual(result.fetched, 1)
+        self.assertEqual(Member.objects.get(unicore_id=2).status, 'member')
+
+
+class MembershipVerifierTest(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.client_ = LocalUnicoreClient([
+            {'id': 1, 'status': 'member'},
+            {'id': 2, 'status': 'nonmember', 'ssn': '19900101-2222'},
+        ])
+        self.verifier = MembershipVerifier(
+            client=self.client_, ttl=100, negative_ttl=10, max_entries=2,
+            clock=lambda: self.now)
+
+    def lookups(self):
+        return len([r for r in self.client_.requests if r[0] == 'lookup'])
+
+    def test_positive_and_negative_caching(self):
+        member = make_member(unicore_id=1, status='unknown')
+        nonmember = make_member(ssn='19900101-2222')
+
+        self.assertTrue(self.verifier.is_member(member))
+        self.assertTrue(self.verifier.is_member(member))
+        self.assertFalse(self.verifier.is_member(nonmember))
+        self.assertFalse(self.verifier.is_member(nonmember))
+        self.assertEqual(self.lookups(), 2)
+
+        # Negative answers expire sooner than positive ones
+        self.now = 50
+        self.verifier.is_member(member)
+        self.verifier.is_member(nonmember)
+        self.assertEqual(self.lookups(), 3)
+
+        stats = self.verifier.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['negative_hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+
+    def test_lru_eviction(self):
+        members = [make_member(unicore_id=i) for i in (1, 2, 3)]
+        for member in members:
+            self.verifier.status(member)
+        self.assertEqual(self.verifier.stats()['evictions'], 1)
+        self.verifier.status(members[0])
+        self.assertEqual(self.lookups(), 4)
+
+
+class ExportApplicationsTest(TestCase):
+
+    def setUp(self):
+        self.position = make_position(make_role(make_team(), title_en='Head of IT'))
+        for i in range(3):
+            application = make_application(
+                self.position, make_member(name='Member %d' % i),
+                cover_letter='Long letter, with "quotes"\nand lines')
+            Reference.objects.create(
+                application=application, name='Ref %d' % i, email='ref@utn.se')
+        self.url = reverse(
+            'backend:export_applications', args=[self.position.pk])
+
+    def test_staff_only(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv_is_streamed(self):
+        self.client.force_login(User.objects.create_user(
+            'staff', password='x', is_staff=True))
+        response = self.client.get(self.url)
+
+        self.assertTrue(response.streaming)
+        self.assertIn('head-of-it', response['Content-Disposition'])
+        # Applications with member and study program, then references
+        with self.assertNumQueries(2):
+            content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][2], 'Member 0')
+        self.assertEqual(rows[1][8], 'Long letter, with "quotes"\nand lines')
+        self.assertEqual(rows[1][11], 'Ref 0 ref@utn.se')
+
+    @override_settings(SERVER_MODE='asgi')
+    async def test_csv_is_streamed_under_asgi(self):
+        user = await sync_to_async(User.objects.create_user)(
+            'staff', password='x', is_staff=True)
+        await sync_to_async(self.async_client.force_login)(user)
+        response = await self.async_client.get(self.url)
+
+        self.assertTrue(response.is_async)
+        content = b''.join(
+            [chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(list(csv.reader(io.StringIO(content)))), 4)
+
+        # Lines are handed over as they are read, not all at the end
+        lines = exports.astream_csv(self.position, chunk_size=1)
+        self.assertTrue((await lines.__anext__()).startswith('Application,'))
+        self.assertTrue((await lines.__anext__()).startswith('%d,' % (
+            await Application.objects.order_by('id').afirst()).pk))
+        await lines.aclose()
+
+    def formula_application(self):
+        make_application(
+            self.position,
+            make_member(name='=HYPERLINK("http://x")', phone_number='+46701234567'),
+            cover_letter='+1 for me', qualifications='@SUM(A1)')
+
+    def test_csv_formulas_are_escaped(self):
+        self.formula_application()
+        content = ''.join(exports.stream_csv(self.position))
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[-1][2], '\'=HYPERLINK("http://x")')
+        self.assertEqual(rows[-1][4], '+46701234567')
+        self.assertEqual(rows[-1][8:10], ["'+1 for me", "'@SUM(A1)"])
+        self.assertEqual(rows[1][8], 'Long letter, with "quotes"\nand lines')
+
+    @unittest.skipUnless(find_spec('openpyxl'), 'XLSX export needs openpyxl')
+    def test_xlsx_is_not_escaped(self):
+        from openpyxl import load_workbook
+
+        self.formula_application()
+        spool = io.BytesIO()
+        exports.write_xlsx(self.position, spool)
+        spool.seek(0)
+        row = list(load_workbook(spool).active.iter_rows())[-1]
+        self.assertEqual(row[2].value, '=HYPERLINK("http://x")')
+        self.assertEqual(row[2].data_type, 's')
+        self.assertEqual(row[4].value, '+46701234567')
+        self.assertEqual(row[8].value, '+1 for me')
+
+
+class ReviewerDashboardTest(TestCase):
+
+    def setUp(self):
+        team = make_team()
+        self.position = make_position(make_role(team, title_en='Chair'))
+        other_team = make_position(make_role(make_team()))
+        for i, status in enumerate(['submitted'] * 3 + ['approved'] * 2):
+            make_application(self.position, make_member(name='Member %d' % i),
+                             status=status, cover_letter='Very long letter')
+        make_application(other_team, make_member())
+        self.url = reverse('backend:team_applications', args=[team.pk])
+        self.client.force_login(User.objects.create_user(
+            'staff', password='x', is_staff=True))
+
+    def test_keyset_pages_without_text(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            # Session, user, team, then one query for the page
+            with self.assertNumQueries(4):
+                data = self.client.get(self.url, params).json()
+            seen.extend(data['results'])
+            cursor = data['next']
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual([row['status'] for row in seen],
+                         ['approved'] * 2 + ['submitted'] * 3)
+        self.assertEqual(seen[0]['position']['title_en'], 'Chair')
+        self.assertNotIn('cover_letter', seen[0])
+
+        data = self.client.get(self.url, {'status': 'approved'}).json()
+        self.assertEqual(len(data['results']), 2)
+
+    def test_detail_is_loaded_on_demand(self):
+        application = Application.objects.filter(position=self.position).first()
+        Reference.objects.create(application=application, name='Ref')
+        url = reverse('backend:application_detail', args=[application.pk])
+        data = self.client.get(url).json()
+        self.assertEqual(data['cover_letter'], 'Very long letter')
+        self.assertEqual(data['references'][0]['name'], 'Ref')
+
+    def test_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class TeamLogoTest(TestCase):
+
+    def setUp(self):
+        from PIL import Image
+
+        # Digests of originals are cached by their storage name
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        os.makedirs(os.path.join(self.media, 'logos'))
+        Image.new('RGBA', (1200, 800), (200, 30, 30, 128)).save(
+            os.path.join(self.media, 'logos', 'team.png'))
+        self.team = make_team(logo='logos/team.png')
+        cache.clear()
+
+    def test_rendition_rendered_once_and_cached(self):
+        from PIL import Image
+
+        url = reverse('backend:team_logo', args=[self.team.pk, 'medium'])
+        response = self.client.get(url, HTTP_ACCEPT='image/webp,*/*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertIn('Accept', response['Vary'])
+        image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(image.size, (256, 171))
+
+        response = self.client.get(
+            url, HTTP_ACCEPT='image/webp', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {'format': 'jpeg'})
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        b''.join(response.streaming_content)
+        rendered = [
+            name for _, _, files in os.walk(os.path.join(self.media, 'renditions'))
+            for name in files
+        ]
+        self.assertEqual(len(rendered), 2)
+
+        self.assertEqual(self.client.get(reverse(
+            'backend:team_logo', args=[self.team.pk, 'huge'])).status_code, 404)
+
+    def test_prewarm(self):
+        call_command('prewarm_renditions', workers=2, stdout=io.StringIO())
+        digest = cache.get('rendition_digest:logos/team.png')
+        for size in renditions.SIZES:
+            for file_format in renditions.FORMATS:
+                self.assertTrue(os.path.exists(
+                    renditions.rendition_path(digest, size, file_format)))
+
+
+class SearchTest(TestCase):
+
+    def setUp(self):
+        self.team = make_team()
+        self.member = make_member()
+
+    def test_swedish_stemmer(self):
+        self.assertEqual(search.stem_swedish('flickorna'), 'flick')
+        self.assertEqual(search.stem_swedish('klokaste'), 'klok')
+        self.assertEqual(search.stem_swedish('jaktkarlarne'), 'jaktkarl')
+
+    def test_search_is_stemmed_and_ranked(self):
+        role = make_role(
+            self.team, title_en='Treasurer', description_en='Managing the budgets',
+            title_sv='Kassör', description_sv='Ansvarar för budgetarna')
+        position = make_position(role)
+        strong = make_application(
+            position, self.member, cover_letter='I love budgets and budgeting',
+            qualifications='Budget planning')
+        weak = make_application(
+            position, make_member(), cover_letter='I once saw a budget',
+            qualifications='Lots of things')
+        make_application(position, make_member(), cover_letter='Nothing relevant')
+
+        hits = search.search('budget')
+        self.assertEqual(
+            [(kind, pk) for kind, pk, _ in hits],
+            [('application', strong.pk), ('role', role.pk), ('application', weak.pk)],
+        )
+        # Swedish plural form matches through the Swedish index
+        self.assertEqual(
+            search.search('budgetar', kinds=['role'])[0][:2], ('role', role.pk))
+
+    def test_index_follows_saves_and_deletes(self):
+        position = make_position(make_role(self.team))
+        application = make_application(position, self.member, cover_letter='Sailing')
+        self.assertEqual(len(search.search('sailing')), 1)
+
+        application.cover_letter = 'Climbing'
+        application.save()
+        self.assertEqual(search.search('sailing'), [])
+        self.assertEqual(len(search.search('climbing')), 1)
+
+        application.delete()
+        self.assertEqual(search.search('climbing'), [])
+
+    def test_rebuild_and_view(self):
+        position = make_position(make_role(self.team))
+        make_application(position, self.member, cover_letter='Orienteering')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM backend_search_en')
+            cursor.execute('DELETE FROM backend_search_sv')
+        call_command('rebuild_search_index', stdout=io.StringIO())
+
+        self.client.force_login(User.objects.create_user(
+            'staff', password='x', is_staff=True))
+        response = self.client.get(reverse('backend:search'), {'q': 'orienteering'})
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['member'], 'Member')
+
+
+class MandateHistoryTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.member = make_member(name='Chair Person')
+        team = make_team()
+        today = date.today()
+        self.old = make_position(
+            make_role(team, title_en='Secretary'),
+            term_from=timezone.now() - timedelta(days=800),
+            term_end=today - timedelta(days=400))
+        self.current = make_position(
+            make_role(team, title_en='Chair'),
+            term_from=timezone.now() - timedelta(days=10),
+            term_end=today + timedelta(days=300))
+
+    def appoint(self, position):
+        make_application(position, self.member, status='approved')
+        position.applications.transition('appointed')
+
+    def test_appointment_creates_mandate(self):
+        self.appoint(self.current)
+        mandate = MandateHistory.objects.get()
+        self.assertEqual(mandate.member, self.member)
+        self.assertEqual(mandate.term_end, self.current.term_end)
+
+    def test_timeline_is_one_query(self):
+        self.appoint(self.old)
+        self.appoint(self.current)
+        with self.assertNumQueries(1):
+            timeline = mandates.member_timeline(self.member.id)
+        self.assertEqual(
+            [m['role']['title_en'] for m in timeline], ['Chair', 'Secretary'])
+
+        response = self.client.get(
+            reverse('backend:member_mandates', args=[self.member.id]))
+        self.assertEqual(len(response.json()['mandates']), 2)
+
+    def test_members_without_mandates_are_not_found(self):
+        make_application(self.current, self.member)
+        response = self.client.get(
+            reverse('backend:member_mandates', args=[self.member.id]))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn(b'Chair Person', response.content)
+
+    def test_current_office_holders_are_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appoint(self.old)
+            self.appoint(self.current)
+        holders = mandates.current_office_holders()
+        self.assertEqual([h['role']['title_en'] for h in holders], ['Chair'])
+        with self.assertNumQueries(0):
+            mandates.current_office_holders()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MandateHistory.objects.filter(position=self.current).delete()
+        self.assertEqual(mandates.current_office_holders(), [])
+
+    def test_invalidation_reaches_other_processes(self):
+        other_process = caches.create_connection('default')
+        with mock.patch.object(mandates, 'cache', other_process):
+            self.assertEqual(mandates.current_office_holders(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appoint(self.current)
+        with mock.patch.object(mandates, 'cache', other_process):
+            self.assertEqual(len(mandates.current_office_holders()), 1)
+
+
+class BenchmarkTest(TestCase):
+
+    def test_seed_run_and_compare(self):
+        counts = benchmarks.seed(applications=100)
+        self.assertEqual(counts['applications'], 100)
+        self.assertEqual(Application.objects.count(), 100)
+
+        report = benchmarks.run(iterations=2)
+        self.assertEqual(set(report), set(benchmarks.FLOWS))
+        self.assertEqual(report['list_positions']['queries'], 1)
+
+        baseline = {name: dict(metrics) for name, metrics in report.items()}
+        self.assertEqual(benchmarks.compare(report, baseline), [])
+        baseline['export']['queries'] -= 1
+        self.assertEqual(len(benchmarks.compare(report, baseline)), 1)
+
+
+class AsyncApplicationViewsTest(TestCase):
+
+    def setUp(self):
+        self.position = make_position(make_role(make_team(), title_en='Treasurer'))
+        self.member = make_member(unicore_id=1, email='applicant@utn.se')
+        self.url = reverse('backend:submit_application')
+        self.verifier = membership._verifier
+        membership._verifier = MembershipVerifier(client=LocalUnicoreClient([
+            {'id': 1, 'status': 'member'},
+            {'id': 2, 'status': 'nonmember'},
+        ]))
+
+    def tearDown(self):
+        membership._verifier = self.verifier
+
+    def sign_in(self, member):
+        session = self.client.session
+        session['member_id'] = member.id
+        session.save()
+
+    def submit(self, **data):
+        body = {
+            'position': self.position.id,
+            'cover_letter': 'Hire me',
+            'qualifications': 'Spreadsheets',
+            'gdpr': True,
+        }
+        body.update(data)
+        return self.client.post(
+            self.url, json.dumps(body), content_type='application/json')
+
+    def test_submit_application(self):
+        self.sign_in(self.member)
+        response = self.submit(references=[{'name': 'Ref', 'email': 'ref@utn.se'}])
+        self.assertEqual(response.status_code, 201)
+        application = Application.objects.get(pk=response.json()['id'])
+        self.assertEqual(application.status, 'submitted')
+        self.assertEqual(application.reference.count(), 1)
+        self.assertEqual(
+            PositionStatistics.objects.get(position=self.position).submitted, 1)
+        # Emails are left to the job queue
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Job.objects.get().kind, 'application_received')
+
+        jobs.work(once=True)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['applicant@utn.se', 'contact@utn.se', 'ref@utn.se'])
+        self.assertIn('Treasurer', mail.outbox[0].subject)
+
+        # A member applies once
+        self.assertEqual(self.submit().status_code, 403)
+
+    def test_submit_is_refused(self):
+        self.assertEqual(self.submit().status_code, 401)
+        self.sign_in(self.member)
+        self.assertEqual(self.submit(gdpr=False).status_code, 400)
+        self.assertEqual(self.submit(cover_letter='').status_code, 400)
+        closed = make_position(self.position.role,
+                               recruitment_end=date.today() - timedelta(days=1))
+        self.assertEqual(self.submit(position=closed.id).status_code, 404)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+        self.sign_in(make_member(unicore_id=2, ssn='19900101-2222'))
+        self.assertEqual(self.submit().status_code, 403)
+        self.assertFalse(Application.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(AUTOSAVE={'DEBOUNCE': 60})
+    def test_submit_draft(self):
+        cache.clear()
+        self.sign_in(self.member)
+        pk = self.submit(status='draft', gdpr=False).json()['id']
+        # A second application to the position is refused, the draft is
+        # submitted instead
+        self.assertEqual(self.submit().status_code, 403)
+        self.client.patch(
+            reverse('backend:draft_application', args=[pk]),
+            json.dumps({'version': 0, 'fields': {'cover_letter': 'Final'}}),
+            content_type='application/json')
+        url = reverse('backend:submit_draft', args=[pk])
+
+        def submit_draft(**data):
+            return self.client.post(
+                url, json.dumps(data), content_type='application/json')
+
+        self.assertEqual(submit_draft().status_code, 400)
+        response = submit_draft(gdpr=True)
+        self.assertEqual(response.status_code, 200)
+        application = Application.objects.get(pk=pk)
+        self.assertEqual(application.status, 'submitted')
+        self.assertEqual(application.cover_letter, 'Final')
+        self.assertTrue(Job.objects.filter(
+            kind='application_received',
+            key='application_received:%d' % pk).exists())
+        self.assertEqual(
+            PositionStatistics.objects.get(position=self.position).submitted, 1)
+
+        self.assertEqual(submit_draft().status_code, 409)
+        self.sign_in(make_member())
+        self.assertEqual(submit_draft().status_code, 404)
+
+    def test_my_applications(self):
+        url = reverse('backend:my_applications')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        make_application(self.position, self.member, status='draft')
+        make_application(self.position, make_member(ssn='19900101-3333'))
+        self.sign_in(self.member)
+        results = self.client.get(url).json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['status'], 'draft')
+        self.assertEqual(results[0]['title_en'], 'Treasurer')
+
+
+@override_settings(JOB_HANDLERS={'record': 'backend.tests.record_batch'})
+class JobQueueTest(TestCase):
+
+    def setUp(self):
+        handled_batches.clear()
+
+    def test_batches_and_idempotency_keys(self):
+        Job.objects.enqueue_many('record', [{'n': i} for i in range(5)],
+                                 keys=['k%d' % i for i in range(5)])
+        Job.objects.enqueue('record', {'n': 0}, key='k0')
+        self.assertEqual(Job.objects.count(), 5)
+
+        self.assertEqual(jobs.work(batch_size=3, once=True), 5)
+        self.assertEqual([len(batch) for batch in handled_batches], [3, 2])
+        self.assertEqual(Job.objects.filter(status='done').count(), 5)
+
+    def test_retry_with_backoff_then_give_up(self):
+        Job.objects.enqueue('record', {'fail': True}, max_attempts=2)
+        with self.assertLogs('backend.jobs', 'ERROR'):
+            jobs.work(once=True)
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Handler failed', job.last_error)
+
+        # Not due until the backoff has passed
+        self.assertEqual(jobs.work(once=True), 0)
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('backend.jobs', 'ERROR'):
+            jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_claims_are_exclusive_and_stale_locks_expire(self):
+        Job.objects.enqueue_many('record', [{}, {}])
+        claimed = jobs.claim('worker-1', 10)
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(jobs.claim('worker-2', 10), [])
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        reclaimed = jobs.claim('worker-2', 10)
+        self.assertEqual(len(reclaimed), 2)
+        self.assertEqual({job.locked_by for job in reclaimed}, {'worker-2'})
+        self.assertEqual({job.attempts for job in reclaimed}, {2})
+
+
+class LifecycleTest(TestCase):
+
+    def setUp(self):
+        self.today = date.today()
+        self.role = make_role(make_team())
+        self.member = make_member()
+
+    def test_drafts_locked_when_recruitment_closes(self):
+        position = make_position(self.role, recruitment_end=self.today)
+        draft = make_application(position, self.member, status='draft')
+
+        result = lifecycle.run(today=self.today)
+        self.assertEqual(result.locked_drafts, 0)
+
+        result = lifecycle.run(today=self.today + timedelta(days=1))
+        self.assertEqual(result.since, self.today)
+        self.assertEqual(result.closed_positions, 1)
+        self.assertEqual(result.locked_drafts, 1)
+        draft.refresh_from_db()
+        self.assertTrue(draft.locked)
+        self.assertFalse(draft.can_transition_to('submitted'))
+        self.assertIsNone(
+            Application.objects.filter(pk=draft.pk).transition('submitted'))
+
+        # The next run only looks at what closed since
+        result = lifecycle.run(today=self.today + timedelta(days=2))
+        self.assertEqual(result.closed_positions, 0)
+
+    def test_roles_archived_when_last_term_ends(self):
+        other = make_role(self.role.team)
+        make_position(self.role, term_end=self.today - timedelta(days=1),
+                      recruitment_end=self.today - timedelta(days=100))
+        make_position(other, term_end=self.today - timedelta(days=1),
+                      recruitment_end=self.today - timedelta(days=100))
+        make_position(other)
+
+        result = lifecycle.run(today=self.today)
+        self.assertEqual(result.ended_positions, 2)
+        self.assertEqual(result.archived_roles, 1)
+        self.assertTrue(Role.objects.get(pk=self.role.pk).archived)
+        self.assertFalse(Role.objects.get(pk=other.pk).archived)
+
+    @override_settings(RETENTION={'REJECTED_DAYS': 30})
+    def test_old_rejections_purged(self):
+        position = make_position(self.role)
+        old = make_application(position, self.member, status='turned_down',
+                               rejection_date=self.today - timedelta(days=31))
+        recent = make_application(position, self.member, status='turned_down',
+                                  rejection_date=self.today - timedelta(days=5))
+
+        result = lifecycle.run(today=self.today)
+        self.assertEqual(result.purged_applications, 1)
+        self.assertFalse(Application.objects.filter(pk=old.pk).exists())
+        self.assertTrue(Application.objects.filter(pk=recent.pk).exists())
+        self.assertEqual(
+            PositionStatistics.objects.get(position=position).turned_down, 1)
+
+
+@override_settings(RETENTION={
+    'REJECTED_DAYS': 30, 'APPLICATION_DAYS': 60, 'APPOINTED_DAYS': 90})
+class RetentionTest(TestCase):
+
+    def setUp(self):
+        self.today = date.today()
+        self.member = make_member()
+        self.role = make_role(make_team())
+
+    def test_batched_purge_with_checkpoints(self):
+        position = make_position(self.role)
+        old = date.today() - timedelta(days=31)
+        for i in range(5):
+            application = make_application(
+                position, self.member, status='turned_down', rejection_date=old)
+            Reference.objects.create(application=application, name='Ref')
+        kept = make_application(position, self.member)
+
+        result = retention.run(batch_size=2, max_batches=2)
+        self.assertFalse(result.finished)
+        self.assertEqual(result.processed['rejected'], 4)
+        self.assertIn('rejected', Checkpoint.load(retention.CHECKPOINT_NAME))
+
+        result = retention.run(batch_size=2)
+        self.assertTrue(result.finished)
+        self.assertEqual(result.processed['rejected'], 1)
+        self.assertEqual(Checkpoint.load(retention.CHECKPOINT_NAME), {})
+        self.assertEqual(list(Application.objects.all()), [kept])
+        self.assertFalse(Reference.objects.exists())
+        self.assertEqual(
+            PositionStatistics.objects.get(position=position).as_dict(),
+            {'draft': 0, 'submitted': 1, 'approved': 0, 'disapproved': 0,
+             'appointed': 0, 'turned_down': 0})
+
+    def test_undecided_deleted_and_appointed_anonymized(self):
+        old = make_position(
+            self.role,
+            recruitment_start=self.today - timedelta(days=500),
+            recruitment_end=self.today - timedelta(days=400),
+            term_end=self.today - timedelta(days=100))
+        undecided = make_application(old, make_member(), status='submitted')
+        appointed = make_application(old, self.member, status='appointed')
+        Reference.objects.create(application=appointed, name='Ref')
+
+        result = retention.run()
+        self.assertEqual(result.processed['undecided'], 1)
+        self.assertEqual(result.processed['appointed'], 1)
+        self.assertFalse(Application.objects.filter(pk=undecided.pk).exists())
+        appointed.refresh_from_db()
+        self.assertEqual(appointed.cover_letter, '')
+        self.assertFalse(appointed.reference.exists())
+        self.assertEqual(search.search('cover letter'), [])
+
+        # Already anonymized applications are not processed again
+        self.assertEqual(retention.run().processed['appointed'], 0)
+
+    def test_erase_member(self):
+        position = make_position(self.role)
+        other = make_member(ssn='19900101-1111')
+        application = make_application(position, self.member)
+        Reference.objects.create(application=application, name='Ref')
+        make_application(position, other)
+        MandateHistory.objects.create(
+            member=self.member, position=position,
+            term_from=self.today, term_end=self.today)
+
+        # A fixed number of queries however many applications there are
+        with self.assertNumQueries(15):
+            deleted = retention.erase_member(self.member.id)
+        self.assertEqual(deleted['applications'], 1)
+        self.assertEqual(deleted['mandates'], 1)
+        self.assertFalse(Member.objects.filter(pk=self.member.pk).exists())
+        self.assertEqual(Application.objects.get().member, other)
+        self.assertFalse(Reference.objects.exists())
+        self.assertFalse(MandateHistory.objects.exists())
+
+    def test_reapproved_applications_are_not_purged(self):
+        # Left over on an application disapproved and later appointed
+        application = make_application(
+            make_position(self.role), self.member, status='appointed',
+            rejection_date=self.today - timedelta(days=31))
+        result = retention.run(steps=['rejected'])
+        self.assertEqual(result.processed['rejected'], 0)
+        self.assertTrue(Application.objects.filter(pk=application.pk).exists())
+
+
+class EligibilityTest(TestCase):
+
+    def setUp(self):
+        section = Section.objects.create(
+            abbreviation='Q', section_en='Q', section_sv='Q')
+        other_section = Section.objects.create(
+            abbreviation='K', section_en='K', section_sv='K')
+        self.program = StudyProgram.objects.create(
+            section=section, name_en='Physics', name_sv='Fysik')
+        other_program = StudyProgram.objects.create(
+            section=other_section, name_en='Chemistry', name_sv='Kemi')
+        role = make_role(make_team())
+        self.anyone = make_position(role)
+        self.open_to_all = make_position(role, members_only=False)
+        self.q_only = make_position(role)
+        self.q_only.eligible_sections.add(section)
+
+        self.physicist = make_member(study_program=self.program)
+        self.chemist = make_member(study_program=other_program)
+        self.nonmember = make_member(study_program=self.program, status='nonmember')
+
+    def test_active_applications_are_unique(self):
+        make_application(self.anyone, self.physicist, status='turned_down')
+        make_application(self.anyone, self.physicist)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_application(self.anyone, self.physicist, status='draft')
+
+    def test_disapproved_application_can_be_approved_again(self):
+        application = make_application(self.anyone, self.physicist)
+        Application.objects.filter(pk=application.pk).transition('disapproved')
+
+        # Still in the running, so the member cannot apply again
+        self.assertNotIn(
+            self.anyone.pk,
+            Position.objects.eligible_for(self.physicist.pk).values_list('pk', flat=True))
+        self.assertNotIn(
+            (self.physicist.pk, self.anyone.pk),
+            eligible_pairs([self.physicist.pk], [self.anyone.pk]))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_application(self.anyone, self.physicist)
+
+        transition = Application.objects.filter(pk=application.pk).transition('approved')
+        self.assertEqual(transition.count, 1)
+        self.assertEqual(Application.objects.get(pk=application.pk).status, 'approved')
+
+    def test_batch_and_per_member_checks_agree(self):
+        make_application(self.anyone, self.physicist)
+        members = [self.physicist, self.chemist, self.nonmember]
+        positions = [self.anyone, self.open_to_all, self.q_only]
+
+        with self.assertNumQueries(1):
+            pairs = eligible_pairs([m.pk for m in members], [p.pk for p in positions])
+        self.assertEqual(pairs, {
+            (self.physicist.pk, self.open_to_all.pk),
+            (self.physicist.pk, self.q_only.pk),
+            (self.chemist.pk, self.anyone.pk),
+            (self.chemist.pk, self.open_to_all.pk),
+            (self.nonmember.pk, self.open_to_all.pk),
+        })
+        for member in members:
+            self.assertEqual(
+                set(Position.objects.eligible_for(member.pk).values_list('pk', flat=True)),
+                {position for m, position in pairs if m == member.pk})
+
+    def test_eligible_positions_view(self):
+        session = self.client.session
+        session['member_id'] = self.chemist.pk
+        session.save()
+        response = self.client.get(reverse('backend:eligible_positions'))
+        self.assertEqual(
+            [row['id'] for row in response.json()['results']],
+            [self.anyone.pk, self.open_to_all.pk])
+
+
+class AdminTest(TestCase):
+
+    def setUp(self):
+        self.position = make_position(make_role(make_team()))
+        self.client.force_login(User.objects.create_superuser(
+            'admin', password='x'))
+        self.url = reverse('admin:backend_application_changelist')
+
+    def test_changelist_queries_do_not_grow(self):
+        make_application(self.position, make_member())
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        for _ in range(20):
+            make_application(self.position, make_member())
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(len(few), len(many))
+
+    def test_change_form_uses_autocomplete(self):
+        application = make_application(self.position, make_member())
+        response = self.client.get(reverse(
+            'admin:backend_application_change', args=[application.pk]))
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_bulk_action_is_a_transition(self):
+        ids = [make_application(self.position, make_member()).pk for _ in range(3)]
+        response = self.client.post(self.url, {
+            'action': 'turn_down', '_selected_action': ids})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            Application.objects.filter(status='turned_down').count(), 3)
+        self.assertEqual(ApplicationTransition.objects.get().count, 3)
+
+    def test_status_is_not_edited_in_the_change_form(self):
+        application = make_application(self.position, make_member())
+        response = self.client.get(reverse(
+            'admin:backend_application_change', args=[application.pk]))
+        fields = response.context['adminform'].form.fields
+        for field in ('status', 'locked', 'rejection_date'):
+            self.assertNotIn(field, fields)
+        self.assertIn('cover_letter', fields)
+
+        response = self.client.get(reverse('admin:backend_application_add'))
+        self.assertIn('status', response.context['adminform'].form.fields)
+
+
+class ConditionalPageTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.team = make_team()
+        self.role = make_role(self.team)
+        self.position = make_position(self.role)
+        self.url = reverse('backend:position_page', args=[self.position.pk])
+
+    def test_revalidation_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['role']['id'], self.role.pk)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        since = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+    def test_fragments_are_cached_per_version(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+
+        self.role.title_en = 'Renamed'
+        self.role.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual(changed.json()['role']['title'], 'Renamed')
+
+    def test_role_and_team_pages(self):
+        url = reverse('backend:role_page', args=[self.role.pk])
+        response = self.client.get(url)
+        self.assertEqual(
+            [p['id'] for p in response.json()['open_positions']],
+            [self.position.pk])
+        other = make_position(self.role)
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()['open_positions']), 2)
+        other.delete()
+        self.assertNotEqual(
+            self.client.get(url)['ETag'], changed['ETag'])
+
+        # The open positions change with the date alone
+        response = self.client.get(url)
+        tomorrow = date.today() + timedelta(days=1)
+        with mock.patch('backend.pages.date') as pages_date:
+            pages_date.today.return_value = tomorrow
+            later = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(later.status_code, 200)
+
+        url = reverse('backend:team_page', args=[self.team.pk])
+        response = self.client.get(url, {'lang': 'sv'})
+        self.assertEqual(
+            [r['id'] for r in response.json()['roles']], [self.role.pk])
+        self.assertTrue(response['ETag'].endswith('-sv"'))
+        self.assertEqual(self.client.get(
+            reverse('backend:team_page', args=[0])).status_code, 404)
+
+
+@override_settings(AUTOSAVE={'DEBOUNCE': 60})
+class AutosaveTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.member = make_member()
+        self.application = make_application(
+            make_position(make_role(make_team())), self.member,
+            status='draft', cover_letter='Dear', qualifications='Long text')
+        self.url = reverse('backend:draft_application', args=[self.application.pk])
+        session = self.client.session
+        session['member_id'] = self.member.id
+        session.save()
+
+    def patch(self, version, **fields):
+        return self.client.patch(
+            self.url, json.dumps({'version': version, 'fields': fields}),
+            content_type='application/json')
+
+    def test_patches_are_coalesced(self):
+        self.assertEqual(self.client.get(self.url).json()['version'], 0)
+        first = self.patch(0, cover_letter='Dear committee')
+        self.assertEqual(first.json(), {'version': 1, 'saved': False})
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(
+                self.patch(1, cover_letter='Dear board').status_code, 200)
+        # Coalesced saves write nothing to the database
+        self.assertEqual([
+            q['sql'] for q in captured
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ], [])
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.cover_letter, 'Dear')
+
+        draft = self.client.get(self.url).json()
+        self.assertEqual(draft['version'], 2)
+        self.assertEqual(draft['cover_letter'], 'Dear board')
+        self.assertFalse(Job.objects.exists())
+
+        # Submitting writes what is pending, even from another process
+        with mock.patch.object(
+                autosave, 'cache', caches.create_connection('default')):
+            response = self.client.post(
+                reverse('backend:submit_draft', args=[self.application.pk]),
+                json.dumps({'gdpr': True}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'submitted')
+        self.assertEqual(self.application.cover_letter, 'Dear board')
+        self.assertEqual(self.application.qualifications, 'Long text')
+        self.assertEqual(self.application.version, 2)
+
+    def test_fewer_writes_than_saving_every_time(self):
+        def writes(debounce):
+            cache.clear()
+            Application.objects.filter(pk=self.application.pk).update(version=0)
+            with override_settings(AUTOSAVE={'DEBOUNCE': debounce}), \
+                    CaptureQueriesContext(connection) as captured:
+                # A browser saving every 5 seconds for a minute
+                for i in range(12):
+                    autosave.save_patch(
+                        self.application.pk, self.member.pk, i,
+                        {'cover_letter': 'x' * i}, now=1000 + 5 * i)
+            return len([
+                q for q in captured
+                if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            ])
+
+        self.assertEqual(writes(0), 12)
+        # Only the save closing each 15 second window writes
+        self.assertEqual(writes(15), 3)
+        self.assertEqual(
+            autosave.get_draft(self.application.pk, self.member.pk)['version'], 12)
+
+    def test_stale_tab_is_refused(self):
+        self.patch(0, cover_letter='From tab one')
+        response = self.patch(0, cover_letter='From tab two')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 1)
+        self.assertEqual(self.patch(1, qualifications='x', status='submitted')
+                         .status_code, 400)
+
+    @override_settings(AUTOSAVE={'DEBOUNCE': 0})
+    def test_writes_only_changed_fields(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.patch(0, cover_letter='Dear committee')
+        self.assertEqual(response.json(), {'version': 1, 'saved': True})
+        update = [q['sql'] for q in captured if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(update), 1)
+        self.assertIn('"cover_letter"', update[0])
+        self.assertNotIn('"qualifications"', update[0])
+        self.assertEqual(
+            search.search('committee')[0][:2], ('application', self.application.pk))
+
+        Application.objects.filter(pk=self.application.pk).update(locked=True)
+        self.assertEqual(self.patch(1, cover_letter='Late').status_code, 409)
+        other = make_member()
+        self.assertRaises(autosave.DraftNotFound, autosave.save_patch,
+                          self.application.pk, other.pk, 1, {'cover_letter': 'x'})
+
+
+class AllocationTest(TestCase):
+
+    def setUp(self):
+        role = make_role(make_team())
+        self.board = make_position(role, appointed=2)
+        self.auditor = make_position(role, appointed=1)
+        self.positions = Position.objects.filter(
+            pk__in=[self.board.pk, self.auditor.pk])
+
+    def approve(self, position, member, rank):
+        return make_application(position, member, status='approved', rank=rank)
+
+    def test_conflicts_and_seats(self):
+        alice, bob, carol, dave = (make_member() for _ in range(4))
+        # Alice is ranked first for both, Bob only wants the auditor post
+        alice_board = self.approve(self.board, alice, 1)
+        alice_auditor = self.approve(self.auditor, alice, 1)
+        bob_auditor = self.approve(self.auditor, bob, 2)
+        carol_board = self.approve(self.board, carol, 2)
+        dave_board = self.approve(self.board, dave, 3)
+
+        dry = allocation.allocate(self.positions, dry_run=True)
+        self.assertEqual(dry.appointed, sorted(
+            [alice_board.pk, carol_board.pk, bob_auditor.pk]))
+        self.assertFalse(Application.objects.filter(status='appointed').exists())
+
+        result = allocation.allocate(self.positions)
+        self.assertEqual(result.turned_down, sorted(
+            [alice_auditor.pk, dave_board.pk]))
+        self.assertEqual(result.unfilled, {})
+        self.assertEqual(
+            set(Application.objects.filter(status='appointed')
+                .values_list('pk', flat=True)),
+            set(dry.appointed))
+        self.assertEqual(MandateHistory.objects.count(), 3)
+        self.assertEqual(ApplicationTransition.objects.count(), 2)
+
+        # Deciding the round again changes nothing
+        again = allocation.allocate(self.positions)
+        self.assertEqual((again.appointed, again.turned_down), ([], []))
+
+    def test_member_preferences_and_existing_appointments(self):
+        alice, bob = make_member(), make_member()
+        make_application(self.board, make_member(), status='appointed')
+        alice_board = self.approve(self.board, alice, 1)
+        alice_auditor = self.approve(self.auditor, alice, 2)
+        bob_board = self.approve(self.board, bob, 2)
+        bob_auditor = self.approve(self.auditor, bob, 1)
+
+        # One board seat is taken, each gets the post they are ranked best for
+        result = allocation.allocate(self.positions, dry_run=True)
+        self.assertEqual(result.appointed, sorted(
+            [alice_board.pk, bob_auditor.pk]))
+
+        result = allocation.allocate(
+            self.positions, dry_run=True,
+            preferences={alice.pk: [self.auditor.pk], bob.pk: [self.board.pk]})
+        self.assertEqual(result.appointed, sorted(
+            [alice_auditor.pk, bob_board.pk]))
+
+    def test_large_round_is_fast(self):
+        candidates = {}
+        pk = 0
+        for member_id in range(3000):
+            for choice in range(3):
+                pk += 1
+                position_id = (member_id * 7 + choice * 31) % 300
+                candidates[member_id, position_id] = (pk % 50 + 1, pk)
+        seats = {position_id: 3 for position_id in range(300)}
+        started = time.monotonic()
+        matched = allocation.match(candidates, seats)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(len(matched), 900)
+        self.assertEqual(len({member_id for member_id, _ in matched}), 900)
+
+    def test_command(self):
+        self.approve(self.board, make_member(), 1)
+        out = io.StringIO()
+        call_command('allocate_round', str(self.board.pk), stdout=out)
+        self.assertIn('Appointed 1, turned down 0, 1 seats unfilled',
+                      out.getvalue())
+
+
+class AnalyticsTest(TestCase):
+
+    def setUp(self):
+        section = Section.objects.create(
+            abbreviation='Q', section_en='Physics', section_sv='Fysik')
+        program = StudyProgram.objects.create(
+            section=section, name_en='Physics', name_sv='Fysik')
+        self.team = make_team(name_en='Board')
+        self.position = make_position(make_role(self.team))
+        for status in ('draft', 'submitted', 'appointed', 'turned_down'):
+            make_application(self.position, make_member(
+                study_program=program, registration_year='2021'), status=status)
+        make_application(self.position, make_member(), status='approved')
+        self.round = self.position.recruitment_end
+
+    def test_refresh_and_report(self):
+        result = analytics.refresh()
+        self.assertEqual(result.rounds, [self.round])
+        rows = analytics.report('round')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['total'], 5)
+        self.assertEqual(rows[0]['conversion'], 0.25)
+
+        sections = analytics.report('section')
+        self.assertEqual(
+            [(row['label'], row['total']) for row in sections],
+            [('', 1), ('Physics', 4)])
+        team = analytics.report('team')[0]
+        self.assertEqual((team['label'], team['counts']['appointed']), ('Board', 1))
+        cohort = analytics.report('registration_year')
+        self.assertEqual([row['key'] for row in cohort], ['', '2021'])
+
+    def test_incremental_refresh(self):
+        analytics.refresh()
+        old = make_position(self.position.role,
+                            recruitment_end=date.today() - timedelta(days=400))
+        application = make_application(old, make_member())
+        # Closed rounds are only recomputed when touched
+        self.assertEqual(analytics.refresh().rounds, [old.recruitment_end, self.round])
+        self.assertEqual(analytics.refresh().rounds, [self.round])
+        Application.objects.filter(pk=application.pk).transition('approved')
+        self.assertEqual(analytics.refresh().rounds, [old.recruitment_end, self.round])
+
+        # Purged applications stay counted in the snapshots of old rounds
+        Application.objects.filter(pk=application.pk).purge()
+        analytics.refresh()
+        self.assertEqual(analytics.report(
+            'round', until=old.recruitment_end)[0]['total'], 1)
+        # Also when everything else is recomputed
+        result = analytics.refresh(full=True)
+        self.assertEqual(result.rounds, [self.round])
+        self.assertEqual(
+            [row['total'] for row in analytics.report('round')], [1, 5])
+
+    def test_view_reads_only_snapshots(self):
+        call_command('refresh_analytics', stdout=io.StringIO())
+        url = reverse('backend:analytics')
+        self.client.force_login(User.objects.create_user(
+            'staff', password='x', is_staff=True))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, {'dimension': 'team'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['total'], 5)
+        self.assertFalse(any(
+            'backend_application' in q['sql'] for q in captured))
+        self.assertEqual(
+            self.client.get(url, {'dimension': 'colour'}).status_code, 400)
+
+
+class ProfilingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    def test_requests_are_measured(self):
+        role = make_role(make_team())
+        for _ in range(3):
+            make_position(role)
+        with self.assertLogs('backend.profiling', 'INFO') as logs:
+            self.client.get(reverse('backend:open_positions'))
+
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'backend:open_positions')
+        self.assertEqual(record['queries'], 1)
+        self.assertEqual(record['duplicate_queries'], 0)
+
+        stats = metrics.registry.snapshot()['backend:open_positions']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['queries'], 1)
+
+        body = self.client.get(reverse('backend:metrics')).content.decode()
+        self.assertIn(
+            'apply_requests_total{view="backend:open_positions"} 1', body)
+        self.assertIn('apply_request_duration_seconds_count', body)
+        self.assertIn('apply_membership_cache_hits', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('backend:metrics')).status_code, 403)
+        response = self.client.get(
+            reverse('backend:metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PROFILING={'SAMPLE_RATE': 1.0, 'SLOW_MS': 0})
+    def test_slow_requests_are_profiled(self):
+        with self.assertLogs('backend.profiling', 'WARNING') as logs:
+            self.client.get(reverse('backend:open_positions'))
+        self.assertIn('cumulative', logs.output[-1])
+
+
+class ConcurrentSubmissionTest(TransactionTestCase):
+
+    def test_parallel_submissions_do_not_lock(self):
+        role = make_role(make_team())
+        positions = [make_position(role) for _ in range(10)]
+        members = [make_member(name='Member %d' % i) for i in range(8)]
+        errors = []
+
+        def submit(member):
+            try:
+                for position in positions:
+                    application = make_application(position, member, status='draft')
+                    # Read then write in one transaction, the pattern that
+                    # fails when SQLite has to upgrade a read lock
+                    application = Application.objects.only('id').get(pk=application.pk)
+                    application.status = 'submitted'
+                    application.save()
+            except OperationalError as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(m,)) for m in members]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Application.objects.filter(status='submitted').count(), 80)
+        self.assertEqual(
+            sum(PositionStatistics.objects.values_list('submitted', flat=True)), 80)
+
+
+class PositionDeleteTest(TransactionTestCase):
+
+    def test_delete_position_with_applications(self):
+        role = make_role(make_team())
+        position = make_position(role)
+        other = make_position(role)
+        make_application(position, make_member())
+        make_application(other, make_member())
+        # Outside a test transaction, so foreign keys are checked on commit
+        position.delete()
+        self.assertFalse(PositionStatistics.objects.filter(
+            position_id=position.pk).exists())
+        Position.objects.filter(role=role).delete()
+        self.assertFalse(PositionStatistics.objects.exists())
+        self.assertFalse(Application.objects.exists())
@@ -0,0 +1,271 @@
+"""
+Synchronization of membership status from the union's Unicore system.
+
+Only members changed since the previous sync are requested. The first page
+tells how many pages there are, the rest are fetched concurrently, and the
+statuses are written back with a few bulk updates. The client is chosen
+with the UNICORE_CLIENT setting so tests and local development can swap in
+a fake.
+
+The HTTP client expects GET {UNICORE_URL}/members?page=N[&since=ISO time]
+to answer with JSON of the form
+    {"results": [{"id": 1, "status": "member"}, ...],
+     "pages": 3, "timestamp": "2024-01-01T00:00:00+00:00"}
+and to honour If-None-Match with a 304 when nothing has changed. Single
+members are looked up with ?id= or ?ssn= on the same resource.
+"""
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Checkpoint, Member
+
+
+CHECKPOINT_NAME = 'unicore_member_sync'
+DEFAULT_WORKERS = 8
+UPDATE_BATCH_SIZE = 1000
+
+
+class UnicoreError(Exception):
+    """
+    Raised when Unicore cannot be reached or answers with something
+    unexpected.
+    """
+
+
+class MemberPage:
+    """
+    One page of membership changes.
+    Attributes:
+        members (list): Dicts with the "id" (Unicore id) and "status" of a member.
+        pages (int): Total number of pages in the result.
+        timestamp (str): Server time of the response, used as the next "since".
+        etag (str): ETag of the response, if any.
+        not_modified (bool): True if Unicore reported no changes.
+    """
+
+    def __init__(self, members=(), pages=1, timestamp=None, etag=None,
+                 not_modified=False):
+        self.members = list(members)
+        self.pages = pages
+        self.timestamp = timestamp
+        self.etag = etag
+        self.not_modified = not_modified
+
+
+class UnicoreClient:
+    """
+    Interface of a Unicore client.
+    """
+
+    def fetch_members(self, page=1, since=None, etag=None):
+        """
+        Return the MemberPage with the given number of the members changed
+        since the given ISO timestamp (all members if None).
+        """
+        raise NotImplementedError
+
+    def lookup_status(self, unicore_id=None, ssn=None):
+        """
+        Return the current membership status of a single member, looked up
+        by Unicore id or social security number, or None if Unicore does
+        not know the person.
+        """
+        raise NotImplementedError
+
+
+class HttpUnicoreClient(UnicoreClient):
+
+    def __init__(self, url=None, token=None, timeout=10):
+        self.url = (url or getattr(settings, 'UNICORE_URL', '')).rstrip('/')
+        self.token = token or getattr(settings, 'UNICORE_TOKEN', '')
+        self.timeout = timeout
+        if not self.url:
+            raise UnicoreError('UNICORE_URL is not configured')
+
+    def _get(self, path, params, etag=None):
+        """
+        GET a JSON document from Unicore. Returns (data, etag), with data
+        None for a 304 response.
+        """
+        request = urllib.request.Request(
+            '%s/%s?%s' % (self.url, path, urllib.parse.urlencode(params)))
+        request.add_header('Accept', 'application/json')
+        if self.token:
+            request.add_header('Authorization', 'Bearer %s' % self.token)
+        if etag:
+            request.add_header('If-None-Match', etag)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response), response.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None, etag
+            raise UnicoreError('Unicore answered %d' % e.code) from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise UnicoreError(str(e)) from e
+
+    def fetch_members(self, page=1, since=None, etag=None):
+        params = {'page': page}
+        if since:
+            params['since'] = since
+        data, response_etag = self._get('members', params, etag)
+        if data is None:
+            return MemberPage(etag=etag, not_modified=True)
+        return MemberPage(
+            members=data.get('results', []),
+            pages=data.get('pages', 1),
+            timestamp=data.get('timestamp'),
+            etag=response_etag,
+        )
+
+    def lookup_status(self, unicore_id=None, ssn=None):
+        params = {'id': unicore_id} if unicore_id is not None else {'ssn': ssn}
+        data, _ = self._get('members', params)
+        results = data.get('results', [])
+        if not results:
+            return None
+        return results[0].get('status')
+
+
+class LocalUnicoreClient(UnicoreClient):
+    """
+    In-memory stand-in for Unicore, for tests and local development.
+    Members are given as dicts with "id", "status" and optionally "ssn"
+    and a "modified" ISO timestamp.
+    """
+
+    def __init__(self, members=(), page_size=100):
+        self.members = list(members)
+        self.page_size = page_size
+        self.requests = []
+
+    def fetch_members(self, page=1, since=None, etag=None):
+        self.requests.append((page, since, etag))
+        changed = [
+            m for m in self.members
+            if since is None or m.get('modified', '') > since
+        ]
+        etag_now = '"%d"' % zlib.crc32(
+            json.dumps(changed, sort_keys=True).encode())
+        if etag and etag == etag_now:
+            return MemberPage(etag=etag, not_modified=True)
+        start = (page - 1) * self.page_size
+        return MemberPage(
+            members=changed[start:start + self.page_size],
+            pages=max(1, -(-len(changed) // self.page_size)),
+            timestamp=timezone.now().isoformat(),
+            etag=etag_now,
+        )
+
+    def lookup_status(self, unicore_id=None, ssn=None):
+        self.requests.append(('lookup', unicore_id, ssn))
+        for member in self.members:
+            if unicore_id is not None and member['id'] == unicore_id:
+                return member['status']
+            if unicore_id is None and ssn and member.get('ssn') == ssn:
+                return member['status']
+        return None
+
+
+def get_client():
+    path = getattr(settings, 'UNICORE_CLIENT', 'backend.unicore.HttpUnicoreClient')
+    return import_string(path)()
+
+
+class SyncResult:
+    """
+    Outcome of a sync.
+    Attributes:
+        fetched (int): Number of member records received from Unicore.
+        updated (int): Number of local members whose status changed.
+        unknown (int): Number of records without a matching local member.
+        pages (int): Number of pages fetched.
+        elapsed (float): Wall clock time of the sync in seconds.
+        not_modified (bool): True if Unicore reported no changes.
+    """
+
+    def __init__(self):
+        self.fetched = 0
+        self.updated = 0
+        self.unknown = 0
+        self.pages = 0
+        self.elapsed = 0.0
+        self.not_modified = False
+
+
+def _apply_statuses(statuses, result):
+    """
+    Write {unicore_id: status} to the members table, touching only the
+    members whose status actually changed.
+    """
+    valid = dict(Member.MEMBERSHIP_CHOICES)
+    ids = list(statuses)
+    changed = []
+    for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+        batch = ids[start:start + UPDATE_BATCH_SIZE]
+        members = Member.objects.filter(unicore_id__in=batch).only(
+            'id', 'unicore_id', 'status')
+        found = 0
+        for member in members:
+            found += 1
+            status = statuses[member.unicore_id]
+            if status not in valid:
+                status = 'unknown'
+            if member.status != status:
+                member.status = status
+                changed.append(member)
+        result.unknown += len(batch) - found
+    Member.objects.bulk_update(changed, ['status'], batch_size=UPDATE_BATCH_SIZE)
+    result.updated = len(changed)
+
+
+def sync_members(client=None, full=False, workers=DEFAULT_WORKERS):
+    """
+    Pull membership changes from Unicore and store them on Member.status.
+    Unless full is set only changes since the last successful sync are
+    requested. Returns a SyncResult.
+    """
+    client = client or get_client()
+    result = SyncResult()
+    started = time.perf_counter()
+    checkpoint = {} if full else Checkpoint.load(CHECKPOINT_NAME)
+    since = checkpoint.get('since')
+    requested_at = timezone.now().isoformat()
+
+    first = client.fetch_members(page=1, since=since, etag=checkpoint.get('etag'))
+    if first.not_modified:
+        result.not_modified = True
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    pages = [first]
+    if first.pages > 1:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pages += executor.map(
+                lambda number: client.fetch_members(page=number, since=since),
+                range(2, first.pages + 1),
+            )
+
+    statuses = {}
+    for page in pages:
+        for record in page.members:
+            statuses[int(record['id'])] = record.get('status', 'unknown')
+        result.fetched += len(page.members)
+    result.pages = len(pages)
+
+    _apply_statuses(statuses, result)
+    Checkpoint.store(CHECKPOINT_NAME, {
+        'since': first.timestamp or requested_at,
+        'etag': first.etag,
+    })
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,31 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'backend'
+
+urlpatterns = [
+    path('applications/', views.submit_application, name='submit_application'),
+    path('applications/mine/', views.my_applications, name='my_applications'),
+    path('applications/<int:application_id>/', views.application_detail, name='application_detail'),
+    path('applications/<int:application_id>/submit/', views.submit_draft, name='submit_draft'),
+    path('applications/<int:application_id>/draft/', views.draft_application, name='draft_application'),
+    path('analytics/', views.analytics_view, name='analytics'),
+    path('catalogue/', views.catalogue_view, name='catalogue'),
+    path('search/', views.search_view, name='search'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('members/<int:member_id>/mandates/', views.member_mandates, name='member_mandates'),
+    path('office-holders/', views.office_holders, name='office_holders'),
+    path('teams/<int:team_id>/', views.team_page, name='team_page'),
+    path('teams/<int:team_id>/logo/<str:size>/', views.team_logo, name='team_logo'),
+    path('teams/<int:team_id>/applications/', views.team_applications, name='team_applications'),
+    path('roles/<int:role_id>/', views.role_page, name='role_page'),
+    path('positions/<int:position_id>/', views.position_page, name='position_page'),
+    path('positions/open/', views.open_positions, name='open_positions'),
+    path('positions/eligible/', views.eligible_positions, name='eligible_positions'),
+    path(
+        'positions/<int:position_id>/applications/export/',
+        views.export_applications,
+        name='export_applications',
+    ),
+]
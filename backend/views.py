@@ -1,3 +1,668 @@
-from django.shortcuts import render
+import json
+import tempfile
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden,
+    HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from . import analytics, autosave, catalogue, exports, mandates, metrics, pages, renditions, search
+from .membership import get_verifier
+from .models import Application, InvalidTransition, Job, Member, Position, Reference, Role, Team
+from .pagination import apaginate_keyset, paginate_keyset, parse_page_size
+
+
+# Session key holding the id of the signed in Member
+MEMBER_SESSION_KEY = 'member_id'
+
+# Fields of a reference accepted from the applicant
+REFERENCE_FIELDS = ('name', 'phone_num', 'title', 'email', 'comment')
+
+
+OPEN_POSITION_FIELDS = (
+    'id',
+    'recruitment_start',
+    'recruitment_end',
+    'appointed',
+    'term_from',
+    'term_end',
+    'comment_eng',
+    'comment_sv',
+    'role_id',
+    'role__title_en',
+    'role__title_sv',
+    'role__role_type',
+    'role__team_id',
+    'role__team__name_en',
+    'role__team__name_sv',
+)
+
+
+def _serialize_open_position(row):
+    return {
+        'id': row['id'],
+        'recruitment_start': row['recruitment_start'],
+        'recruitment_end': row['recruitment_end'],
+        'appointed': row['appointed'],
+        'term_from': row['term_from'],
+        'term_end': row['term_end'],
+        'comment_en': row['comment_eng'],
+        'comment_sv': row['comment_sv'],
+        'role': {
+            'id': row['role_id'],
+            'title_en': row['role__title_en'],
+            'title_sv': row['role__title_sv'],
+            'role_type': row['role__role_type'],
+        },
+        'team': {
+            'id': row['role__team_id'],
+            'name_en': row['role__team__name_en'],
+            'name_sv': row['role__team__name_sv'],
+        },
+    }
+
+
+async def open_positions(request):
+    """
+    List the positions open for applications, soonest deadline first.
+    Role and team are joined into the same query and the list is paged
+    with an opaque cursor passed back as ?cursor=.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        page_size = parse_page_size(request.GET.get('limit'))
+        rows, next_cursor = await apaginate_keyset(
+            Position.objects.open().values(*OPEN_POSITION_FIELDS),
+            ('recruitment_end', 'id'),
+            cursor=request.GET.get('cursor'),
+            page_size=page_size,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'results': [_serialize_open_position(row) for row in rows],
+        'next': next_cursor,
+    })
+
+
+async def _session_member_id(request):
+    # The session store has no async API yet
+    return await sync_to_async(request.session.get)(MEMBER_SESSION_KEY)
+
+
+def _create_application(application, references):
+    with transaction.atomic():
+        application.save()
+        Reference.objects.bulk_create(references)
+        if application.status == 'submitted':
+            Job.objects.enqueue(
+                'application_received', {'application': application.pk},
+                key='application_received:%d' % application.pk)
+
+
+async def submit_application(request):
+    """
+    Apply to an open position as the signed in member. The JSON body holds
+    position, cover_letter, qualifications, gdpr, an optional status of
+    'draft' and an optional list of references.
+
+    Membership is verified with Unicore off the request thread, so waiting
+    on it does not hold a worker, and the confirmation emails are queued as
+    a job.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    member_id = await _session_member_id(request)
+    if member_id is None:
+        return JsonResponse({'error': 'Not signed in'}, status=401)
+    try:
+        data = json.loads(request.body)
+        position_id = int(data['position'])
+        references = list(data.get('references') or [])
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid application'}, status=400)
+    if not all(isinstance(reference, dict) for reference in references):
+        return JsonResponse({'error': 'Invalid application'}, status=400)
+
+    status = 'draft' if data.get('status') == 'draft' else 'submitted'
+    if status == 'submitted' and not data.get('gdpr'):
+        return JsonResponse({'error': 'The GDPR policy must be accepted'}, status=400)
+    position = await (
+        Position.objects.open()
+        .select_related('role')
+        .only('id', 'members_only', 'role__title_en', 'role__title_sv')
+        .filter(pk=position_id)
+        .afirst()
+    )
+    if position is None:
+        return JsonResponse({'error': 'Position is not open'}, status=404)
+    member = await Member.objects.filter(pk=member_id).afirst()
+    if member is None:
+        return JsonResponse({'error': 'Not signed in'}, status=401)
+    eligible = await Position.objects.filter(pk=position.pk).eligible_for(
+        member.pk, check_membership=False).aexists()
+    if not eligible:
+        return JsonResponse(
+            {'error': 'You cannot apply to this position'}, status=403)
+    if position.members_only:
+        is_member = await sync_to_async(
+            get_verifier().is_member, thread_sensitive=False)(member)
+        if not is_member:
+            return JsonResponse({'error': 'Only members may apply'}, status=403)
+
+    application = Application(
+        position=position,
+        member=member,
+        status=status,
+        cover_letter=data.get('cover_letter') or '',
+        qualifications=data.get('qualifications') or '',
+        gdpr=bool(data.get('gdpr')),
+    )
+    refs = []
+    try:
+        application.full_clean(exclude=('position', 'member'))
+        for reference in references:
+            ref = Reference(
+                application=application,
+                **{field: reference.get(field) or '' for field in REFERENCE_FIELDS})
+            ref.full_clean(exclude=('application',))
+            refs.append(ref)
+    except ValidationError as e:
+        return JsonResponse({'error': e.message_dict}, status=400)
+
+    try:
+        await sync_to_async(_create_application)(application, refs)
+    except IntegrityError:
+        # Lost a race with another submission by the same member
+        return JsonResponse(
+            {'error': 'You have already applied to this position'}, status=409)
+    return JsonResponse({'id': application.pk, 'status': status}, status=201)
+
+
+def _submit_draft(application_id, member_id, gdpr):
+    # Pending autosaves belong to the draft being submitted
+    autosave.flush(application_id)
+    with transaction.atomic():
+        application = (
+            Application.objects.select_for_update()
+            .filter(pk=application_id, member_id=member_id)
+            .first()
+        )
+        if application is None:
+            raise Http404
+        if not application.can_transition_to('submitted'):
+            raise InvalidTransition('Only drafts can be submitted')
+        if not Position.objects.open().filter(pk=application.position_id).exists():
+            raise InvalidTransition('Position is not open')
+        if gdpr and not application.gdpr:
+            application.gdpr = True
+            application.save(update_fields=['gdpr'])
+        if not application.gdpr:
+            raise ValidationError({'gdpr': ['The GDPR policy must be accepted']})
+        application.full_clean(exclude=('position', 'member'))
+        application.transition_to('submitted')
+        Job.objects.enqueue(
+            'application_received', {'application': application.pk},
+            key='application_received:%d' % application.pk)
+
+
+async def submit_draft(request, application_id):
+    """
+    Submit a draft of the signed in member, including its pending
+    autosaves. The JSON body may accept the GDPR policy with gdpr.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    member_id = await _session_member_id(request)
+    if member_id is None:
+        return JsonResponse({'error': 'Not signed in'}, status=401)
+    try:
+        data = json.loads(request.body or b'{}')
+        gdpr = bool(data.get('gdpr'))
+    except (AttributeError, ValueError):
+        return JsonResponse({'error': 'Invalid submission'}, status=400)
+    try:
+        await sync_to_async(_submit_draft)(application_id, member_id, gdpr)
+    except ValidationError as e:
+        return JsonResponse({'error': e.message_dict}, status=400)
+    except (InvalidTransition, autosave.DraftBusy):
+        return JsonResponse(
+            {'error': 'The draft can no longer be submitted'}, status=409)
+    return JsonResponse({'id': application_id, 'status': 'submitted'})
+
+
+async def my_applications(request):
+    """
+    The applications of the signed in member with their current status,
+    newest first.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    member_id = await _session_member_id(request)
+    if member_id is None:
+        return JsonResponse({'error': 'Not signed in'}, status=401)
+    rows = (
+        Application.objects
+        .filter(member_id=member_id)
+        .order_by('-id')
+        .values('id', 'status', 'position_id', 'position__recruitment_end',
+                'position__role__title_en', 'position__role__title_sv')
+    )
+    return JsonResponse({'results': [
+        {
+            'id': row['id'],
+            'status': row['status'],
+            'position': row['position_id'],
+            'recruitment_end': row['position__recruitment_end'],
+            'title_en': row['position__role__title_en'],
+            'title_sv': row['position__role__title_sv'],
+        }
+        async for row in rows
+    ]})
+
+
+async def draft_application(request, application_id):
+    """
+    GET returns the signed in member's draft with its version. PATCH
+    autosaves it: the JSON body holds the version the browser last saw and
+    the changed fields under 'fields'. A stale version is refused with 409
+    and the current version, which the browser should reload.
+    """
+    if request.method not in ('GET', 'PATCH'):
+        return HttpResponseNotAllowed(['GET', 'PATCH'])
+    member_id = await _session_member_id(request)
+    if member_id is None:
+        return JsonResponse({'error': 'Not signed in'}, status=401)
+    if request.method == 'GET':
+        try:
+            draft = await sync_to_async(autosave.get_draft)(
+                application_id, member_id)
+        except autosave.DraftNotFound:
+            raise Http404
+        return JsonResponse(draft)
+
+    try:
+        data = json.loads(request.body)
+        version = int(data['version'])
+        patch = dict(data['fields'])
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid autosave'}, status=400)
+    try:
+        result = await sync_to_async(autosave.save_patch)(
+            application_id, member_id, version, patch)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except autosave.DraftNotFound:
+        raise Http404
+    except autosave.DraftNotEditable:
+        return JsonResponse(
+            {'error': 'The application is no longer a draft'}, status=409)
+    except autosave.StaleDraft as e:
+        return JsonResponse({'error': str(e), 'version': e.version}, status=409)
+    return JsonResponse({'version': result.version, 'saved': result.saved})
+
+
+async def eligible_positions(request):
+    """
+    The open positions the signed in member may apply to, paged like
+    open_positions.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    member_id = await _session_member_id(request)
+    if member_id is None:
+        return JsonResponse({'error': 'Not signed in'}, status=401)
+    try:
+        page_size = parse_page_size(request.GET.get('limit'))
+        rows, next_cursor = await apaginate_keyset(
+            Position.objects.open().eligible_for(member_id)
+            .values(*OPEN_POSITION_FIELDS),
+            ('recruitment_end', 'id'),
+            cursor=request.GET.get('cursor'),
+            page_size=page_size,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'results': [_serialize_open_position(row) for row in rows],
+        'next': next_cursor,
+    })
+
+
+@require_GET
+def catalogue_view(request):
+    """
+    The team/role and section/study program catalogue in the language
+    given by ?lang=, defaulting to the active language.
+    """
+    return JsonResponse(catalogue.get_catalogue(request.GET.get('lang')))
+
+
+@require_GET
+@staff_member_required
+def export_applications(request, position_id):
+    """
+    Download every application to a position as CSV (the default) or
+    XLSX, given by ?format=.
+    """
+    position = get_object_or_404(Position.objects.select_related('role'), pk=position_id)
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in exports.FORMATS:
+        return JsonResponse({'error': 'Unknown format'}, status=400)
+    filename = exports.export_filename(position, file_format)
+
+    if file_format == 'csv':
+        # An ASGI server needs an async body to stream it
+        stream = (exports.astream_csv if settings.SERVER_MODE == 'asgi'
+                  else exports.stream_csv)
+        response = StreamingHttpResponse(
+            stream(position), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+        return response
+
+    spool = tempfile.TemporaryFile()
+    try:
+        exports.write_xlsx(position, spool)
+    except exports.ExportError as e:
+        spool.close()
+        return JsonResponse({'error': str(e)}, status=501)
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=filename)
+
+
+# Columns of the reviewer dashboard; the cover letter and qualifications
+# are left out and fetched by application_detail when opened
+DASHBOARD_FIELDS = (
+    'id',
+    'status',
+    'locked',
+    'rejection_date',
+    'position_id',
+    'position__role__title_en',
+    'position__role__title_sv',
+    'member_id',
+    'member__name',
+    'member__email',
+    'member__status',
+)
+
+
+@require_GET
+@staff_member_required
+def team_applications(request, team_id):
+    """
+    The applications to positions of a team for the reviewer dashboard,
+    ordered by status and paged with ?cursor=. ?status= and ?position=
+    narrow the list down.
+    """
+    team = get_object_or_404(Team.objects.only('id'), pk=team_id)
+    applications = Application.objects.filter(position__role__team=team)
+    if request.GET.get('status'):
+        applications = applications.filter(status=request.GET['status'])
+    try:
+        if request.GET.get('position'):
+            applications = applications.filter(
+                position_id=int(request.GET['position']))
+        page_size = parse_page_size(request.GET.get('limit'))
+        rows, next_cursor = paginate_keyset(
+            applications.values(*DASHBOARD_FIELDS),
+            ('status', 'id'),
+            cursor=request.GET.get('cursor'),
+            page_size=page_size,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'results': [
+            {
+                'id': row['id'],
+                'status': row['status'],
+                'locked': row['locked'],
+                'rejection_date': row['rejection_date'],
+                'position': {
+                    'id': row['position_id'],
+                    'title_en': row['position__role__title_en'],
+                    'title_sv': row['position__role__title_sv'],
+                },
+                'member': {
+                    'id': row['member_id'],
+                    'name': row['member__name'],
+                    'email': row['member__email'],
+                    'status': row['member__status'],
+                },
+            }
+            for row in rows
+        ],
+        'next': next_cursor,
+    })
+
+
+@require_GET
+@staff_member_required
+def application_detail(request, application_id):
+    """
+    The full text and references of one application.
+    """
+    application = get_object_or_404(
+        Application.objects.only('id', 'cover_letter', 'qualifications'),
+        pk=application_id,
+    )
+    return JsonResponse({
+        'id': application.id,
+        'cover_letter': application.cover_letter,
+        'qualifications': application.qualifications,
+        'references': list(application.reference.values(*REFERENCE_FIELDS)),
+    })
+
+
+# Renditions are looked up by team rather than by digest, so clients
+# revalidate daily with the ETag instead of caching forever
+LOGO_MAX_AGE = 60 * 60 * 24
+
+
+@require_GET
+def team_logo(request, team_id, size):
+    """
+    The team logo resized to size (see renditions.SIZES), as WebP when the
+    client accepts it and JPEG otherwise, or as given by ?format=.
+    """
+    team = get_object_or_404(Team.objects.only('logo'), pk=team_id)
+    if not team.logo or size not in renditions.SIZES:
+        raise Http404
+    file_format = request.GET.get('format') or renditions.negotiate_format(
+        request.headers.get('Accept'))
+    if file_format not in renditions.FORMATS:
+        return JsonResponse({'error': 'Unknown format'}, status=400)
+    try:
+        path, digest = renditions.get_rendition(team.logo, size, file_format)
+    except FileNotFoundError:
+        raise Http404
+    except renditions.RenditionError as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+    etag = '"%s-%s-%s"' % (digest, size, file_format)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(path, 'rb'), content_type=renditions.FORMATS[file_format][1])
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=LOGO_MAX_AGE)
+    if 'format' not in request.GET:
+        patch_vary_headers(response, ('Accept',))
+    return response
+
+
+# Pages are revalidated with their ETag, so a short max-age is enough
+PAGE_MAX_AGE = 60
+
+
+def _page_response(request, kind, pk):
+    """
+    The JSON page of kind for object pk, or 304 Not Modified when the
+    client's copy is still current.
+    """
+    page = pages.get_version(kind, pk)
+    if page is None:
+        raise Http404
+    language = catalogue.normalize_language(request.GET.get('lang'))
+    etag = page.etag(language)
+    last_modified = int(page.updated_at.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(
+            pages.render(page, language), content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=PAGE_MAX_AGE)
+    return response
+
+
+@require_GET
+def position_page(request, position_id):
+    """
+    A position with its role and team.
+    """
+    return _page_response(request, 'position', position_id)
+
+
+@require_GET
+def role_page(request, role_id):
+    """
+    A role with its team and currently open positions.
+    """
+    return _page_response(request, 'role', role_id)
+
+
+@require_GET
+def team_page(request, team_id):
+    """
+    A team with its active roles.
+    """
+    return _page_response(request, 'team', team_id)
+
+
+@require_GET
+@staff_member_required
+def analytics_view(request):
+    """
+    Recruitment statistics per round from the analytics snapshots, grouped
+    by ?dimension= (round, team, section or registration_year) and limited
+    to rounds between ?from= and ?to=.
+    """
+    try:
+        since = parse_date(request.GET.get('from') or '')
+        until = parse_date(request.GET.get('to') or '')
+        rows = analytics.report(
+            request.GET.get('dimension', 'round'),
+            since=since,
+            until=until,
+            language=catalogue.normalize_language(request.GET.get('lang')),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': rows})
+
+
+@require_GET
+@staff_member_required
+def search_view(request):
+    """
+    Ranked full-text search over applications and roles. ?q= is the
+    query, ?kind= may restrict it to 'application' or 'role'.
+    """
+    kind = request.GET.get('kind')
+    kinds = [kind] if kind else search.KINDS
+    try:
+        limit = parse_page_size(request.GET.get('limit'), default=20)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    hits = search.search(request.GET.get('q', ''), kinds=kinds, limit=limit)
+
+    ids = {'application': [], 'role': []}
+    for hit_kind, pk, _ in hits:
+        ids[hit_kind].append(pk)
+    roles = Role.objects.in_bulk(ids['role'])
+    applications = Application.objects.select_related(
+        'member', 'position__role').only(
+        'status', 'member__name', 'position__role__title_en',
+        'position__role__title_sv',
+    ).in_bulk(ids['application'])
+
+    results = []
+    for hit_kind, pk, score in hits:
+        if hit_kind == 'role' and pk in roles:
+            role = roles[pk]
+            results.append({
+                'kind': hit_kind, 'id': pk, 'score': score,
+                'title_en': role.title_en, 'title_sv': role.title_sv,
+            })
+        elif hit_kind == 'application' and pk in applications:
+            application = applications[pk]
+            results.append({
+                'kind': hit_kind, 'id': pk, 'score': score,
+                'status': application.status,
+                'member': application.member.name,
+                'position': application.position_id,
+                'title_en': application.position.role.title_en,
+                'title_sv': application.position.role.title_sv,
+            })
+    return JsonResponse({'results': results})
+
+
+@require_GET
+def member_mandates(request, member_id):
+    """
+    The full mandate history of a member, newest first. Only office
+    holders, past or present, are public; anyone else is not found.
+    """
+    timeline = mandates.member_timeline(member_id)
+    if not timeline:
+        raise Http404
+    member = get_object_or_404(Member.objects.only('id', 'name'), pk=member_id)
+    return JsonResponse({
+        'member': {'id': member.id, 'name': member.name},
+        'mandates': timeline,
+    })
+
+
+@require_GET
+def office_holders(request):
+    """
+    Everyone currently holding a position.
+    """
+    return JsonResponse({'results': mandates.current_office_holders()})
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Request metrics of this process in the Prometheus text format.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != 'Bearer %s' % token:
+        return HttpResponseForbidden()
+    gauges = {
+        'apply_membership_cache_%s' % name: value
+        for name, value in get_verifier().stats().items()
+    }
+    return HttpResponse(
+        metrics.render(gauges), content_type='text/plain; version=0.0.4')